@@ -0,0 +1,93 @@
+# analytics/aggregates.py
+from django.db import connection
+from django.db.models import Aggregate, Count, IntegerField, QuerySet
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+import collections
+import itertools
+
+class PercentileDisc(Aggregate):
+    """PostgreSQL's ordered-set PERCENTILE_DISC(fraction) WITHIN GROUP (ORDER BY expr)"""
+    function = 'PERCENTILE_DISC'
+    template = '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = IntegerField()
+    
+    def __init__(self, expression, fraction: float, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+def supports_percentile_aggregate() -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def percentile_index(count: int, percentile: int) -> int:
+    """Position of a percentile in a sorted list, as _calculate_percentile picks it"""
+    return min(int(count * percentile / 100), count - 1)
+
+
+def stream_percentiles(values: Iterable[int], count: int, percentiles: Iterable[int]) -> Dict[int, int]:
+    """Pick percentiles from values already sorted ascending in one pass.
+    
+    Only the wanted positions are kept, so memory stays constant however
+    many rows the window has.
+    """
+    percentiles = list(percentiles)
+    if count <= 0:
+        return {p: 0 for p in percentiles}
+    
+    wanted = {}
+    for p in percentiles:
+        wanted.setdefault(percentile_index(count, p), []).append(p)
+    
+    result = {}
+    last_position = max(wanted)
+    for position, value in enumerate(values):
+        for p in wanted.get(position, ()):
+            result[p] = value
+        if position >= last_position:
+            break
+    
+    for p in percentiles:
+        result.setdefault(p, 0)
+    return result
+
+
+def grouped_duration_percentiles(queryset: QuerySet, group_field: Union[str, Tuple[str, ...]], percentiles: Iterable[int], counts: Optional[Dict[Any, int]] = None, field: str = 'duration_ms') -> Dict[Any, Dict[int, int]]:
+    """Per-group percentiles of field in a single query.
+    
+    PostgreSQL computes them in the database with PERCENTILE_DISC, which
+    may land one rank higher than _calculate_percentile on exact
+    boundaries. Other backends stream only the values, sorted by group
+    then value, and use per-group row counts to tell where each group
+    ends, so no per-row group value has to be fetched and converted. Callers that already
+    counted the groups can pass counts, which must then follow the order
+    the database sorts group_field in (e.g. come from a query ordered by
+    it); otherwise they are counted in one extra query.
+    
+    group_field may be a tuple of fields, in which case groups are keyed
+    by tuples of their values.
+    """
+    group_fields = group_field if isinstance(group_field, tuple) else (group_field,)
+    percentiles = list(percentiles)
+    
+    if supports_percentile_aggregate():
+        result = {group: {p: 0 for p in percentiles} for group in counts or ()}
+        rows = queryset.values(*group_fields).order_by().annotate(**{
+            f'p{p}': PercentileDisc(field, p / 100) for p in percentiles
+        })
+        for row in rows:
+            group = tuple(row[f] for f in group_fields) if isinstance(group_field, tuple) else row[group_field]
+            result[group] = {p: int(row[f'p{p}'] or 0) for p in percentiles}
+        return result
+    
+    if counts is None:
+        rows = queryset.values_list(*group_fields).order_by(*group_fields).annotate(rows=Count('pk'))
+        counts = {(row[:-1] if isinstance(group_field, tuple) else row[0]): row[-1] for row in rows}
+    
+    result = {group: {p: 0 for p in percentiles} for group in counts}
+    values = queryset.order_by(*group_fields, field).values_list(field, flat=True).iterator(chunk_size=2000)
+    for group, count in counts.items():
+        if count > 0:
+            result[group] = stream_percentiles(itertools.islice(values, count), count, percentiles)
+            # Skip whatever the group has past its highest percentile
+            collections.deque(itertools.islice(values, count - 1 - max(percentile_index(count, p) for p in percentiles)), maxlen=0)
+    return result
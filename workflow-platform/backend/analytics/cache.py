@@ -0,0 +1,126 @@
+# analytics/cache.py
+from django.conf import settings
+from django.core.cache import caches
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import threading
+import time
+
+class AnalyticsCache:
+    """Stale-while-revalidate cache for analytics sections.
+    
+    Entries are keyed by section and its parameters. An entry is fresh for
+    ANALYTICS_CACHE_TTL seconds and until its section is invalidated
+    (completed runs and rollups do that). After that it is stale: the
+    first request to see it recomputes while every other request keeps
+    getting the stale value, for up to ANALYTICS_CACHE_STALE_TTL seconds.
+    Requests that miss while another one computes the same entry wait for
+    its result instead of computing it again, for up to max_wait seconds.
+    
+    Uses the 'analytics' cache alias. With the default local-memory backend
+    each process has its own entries and invalidations; a file (or any
+    shared) backend shares both between the web and worker processes.
+    """
+    
+    KEY_PREFIX = 'analytics'
+    # A recompute that takes longer than this lets another request try
+    LOCK_TIMEOUT = 120
+    WAIT_INTERVAL = 0.05
+    
+    def __init__(self):
+        self._stats = {'hits': 0, 'stale_hits': 0, 'coalesced': 0, 'misses': 0, 'revalidations': 0}
+        self._stats_lock = threading.Lock()
+    
+    @property
+    def cache(self):
+        return caches['analytics']
+    
+    def get_or_compute(self, section: str, params: Tuple, compute: Callable[[], Any], max_wait: Optional[float] = None) -> Any:
+        """Cached value of the section, computing it if needed. Raises
+        TimeoutError if another request still computes it after max_wait
+        seconds (default LOCK_TIMEOUT)."""
+        key = self._key(section, params)
+        # Read before computing, so an invalidation during the computation
+        # leaves the new entry stale
+        generation = self._generation(section)
+        entry = self.cache.get(key)
+        
+        if entry is not None:
+            age = time.time() - entry['computed_at']
+            if entry['generation'] == generation and age < settings.ANALYTICS_CACHE_TTL:
+                self._count('hits')
+                return entry['value']
+            
+            # Stale: only the request that takes the lock recomputes
+            if not self.cache.add(f'{key}:lock', True, timeout=self.LOCK_TIMEOUT):
+                self._count('stale_hits')
+                return entry['value']
+            self._count('revalidations')
+        elif not self.cache.add(f'{key}:lock', True, timeout=self.LOCK_TIMEOUT):
+            # Another request is already computing it; wait for its result
+            entry = self._wait_for_entry(key, self.LOCK_TIMEOUT if max_wait is None else max_wait)
+            if entry is not None:
+                self._count('coalesced')
+                return entry['value']
+            self._count('misses')
+        else:
+            self._count('misses')
+        
+        try:
+            value = compute()
+            self.cache.set(
+                key,
+                {'value': value, 'generation': generation, 'computed_at': time.time()},
+                timeout=settings.ANALYTICS_CACHE_TTL + settings.ANALYTICS_CACHE_STALE_TTL
+            )
+        finally:
+            self.cache.delete(f'{key}:lock')
+        return value
+    
+    def invalidate(self, sections: Optional[Iterable[str]] = None):
+        """Mark cached entries of sections (default: all) stale"""
+        for section in sections or [None]:
+            key = self._generation_key(section)
+            self.cache.add(key, 0, timeout=None)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                # Evicted between add and incr
+                self.cache.set(key, 1, timeout=None)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of this process"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = sum(stats.values())
+        served_cached = stats['hits'] + stats['stale_hits'] + stats['coalesced']
+        stats['hit_rate'] = round(served_cached / lookups, 4) if lookups else 0
+        return stats
+    
+    def _wait_for_entry(self, key: str, max_wait: float) -> Optional[Dict[str, Any]]:
+        """Poll for the entry until the computing request releases its lock"""
+        deadline = time.monotonic() + max_wait
+        while self.cache.get(f'{key}:lock') is not None:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Still being computed by another request after {max_wait:g}s")
+            time.sleep(self.WAIT_INTERVAL)
+        return self.cache.get(key)
+    
+    def _generation(self, section: str) -> Tuple[int, int]:
+        # Invalidating everything bumps the shared generation, so one
+        # counter update covers all sections
+        keys = [self._generation_key(None), self._generation_key(section)]
+        values = self.cache.get_many(keys)
+        return tuple(values.get(key, 0) for key in keys)
+    
+    def _generation_key(self, section: Optional[str]) -> str:
+        return f'{self.KEY_PREFIX}:generation:{section or "*"}'
+    
+    def _key(self, section: str, params: Tuple) -> str:
+        return ':'.join([self.KEY_PREFIX, section, *map(str, params)])
+    
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+
+analytics_cache = AnalyticsCache()
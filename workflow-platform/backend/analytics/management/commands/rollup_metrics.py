@@ -0,0 +1,40 @@
+# analytics/management/commands/rollup_metrics.py
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from analytics.rollups import MetricsRollup
+
+
+class Command(BaseCommand):
+    help = (
+        'Aggregate closed days of runs into WorkflowMetrics, StepMetrics and IntegrationHealth, '
+        'starting after the last day already rolled up. Schedule it (e.g. hourly from cron) so '
+        'analytics only has to scan raw runs for the current day.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--through', type=date.fromisoformat, help='Last day to roll up (YYYY-MM-DD, default yesterday)')
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help=(
+                'Drop the rollups and aggregate the history again. Days that prune_runs has deleted '
+                'runs from are kept as they are, since their raw runs are gone; only later days are rebuilt.'
+            )
+        )
+    
+    def handle(self, *args, **options):
+        through = options['through']
+        if through and through >= timezone.localdate():
+            raise CommandError('--through must be before today; days are only rolled up once closed')
+        
+        rollup = MetricsRollup()
+        if options['rebuild']:
+            days = rollup.rebuild()
+        else:
+            days = rollup.run(through=through)
+        
+        if days:
+            self.stdout.write(self.style.SUCCESS(f'Rolled up {len(days)} day(s): {days[0]} to {days[-1]}'))
+        else:
+            self.stdout.write('Nothing to roll up')
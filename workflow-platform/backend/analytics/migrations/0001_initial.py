@@ -0,0 +1,111 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('workflows', '0003_workflowstep_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('rolled_up_through', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='IntegrationHealth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('integration_name', models.CharField(db_index=True, max_length=255)),
+                ('timestamp', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('total_calls', models.IntegerField(default=0)),
+                ('successful_calls', models.IntegerField(default=0)),
+                ('failed_calls', models.IntegerField(default=0)),
+                ('avg_response_time_ms', models.IntegerField(default=0)),
+                ('p95_response_time_ms', models.IntegerField(default=0)),
+                ('p99_response_time_ms', models.IntegerField(default=0)),
+                ('duration_sum_ms', models.BigIntegerField(default=0)),
+                ('error_rate', models.FloatField(default=0.0)),
+                ('availability_percent', models.FloatField(default=100.0)),
+                ('status', models.CharField(choices=[('healthy', 'Healthy'), ('degraded', 'Degraded'), ('down', 'Down')], default='healthy', max_length=20)),
+            ],
+            options={
+                'ordering': ['-timestamp'],
+                'indexes': [models.Index(fields=['integration_name', '-timestamp'], name='analytics_i_integra_297f6f_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StepMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('step_name', models.CharField(db_index=True, max_length=255)),
+                ('date', models.DateField(db_index=True)),
+                ('total_calls', models.IntegerField(default=0)),
+                ('successful_calls', models.IntegerField(default=0)),
+                ('failed_calls', models.IntegerField(default=0)),
+                ('skipped_calls', models.IntegerField(default=0)),
+                ('success_rate', models.FloatField(default=0.0)),
+                ('avg_duration_ms', models.IntegerField(default=0)),
+                ('p95_duration_ms', models.IntegerField(default=0)),
+                ('p99_duration_ms', models.IntegerField(default=0)),
+                ('max_duration_ms', models.IntegerField(default=0)),
+                ('duration_sum_ms', models.BigIntegerField(default=0)),
+                ('timeout_count', models.IntegerField(default=0)),
+                ('validation_errors', models.IntegerField(default=0)),
+                ('integration_errors', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('workflow', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='workflows.workflow')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('workflow', 'step_name', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkflowMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('total_runs', models.IntegerField(default=0)),
+                ('successful_runs', models.IntegerField(default=0)),
+                ('failed_runs', models.IntegerField(default=0)),
+                ('success_rate', models.FloatField(default=0.0)),
+                ('avg_duration_ms', models.IntegerField(default=0)),
+                ('median_duration_ms', models.IntegerField(default=0)),
+                ('p95_duration_ms', models.IntegerField(default=0)),
+                ('p99_duration_ms', models.IntegerField(default=0)),
+                ('min_duration_ms', models.IntegerField(default=0)),
+                ('max_duration_ms', models.IntegerField(default=0)),
+                ('duration_sum_ms', models.BigIntegerField(default=0)),
+                ('success_duration_sum_ms', models.BigIntegerField(default=0)),
+                ('timeout_errors', models.IntegerField(default=0)),
+                ('auth_errors', models.IntegerField(default=0)),
+                ('rate_limit_errors', models.IntegerField(default=0)),
+                ('not_found_errors', models.IntegerField(default=0)),
+                ('validation_errors', models.IntegerField(default=0)),
+                ('other_errors', models.IntegerField(default=0)),
+                ('duration_change_percent', models.FloatField(default=0.0)),
+                ('success_rate_change_percent', models.FloatField(default=0.0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('workflow', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metrics', to='workflows.workflow')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['workflow', '-date'], name='analytics_w_workflo_e7ccf2_idx')],
+                'unique_together': {('workflow', 'date')},
+            },
+        ),
+    ]
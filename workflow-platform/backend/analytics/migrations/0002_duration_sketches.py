@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='integrationhealth',
+            name='duration_sketch',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='stepmetrics',
+            name='duration_sketch',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='workflowmetrics',
+            name='duration_sketch',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='workflowmetrics',
+            name='run_duration_sketch',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
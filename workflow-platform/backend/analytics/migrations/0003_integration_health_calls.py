@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_duration_sketches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='integrationhealth',
+            name='app_type',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='integrationhealth',
+            name='avg_ttfb_ms',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='integrationhealth',
+            name='retries',
+            field=models.IntegerField(default=0),
+        ),
+    ]
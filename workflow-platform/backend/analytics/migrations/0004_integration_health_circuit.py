@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-18 05:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_integration_health_calls'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='integrationhealth',
+            name='circuit_state',
+            field=models.CharField(blank=True, choices=[('closed', 'Closed'), ('open', 'Open'), ('half_open', 'Half-open')], max_length=20),
+        ),
+        migrations.AddField(
+            model_name='integrationhealth',
+            name='credential',
+            field=models.CharField(blank=True, max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='integrationhealth',
+            index=models.Index(fields=['circuit_state', 'integration_name', 'credential', '-timestamp'], name='health_circuit_idx'),
+        ),
+    ]
@@ -5,7 +5,7 @@ from workflows.models import Workflow
 class WorkflowMetrics(models.Model):
     """Store aggregated metrics per workflow"""
     workflow = models.ForeignKey(Workflow, on_delete=models.CASCADE, related_name='metrics')
-    date = models.DateField(auto_now_add=True, db_index=True)
+    date = models.DateField(db_index=True)
     
     # Execution metrics
     total_runs = models.IntegerField(default=0)
@@ -20,11 +20,20 @@ class WorkflowMetrics(models.Model):
     p99_duration_ms = models.IntegerField(default=0)
     min_duration_ms = models.IntegerField(default=0)
     max_duration_ms = models.IntegerField(default=0)
+    # Sums merge exactly across days, averages don't
+    duration_sum_ms = models.BigIntegerField(default=0)  # all runs
+    success_duration_sum_ms = models.BigIntegerField(default=0)
+    # Serialized DDSketch (analytics/sketches.py) of successful and of all
+    # run durations; percentiles for any window are a merge of these
+    duration_sketch = models.JSONField(default=dict, blank=True)
+    run_duration_sketch = models.JSONField(default=dict, blank=True)
     
     # Error metrics
     timeout_errors = models.IntegerField(default=0)
     auth_errors = models.IntegerField(default=0)
     rate_limit_errors = models.IntegerField(default=0)
+    not_found_errors = models.IntegerField(default=0)
+    validation_errors = models.IntegerField(default=0)
     other_errors = models.IntegerField(default=0)
     
     # Trend
@@ -45,7 +54,7 @@ class StepMetrics(models.Model):
     """Store aggregated step-level metrics"""
     workflow = models.ForeignKey(Workflow, on_delete=models.CASCADE)
     step_name = models.CharField(max_length=255, db_index=True)
-    date = models.DateField(auto_now_add=True, db_index=True)
+    date = models.DateField(db_index=True)
     
     # Execution
     total_calls = models.IntegerField(default=0)
@@ -59,6 +68,8 @@ class StepMetrics(models.Model):
     p95_duration_ms = models.IntegerField(default=0)
     p99_duration_ms = models.IntegerField(default=0)
     max_duration_ms = models.IntegerField(default=0)
+    duration_sum_ms = models.BigIntegerField(default=0)
+    duration_sketch = models.JSONField(default=dict, blank=True)
     
     # Errors
     timeout_count = models.IntegerField(default=0)
@@ -74,8 +85,11 @@ class StepMetrics(models.Model):
 
 class IntegrationHealth(models.Model):
     """Track integration/host health metrics"""
+    # API host the calls went to (StepRun.host)
     integration_name = models.CharField(max_length=255, db_index=True)
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    app_type = models.CharField(max_length=50, blank=True)
+    # Start of the period the row covers (a UTC day for rollups)
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
     
     total_calls = models.IntegerField(default=0)
     successful_calls = models.IntegerField(default=0)
@@ -84,6 +98,10 @@ class IntegrationHealth(models.Model):
     avg_response_time_ms = models.IntegerField(default=0)
     p95_response_time_ms = models.IntegerField(default=0)
     p99_response_time_ms = models.IntegerField(default=0)
+    duration_sum_ms = models.BigIntegerField(default=0)
+    duration_sketch = models.JSONField(default=dict, blank=True)
+    avg_ttfb_ms = models.IntegerField(default=0)
+    retries = models.IntegerField(default=0)
     
     error_rate = models.FloatField(default=0.0)
     availability_percent = models.FloatField(default=100.0)
@@ -94,8 +112,45 @@ class IntegrationHealth(models.Model):
         default='healthy'
     )
     
+    # Set on circuit breaker state changes (integrations/services/circuit.py):
+    # the new state, the credential digest the breaker covers, and the call
+    # window that led to it. Empty on the daily rollup rows.
+    circuit_state = models.CharField(
+        max_length=20,
+        choices=[('closed', 'Closed'), ('open', 'Open'), ('half_open', 'Half-open')],
+        blank=True
+    )
+    credential = models.CharField(max_length=16, blank=True)
+    
     class Meta:
         ordering = ['-timestamp']
         indexes = [
             models.Index(fields=['integration_name', '-timestamp']),
+            models.Index(fields=['circuit_state', 'integration_name', 'credential', '-timestamp'], name='health_circuit_idx'),
         ]
+
+class RollupWatermark(models.Model):
+    """Last day the daily metric rollups are complete for (DAILY), and the
+    last day run pruning has deleted raw runs from (PRUNED)"""
+    name = models.CharField(max_length=50, unique=True)
+    rolled_up_through = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    DAILY = 'daily'
+    PRUNED = 'pruned'
+    
+    @classmethod
+    def rolled_up_through_date(cls, name: str = DAILY):
+        """Date the rollups cover up to and including, or None before the first rollup"""
+        return cls.objects.filter(name=name).values_list('rolled_up_through', flat=True).first()
+    
+    @classmethod
+    def advance(cls, name: str, day):
+        """Move a watermark forward to day (never back); call inside a transaction"""
+        watermark, created = cls.objects.select_for_update().get_or_create(
+            name=name,
+            defaults={'rolled_up_through': day}
+        )
+        if not created and watermark.rolled_up_through < day:
+            watermark.rolled_up_through = day
+            watermark.save(update_fields=['rolled_up_through', 'updated_at'])
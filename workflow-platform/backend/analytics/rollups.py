@@ -0,0 +1,291 @@
+# analytics/rollups.py
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.utils import timezone
+from datetime import date, timedelta
+from runs import errors
+from runs.models import WorkflowRun, StepRun
+from .cache import analytics_cache
+from .models import WorkflowMetrics, StepMetrics, IntegrationHealth, RollupWatermark
+from .services import AnalyticsService, day_start
+from .sketches import DDSketch
+from collections import Counter, defaultdict
+from typing import List, Optional
+
+# Step error category -> StepMetrics counter; the rest are integration errors
+STEP_ERROR_FIELDS = {
+    errors.TIMEOUT: 'timeout_count',
+    errors.VALIDATION: 'validation_errors',
+}
+
+class MetricsRollup:
+    """Incrementally fills WorkflowMetrics, StepMetrics and IntegrationHealth.
+    
+    Each closed day is aggregated once from raw runs into one row per
+    workflow, per workflow step and per integration, with a duration
+    sketch per row so percentiles merge across days. The last day written
+    is kept in RollupWatermark so the next pass starts after it.
+    """
+    
+    def __init__(self):
+        self.analytics = AnalyticsService()
+    
+    def run(self, through: Optional[date] = None) -> List[date]:
+        """Roll up every closed day after the watermark, oldest first.
+        
+        Stops at `through`, and never goes past yesterday: today is still
+        open, and the watermark would keep its later runs out for good.
+        """
+        rolled_up = []
+        for day in self.pending_days(through):
+            self.rollup_day(day)
+            rolled_up.append(day)
+        
+        if rolled_up:
+            analytics_cache.invalidate()
+        return rolled_up
+    
+    def pending_days(self, through: Optional[date] = None) -> List[date]:
+        """Days the next run(through) would roll up, without writing anything"""
+        yesterday = timezone.localdate() - timedelta(days=1)
+        through = min(through, yesterday) if through else yesterday
+        day = self._first_pending_day()
+        days = []
+        
+        while day is not None and day <= through:
+            # A day is closed once its runs have finished. Runs stuck in
+            # pending/running stop holding it back after the grace period.
+            grace = timedelta(hours=settings.ANALYTICS_ROLLUP_GRACE_HOURS)
+            if self._has_unfinished_runs(day) and timezone.now() < day_start(day + timedelta(days=1)) + grace:
+                break
+            
+            days.append(day)
+            day += timedelta(days=1)
+        return days
+    
+    def rollup_day(self, day: date):
+        """(Re)write the rollup rows of one day and advance the watermark to it"""
+        start, end = day_start(day), day_start(day + timedelta(days=1))
+        
+        workflow_metrics = self._workflow_metrics(day, start, end)
+        step_metrics = self._step_metrics(day, start, end)
+        integration_health = self._integration_health(start, end)
+        
+        with transaction.atomic():
+            WorkflowMetrics.objects.filter(date=day).delete()
+            StepMetrics.objects.filter(date=day).delete()
+            IntegrationHealth.objects.filter(timestamp=start, circuit_state='').delete()
+            
+            WorkflowMetrics.objects.bulk_create(workflow_metrics)
+            StepMetrics.objects.bulk_create(step_metrics)
+            IntegrationHealth.objects.bulk_create(integration_health)
+            
+            RollupWatermark.advance(RollupWatermark.DAILY, day)
+    
+    def rebuild(self) -> List[date]:
+        """Drop the rollup rows and roll those days up again from raw runs.
+        
+        Days that run pruning has deleted runs from (up to the PRUNED
+        watermark, see runs/retention.py) can't be recomputed: their rows
+        are kept as they are and only the days after them are rebuilt.
+        Without pruning, that is all history.
+        """
+        pruned_through = RollupWatermark.rolled_up_through_date(RollupWatermark.PRUNED)
+        with transaction.atomic():
+            if pruned_through is None:
+                WorkflowMetrics.objects.all().delete()
+                StepMetrics.objects.all().delete()
+                IntegrationHealth.objects.filter(circuit_state='').delete()
+                RollupWatermark.objects.filter(name=RollupWatermark.DAILY).delete()
+            else:
+                WorkflowMetrics.objects.filter(date__gt=pruned_through).delete()
+                StepMetrics.objects.filter(date__gt=pruned_through).delete()
+                IntegrationHealth.objects.filter(
+                    timestamp__gte=day_start(pruned_through + timedelta(days=1)),
+                    circuit_state=''
+                ).delete()
+                RollupWatermark.objects.update_or_create(
+                    name=RollupWatermark.DAILY,
+                    defaults={'rolled_up_through': pruned_through}
+                )
+        return self.run()
+    
+    def _first_pending_day(self) -> Optional[date]:
+        through = RollupWatermark.rolled_up_through_date()
+        if through is not None:
+            return through + timedelta(days=1)
+        
+        first_run = WorkflowRun.objects.aggregate(first=Min('started_at'))['first']
+        return timezone.localdate(first_run) if first_run else None
+    
+    def _has_unfinished_runs(self, day: date) -> bool:
+        return WorkflowRun.objects.filter(
+            started_at__gte=day_start(day),
+            started_at__lt=day_start(day + timedelta(days=1)),
+            status__in=['pending', 'running']
+        ).exists()
+    
+    def _workflow_metrics(self, day: date, start, end) -> List[WorkflowMetrics]:
+        runs = WorkflowRun.objects.filter(started_at__gte=start, started_at__lt=end)
+        success = Q(status='success')
+        
+        rows = list(runs.values('workflow_id').order_by('workflow_id').annotate(
+            total_runs=Count('run_id'),
+            successful_runs=Count('run_id', filter=success),
+            failed_runs=Count('run_id', filter=Q(status='failed')),
+            duration_sum_ms=Sum('duration_ms'),
+            success_duration_sum_ms=Sum('duration_ms', filter=success),
+            min_duration_ms=Min('duration_ms', filter=success),
+            max_duration_ms=Max('duration_ms', filter=success),
+        ))
+        
+        # One pass over the day's durations feeds both sketches
+        success_sketches = defaultdict(DDSketch)
+        run_sketches = defaultdict(DDSketch)
+        durations = runs.values_list('workflow_id', 'status', 'duration_ms')
+        for workflow_id, status, duration in durations.iterator(chunk_size=2000):
+            run_sketches[workflow_id].add(duration)
+            if status == 'success':
+                success_sketches[workflow_id].add(duration)
+        
+        run_errors = defaultdict(Counter)
+        failed_runs = runs.filter(status='failed').values('workflow_id', 'error_category').order_by().annotate(
+            count=Count('run_id')
+        ).values_list('workflow_id', 'error_category', 'count')
+        for workflow_id, category, count in failed_runs:
+            field = AnalyticsService.RUN_ERROR_FIELDS[category or errors.OTHER]
+            run_errors[workflow_id][field] += count
+        
+        # Day-over-day trend against the previous day's rollup
+        previous = {
+            row['workflow_id']: row
+            for row in WorkflowMetrics.objects.filter(date=day - timedelta(days=1)).values(
+                'workflow_id', 'avg_duration_ms', 'success_rate'
+            )
+        }
+        
+        metrics = []
+        for row in rows:
+            workflow_id = row['workflow_id']
+            success_count = row['successful_runs']
+            success_rate = success_count / row['total_runs']
+            avg_duration = int(row['success_duration_sum_ms'] / success_count) if success_count else 0
+            prev = previous.get(workflow_id)
+            sketch = success_sketches[workflow_id]
+            
+            metrics.append(WorkflowMetrics(
+                workflow_id=workflow_id,
+                date=day,
+                total_runs=row['total_runs'],
+                successful_runs=success_count,
+                failed_runs=row['failed_runs'],
+                success_rate=round(success_rate, 4),
+                avg_duration_ms=avg_duration,
+                median_duration_ms=sketch.percentile(50),
+                p95_duration_ms=sketch.percentile(95),
+                p99_duration_ms=sketch.percentile(99),
+                min_duration_ms=row['min_duration_ms'] or 0,
+                max_duration_ms=row['max_duration_ms'] or 0,
+                duration_sum_ms=row['duration_sum_ms'] or 0,
+                success_duration_sum_ms=row['success_duration_sum_ms'] or 0,
+                duration_sketch=sketch.to_dict(),
+                run_duration_sketch=run_sketches[workflow_id].to_dict(),
+                duration_change_percent=self._change_percent(avg_duration, prev and prev['avg_duration_ms']),
+                success_rate_change_percent=self._change_percent(success_rate, prev and prev['success_rate']),
+                **run_errors[workflow_id]
+            ))
+        return metrics
+    
+    def _step_metrics(self, day: date, start, end) -> List[StepMetrics]:
+        steps = StepRun.objects.filter(started_at__gte=start, started_at__lt=end)
+        group = ('run__workflow_id', 'step_name')
+        
+        rows = list(steps.values(*group).order_by(*group).annotate(
+            total_calls=Count('step_id'),
+            failed_calls=Count('step_id', filter=Q(status='failed')),
+            skipped_calls=Count('step_id', filter=Q(status='skipped')),
+            duration_sum_ms=Sum('duration_ms'),
+            max_duration_ms=Max('duration_ms'),
+        ))
+        
+        sketches = defaultdict(DDSketch)
+        for workflow_id, step_name, duration in steps.values_list(*group, 'duration_ms').iterator(chunk_size=2000):
+            sketches[(workflow_id, step_name)].add(duration)
+        
+        step_errors = defaultdict(Counter)
+        failed_steps = steps.filter(status='failed').values(*group, 'error_category').order_by().annotate(
+            count=Count('step_id')
+        ).values_list(*group, 'error_category', 'count')
+        for workflow_id, step_name, category, count in failed_steps:
+            step_errors[(workflow_id, step_name)][STEP_ERROR_FIELDS.get(category, 'integration_errors')] += count
+        
+        metrics = []
+        for row in rows:
+            key = (row['run__workflow_id'], row['step_name'])
+            calls = row['total_calls']
+            # Matches get_step_diagnostics: whatever did not fail or get skipped
+            success_count = calls - row['failed_calls'] - row['skipped_calls']
+            
+            metrics.append(StepMetrics(
+                workflow_id=key[0],
+                step_name=key[1],
+                date=day,
+                total_calls=calls,
+                successful_calls=success_count,
+                failed_calls=row['failed_calls'],
+                skipped_calls=row['skipped_calls'],
+                success_rate=round(success_count / calls, 4),
+                avg_duration_ms=int(row['duration_sum_ms'] / calls),
+                p95_duration_ms=sketches[key].percentile(95),
+                p99_duration_ms=sketches[key].percentile(99),
+                max_duration_ms=row['max_duration_ms'] or 0,
+                duration_sum_ms=row['duration_sum_ms'] or 0,
+                duration_sketch=sketches[key].to_dict(),
+                **step_errors[key]
+            ))
+        return metrics
+    
+    def _integration_health(self, start, end) -> List[IntegrationHealth]:
+        steps = StepRun.objects.filter(started_at__gte=start, started_at__lt=end)
+        
+        rows = {row['host']: row for row in self.analytics._host_calls(steps).annotate(
+            request_sum_ms=Sum('request_ms'),
+            ttfb_sum_ms=Sum('ttfb_ms'),
+            ttfb_calls=Count('ttfb_ms'),
+            retries=Sum('retries'),
+        )}
+        
+        sketches = defaultdict(DDSketch)
+        for host, request_ms in steps.exclude(host='').values_list('host', 'request_ms').iterator(chunk_size=2000):
+            sketches[host].add(request_ms)
+        
+        health = []
+        for host, row in rows.items():
+            sketch = sketches[host]
+            error_rate = row['failed'] / row['calls']
+            
+            health.append(IntegrationHealth(
+                integration_name=host,
+                app_type=row['app'],
+                timestamp=start,
+                total_calls=row['calls'],
+                successful_calls=row['calls'] - row['failed'],
+                failed_calls=row['failed'],
+                avg_response_time_ms=int(row['request_sum_ms'] / row['calls']),
+                p95_response_time_ms=sketch.percentile(95),
+                p99_response_time_ms=sketch.percentile(99),
+                duration_sum_ms=row['request_sum_ms'],
+                duration_sketch=sketch.to_dict(),
+                avg_ttfb_ms=int(row['ttfb_sum_ms'] / row['ttfb_calls']) if row['ttfb_calls'] else 0,
+                retries=row['retries'],
+                error_rate=round(error_rate, 4),
+                availability_percent=round((1 - error_rate) * 100, 2),
+                status=self.analytics._health_status(error_rate)
+            ))
+        return health
+    
+    def _change_percent(self, value: float, previous: Optional[float]) -> float:
+        if not previous:
+            return 0.0
+        return round((value - previous) / previous * 100, 2)
@@ -1,57 +1,93 @@
 # analytics/services.py
-from django.db.models import Count, Avg, Max, Q, F
+from django.conf import settings
+from django.db.models import Count, Exists, Max, OuterRef, Q, QuerySet, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncMinute
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, datetime, time, timedelta
+from runs import errors
 from runs.models import WorkflowRun, StepRun
-from workflows.models import Workflow
-from typing import Dict, Any, List
+from .aggregates import grouped_duration_percentiles
+from .models import WorkflowMetrics, StepMetrics, IntegrationHealth, RollupWatermark
+from .sketches import DDSketch
+from collections import defaultdict
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+def day_start(day: date) -> datetime:
+    """Midnight opening day in the project time zone"""
+    return timezone.make_aware(datetime.combine(day, time.min))
 
 class AnalyticsService:
-    """Enhanced analytics with deeper insights"""
+    """Enhanced analytics with deeper insights.
+    
+    Windows are whole calendar days ending today. Days the rollup job has
+    closed (see analytics/rollups.py) are read from WorkflowMetrics,
+    StepMetrics and IntegrationHealth; only the days after its watermark
+    are aggregated from raw runs. Window percentiles merge the rollups'
+    duration sketches, so they are within
+    ANALYTICS_SKETCH_RELATIVE_ACCURACY of the exact values.
+    """
+    
+    # granularity -> (bucket function, timestamp label format)
+    GRANULARITIES = {
+        'minute': (TruncMinute, '%Y-%m-%d %H:%M'),
+        'hour': (TruncHour, '%Y-%m-%d %H:00'),
+        'day': (TruncDay, '%Y-%m-%d'),
+    }
+    # Longest period a fine granularity may cover: minute buckets over a
+    # month are ~43k points, all from raw runs
+    GRANULARITY_MAX_DAYS = {
+        'minute': 1,
+        'hour': 31,
+    }
+    
+    RUN_TOTAL_FIELDS = ('total_runs', 'successful_runs', 'failed_runs', 'duration_sum_ms', 'success_duration_sum_ms')
+    STEP_TOTAL_FIELDS = ('total_calls', 'failed_calls', 'skipped_calls', 'duration_sum_ms')
+    
+    # Run error category -> WorkflowMetrics counter
+    RUN_ERROR_FIELDS = {
+        errors.TIMEOUT: 'timeout_errors',
+        errors.AUTHENTICATION: 'auth_errors',
+        errors.RATE_LIMIT: 'rate_limit_errors',
+        errors.NOT_FOUND: 'not_found_errors',
+        errors.VALIDATION: 'validation_errors',
+        errors.OTHER: 'other_errors',
+    }
+    
+    # Host statuses, least to most severe
+    HEALTH_STATUSES = ('healthy', 'degraded', 'down')
     
     def get_overview_stats(self, days: int = 7) -> Dict[str, Any]:
         """Get comprehensive overview analytics"""
-        start_date = timezone.now() - timedelta(days=days)
+        (first_day, last_day), (prev_first, prev_last) = self._periods(days)
         
-        # Total runs
-        total_runs = WorkflowRun.objects.filter(started_at__gte=start_date).count()
+        current = self._sum_totals(self._workflow_totals(first_day, last_day).values(), self.RUN_TOTAL_FIELDS)
+        previous = self._sum_totals(self._workflow_totals(prev_first, prev_last).values(), self.RUN_TOTAL_FIELDS)
         
+        total_runs = current['total_runs']
         if total_runs == 0:
             return self._empty_overview()
         
         # Success rate
-        success_count = WorkflowRun.objects.filter(
-            started_at__gte=start_date,
-            status='success'
-        ).count()
+        success_count = current['successful_runs']
         success_rate = success_count / total_runs
         failed_count = total_runs - success_count
         
         # Average duration
-        avg_duration = WorkflowRun.objects.filter(
-            started_at__gte=start_date,
-            status='success'
-        ).aggregate(Avg('duration_ms'))['duration_ms__avg'] or 0
+        avg_duration = current['success_duration_sum_ms'] / success_count if success_count else 0
         
         # Percentiles
-        runs = WorkflowRun.objects.filter(
-            started_at__gte=start_date,
-            status='success'
-        ).order_by('duration_ms').values_list('duration_ms', flat=True)
-        
-        p50_duration = self._calculate_percentile(list(runs), 50)
-        p95_duration = self._calculate_percentile(list(runs), 95)
-        p99_duration = self._calculate_percentile(list(runs), 99)
+        sketch = self._window_sketches(
+            first_day, last_day,
+            WorkflowMetrics, ('date', 'duration_sketch'),
+            WorkflowRun.objects.filter(status='success'), ('status', 'duration_ms'),
+            group=lambda key: None
+        )[None]
+        percentiles = sketch.percentiles([50, 95, 99])
         
         # Trend calculation
-        prev_start = start_date - timedelta(days=days)
-        prev_runs = WorkflowRun.objects.filter(
-            started_at__gte=prev_start,
-            started_at__lt=start_date
-        )
         prev_success_rate = (
-            prev_runs.filter(status='success').count() / prev_runs.count()
-            if prev_runs.count() > 0 else success_rate
+            previous['successful_runs'] / previous['total_runs']
+            if previous['total_runs'] > 0 else success_rate
         )
         success_rate_trend = ((success_rate - prev_success_rate) / prev_success_rate * 100) if prev_success_rate > 0 else 0
         
@@ -62,51 +98,68 @@ class AnalyticsService:
             'success_rate': round(success_rate, 4),
             'success_rate_trend': round(success_rate_trend, 2),
             'avg_duration_ms': int(avg_duration),
-            'p50_duration_ms': p50_duration,
-            'p95_duration_ms': p95_duration,
-            'p99_duration_ms': p99_duration,
+            'p50_duration_ms': percentiles[50],
+            'p95_duration_ms': percentiles[95],
+            'p99_duration_ms': percentiles[99],
             'period_days': days
         }
     
-    def get_time_series(self, days: int = 7) -> List[Dict[str, Any]]:
+    def get_time_series(self, days: int = 7, granularity: str = 'day') -> List[Dict[str, Any]]:
         """Get detailed time series with multiple metrics"""
-        start_date = timezone.now() - timedelta(days=days)
-        
-        # Group by date
-        runs_by_date = {}
-        runs = WorkflowRun.objects.filter(started_at__gte=start_date)
-        
-        for run in runs:
-            date_key = run.started_at.strftime('%Y-%m-%d')
-            if date_key not in runs_by_date:
-                runs_by_date[date_key] = {
-                    'timestamp': date_key,
-                    'successful': 0,
-                    'failed': 0,
-                    'durations': []
-                }
-            
-            if run.status == 'success':
-                runs_by_date[date_key]['successful'] += 1
-            elif run.status == 'failed':
-                runs_by_date[date_key]['failed'] += 1
-            
-            runs_by_date[date_key]['durations'].append(run.duration_ms)
+        (first_day, last_day), _ = self._periods(days)
+        start_date = day_start(first_day)
+        trunc, label_format = self.GRANULARITIES[granularity]
+        
+        buckets = []
+        p95_latencies = {}
+        raw_from = start_date
+        if granularity == 'day':
+            # Closed days come straight from the rollups
+            rolled_up, raw_from = self._split_period(first_day, last_day)
+            if rolled_up:
+                buckets += [
+                    {**data, 'bucket': day_start(data['date'])}
+                    for data in self._rollups(WorkflowMetrics, rolled_up).values('date').order_by('date').annotate(
+                        runs=Sum('total_runs'),
+                        successful=Sum('successful_runs'),
+                        failed=Sum('failed_runs'),
+                        duration_sum=Sum('duration_sum_ms'),
+                    )
+                ]
+                sketches = defaultdict(DDSketch)
+                rows = self._rollups(WorkflowMetrics, rolled_up).values_list('date', 'run_duration_sketch')
+                for day, data in rows.iterator(chunk_size=500):
+                    sketches[day_start(day)].merge(DDSketch.from_dict(data))
+                p95_latencies.update({bucket: sketch.percentiles([95]) for bucket, sketch in sketches.items()})
+        
+        # Bucket and count the rest in the database
+        if raw_from is not None:
+            runs = WorkflowRun.objects.filter(started_at__gte=raw_from).annotate(
+                bucket=trunc('started_at')
+            )
+            raw_buckets = list(runs.values('bucket').order_by('bucket').annotate(
+                runs=Count('run_id'),
+                successful=Count('run_id', filter=Q(status='success')),
+                failed=Count('run_id', filter=Q(status='failed')),
+                duration_sum=Sum('duration_ms'),
+            ))
+            buckets += raw_buckets
+            p95_latencies.update(grouped_duration_percentiles(
+                runs, 'bucket', [95], counts={data['bucket']: data['runs'] for data in raw_buckets}
+            ))
         
-        # Calculate metrics for each day
         result = []
-        for date_key, data in sorted(runs_by_date.items()):
+        for data in buckets:
             total = data['successful'] + data['failed']
-            durations = sorted(data['durations'])
             
             result.append({
-                'timestamp': data['timestamp'],
+                'timestamp': timezone.localtime(data['bucket']).strftime(label_format),
                 'total_runs': total,
                 'successful': data['successful'],
                 'failed': data['failed'],
                 'success_rate': round(data['successful'] / total if total > 0 else 0, 4),
-                'avg_duration_ms': int(sum(durations) / len(durations)) if durations else 0,
-                'p95_latency_ms': self._calculate_percentile(durations, 95),
+                'avg_duration_ms': int(data['duration_sum'] / data['runs']) if data['runs'] else 0,
+                'p95_latency_ms': p95_latencies.get(data['bucket'], {}).get(95, 0),
                 'workflows_active': total
             })
         
@@ -114,42 +167,40 @@ class AnalyticsService:
     
     def get_error_breakdown(self, days: int = 7) -> List[Dict[str, Any]]:
         """Get error breakdown"""
-        start_date = timezone.now() - timedelta(days=days)
-        
-        failed_runs = WorkflowRun.objects.filter(
-            started_at__gte=start_date,
-            status='failed'
-        )
+        (first_day, last_day), _ = self._periods(days)
+        rolled_up, raw_from = self._split_period(first_day, last_day)
         
         error_types = {}
-        total_errors = failed_runs.count()
+        if rolled_up:
+            sums = self._rollups(WorkflowMetrics, rolled_up).aggregate(
+                **{field: Sum(field) for field in self.RUN_ERROR_FIELDS.values()}
+            )
+            error_types = {
+                category: sums[field]
+                for category, field in self.RUN_ERROR_FIELDS.items()
+                if sums[field]
+            }
+        
+        if raw_from is not None:
+            failed_runs = WorkflowRun.objects.filter(
+                started_at__gte=raw_from,
+                status='failed'
+            ).values('error_category').order_by().annotate(count=Count('run_id'))
+            
+            for row in failed_runs:
+                # Runs from before the column was backfilled count as Other
+                category = row['error_category'] or errors.OTHER
+                error_types[category] = error_types.get(category, 0) + row['count']
         
+        total_errors = sum(error_types.values())
         if total_errors == 0:
             return []
         
-        for run in failed_runs:
-            # Categorize errors
-            error_msg = (run.error_message or '').lower()
-            if 'timeout' in error_msg:
-                error_type = 'Timeout'
-            elif 'auth' in error_msg or 'unauthorized' in error_msg or '401' in error_msg:
-                error_type = 'Authentication'
-            elif 'rate limit' in error_msg or '429' in error_msg:
-                error_type = 'Rate Limit'
-            elif 'not found' in error_msg or '404' in error_msg:
-                error_type = 'Not Found'
-            elif 'validation' in error_msg or '400' in error_msg:
-                error_type = 'Validation'
-            else:
-                error_type = 'Other'
-            
-            error_types[error_type] = error_types.get(error_type, 0) + 1
-        
         result = []
-        for error_type, count in sorted(error_types.items(), key=lambda x: x[1], reverse=True):
+        for category, count in sorted(error_types.items(), key=lambda x: x[1], reverse=True):
             percentage = (count / total_errors * 100) if total_errors > 0 else 0
             result.append({
-                'type': error_type,
+                'type': errors.ERROR_CATEGORY_LABELS[category],
                 'count': count,
                 'percentage': round(percentage, 1)
             })
@@ -158,54 +209,48 @@ class AnalyticsService:
     
     def get_workflow_performance(self, days: int = 7) -> List[Dict[str, Any]]:
         """Get detailed per-workflow performance with trends"""
-        start_date = timezone.now() - timedelta(days=days)
-        prev_start = start_date - timedelta(days=days)
+        (first_day, last_day), (prev_first, prev_last) = self._periods(days)
         
-        workflows = Workflow.objects.all()
-        result = []
+        current = {
+            workflow_id: totals
+            for workflow_id, totals in self._workflow_totals(first_day, last_day).items()
+            if totals['total_runs'] > 0
+        }
+        previous = self._workflow_totals(prev_first, prev_last)
         
-        for workflow in workflows:
-            runs = WorkflowRun.objects.filter(
-                workflow=workflow,
-                started_at__gte=start_date
-            )
-            
-            total_runs = runs.count()
-            if total_runs == 0:
-                continue
-            
-            success_runs = runs.filter(status='success')
-            success_count = success_runs.count()
+        # P95
+        sketches = self._window_sketches(
+            first_day, last_day,
+            WorkflowMetrics, ('workflow_id', 'duration_sketch'),
+            WorkflowRun.objects.filter(status='success'), ('workflow_id', 'duration_ms')
+        )
+        
+        result = []
+        for workflow_id, totals in current.items():
+            total_runs = totals['total_runs']
+            success_count = totals['successful_runs']
             success_rate = success_count / total_runs
             
-            avg_duration = success_runs.aggregate(Avg('duration_ms'))['duration_ms__avg'] or 0
-            
-            # P95
-            sorted_runs = list(success_runs.order_by('duration_ms').values_list('duration_ms', flat=True))
-            p95_duration = self._calculate_percentile(sorted_runs, 95)
+            avg_duration = totals['success_duration_sum_ms'] / success_count if success_count else 0
             
             # Trend
-            prev_runs = WorkflowRun.objects.filter(
-                workflow=workflow,
-                started_at__gte=prev_start,
-                started_at__lt=start_date
-            )
+            prev = previous.get(workflow_id)
             prev_success_rate = (
-                prev_runs.filter(status='success').count() / prev_runs.count()
-                if prev_runs.count() > 0 else success_rate
+                prev['successful_runs'] / prev['total_runs']
+                if prev and prev['total_runs'] > 0 else success_rate
             )
             success_change = ((success_rate - prev_success_rate) / prev_success_rate * 100) if prev_success_rate > 0 else 0
             
             result.append({
-                'id': workflow.id,
-                'name': workflow.name,
+                'id': workflow_id,
+                'name': totals['name'],
                 'total_runs': total_runs,
                 'successful_runs': success_count,
                 'failed_runs': total_runs - success_count,
                 'success_rate': round(success_rate, 4),
                 'success_rate_change': round(success_change, 2),
                 'avg_duration_ms': int(avg_duration),
-                'p95_duration_ms': p95_duration,
+                'p95_duration_ms': sketches[workflow_id].percentile(95),
                 'trend': 'up' if success_change > 0 else 'down' if success_change < 0 else 'stable'
             })
         
@@ -213,50 +258,34 @@ class AnalyticsService:
     
     def get_step_diagnostics(self, days: int = 7) -> List[Dict[str, Any]]:
         """Get step-level diagnostics with bottleneck analysis"""
-        start_date = timezone.now() - timedelta(days=days)
-        
-        steps = StepRun.objects.filter(started_at__gte=start_date)
-        
-        step_stats = {}
-        for step in steps:
-            name = step.step_name
-            if name not in step_stats:
-                step_stats[name] = {
-                    'step_name': name,
-                    'calls': 0,
-                    'failed': 0,
-                    'skipped': 0,
-                    'durations': [],
-                    'error_types': {}
-                }
-            
-            step_stats[name]['calls'] += 1
-            if step.status == 'failed':
-                step_stats[name]['failed'] += 1
-                error_type = self._categorize_single_error(step.error_message or '')
-                step_stats[name]['error_types'][error_type] = step_stats[name]['error_types'].get(error_type, 0) + 1
-            elif step.status == 'skipped':
-                step_stats[name]['skipped'] += 1
-            
-            step_stats[name]['durations'].append(step.duration_ms)
+        (first_day, last_day), _ = self._periods(days)
+        step_stats = self._step_totals(first_day, last_day)
+        
+        sketches = self._window_sketches(
+            first_day, last_day,
+            StepMetrics, ('step_name', 'duration_sketch'),
+            StepRun.objects.all(), ('step_name', 'duration_ms')
+        )
         
         result = []
         for name, stats in step_stats.items():
-            durations = sorted(stats['durations'])
-            avg_duration = sum(durations) / len(durations) if durations else 0
-            success_count = stats['calls'] - stats['failed'] - stats['skipped']
+            calls = stats['total_calls']
+            if calls == 0:
+                continue
+            avg_duration = stats['duration_sum_ms'] / calls
+            success_count = calls - stats['failed_calls'] - stats['skipped_calls']
             
             result.append({
                 'step_name': name,
-                'total_calls': stats['calls'],
+                'total_calls': calls,
                 'successful': success_count,
-                'failed': stats['failed'],
-                'skipped': stats['skipped'],
-                'success_rate': round(success_count / stats['calls'] if stats['calls'] > 0 else 0, 4),
+                'failed': stats['failed_calls'],
+                'skipped': stats['skipped_calls'],
+                'success_rate': round(success_count / calls, 4),
                 'avg_duration_ms': int(avg_duration),
-                'p95_duration_ms': self._calculate_percentile(durations, 95),
-                'p99_duration_ms': self._calculate_percentile(durations, 99),
-                'max_duration_ms': max(durations) if durations else 0,
+                'p95_duration_ms': sketches[name].percentile(95),
+                'p99_duration_ms': sketches[name].percentile(99),
+                'max_duration_ms': stats['max_duration_ms'] or 0,
                 'is_bottleneck': avg_duration > 5000  # Flag if > 5 seconds
             })
         
@@ -264,45 +293,190 @@ class AnalyticsService:
     
     def get_host_health(self, days: int = 7) -> List[Dict[str, Any]]:
         """Get dependency/host health metrics"""
-        # Placeholder - tracks integration health from step runs
-        start_date = timezone.now() - timedelta(days=days)
+        (first_day, last_day), _ = self._periods(days)
+        rolled_up, raw_from = self._split_period(first_day, last_day)
         
-        step_runs = StepRun.objects.filter(started_at__gte=start_date)
+        host_stats = defaultdict(lambda: {'app_type': '', 'calls': 0, 'failed': 0})
+        if rolled_up:
+            rows = self._rollups(IntegrationHealth, rolled_up).values('integration_name').order_by().annotate(
+                app=Max('app_type'),
+                calls=Sum('total_calls'),
+                failed=Sum('failed_calls'),
+            )
+            for row in rows:
+                host_stats[row['integration_name']] = {'app_type': row['app'], 'calls': row['calls'], 'failed': row['failed']}
         
-        host_stats = {}
-        for step in step_runs:
-            # Extract integration from workflow or metadata
-            host = 'Unknown'
-            if hasattr(step, 'metadata') and step.metadata:
-                host = step.metadata.get('integration', 'Unknown')
-            
-            if host not in host_stats:
-                host_stats[host] = {
-                    'calls': 0,
-                    'failed': 0,
-                    'durations': []
-                }
-            
-            host_stats[host]['calls'] += 1
-            if step.status == 'failed':
-                host_stats[host]['failed'] += 1
-            host_stats[host]['durations'].append(step.duration_ms)
+        if raw_from is not None:
+            rows = self._host_calls(StepRun.objects.filter(started_at__gte=raw_from))
+            for row in rows:
+                stats = host_stats[row['host']]
+                stats['app_type'] = stats['app_type'] or row['app']
+                stats['calls'] += row['calls']
+                stats['failed'] += row['failed']
+        
+        sketches = self._window_sketches(
+            first_day, last_day,
+            IntegrationHealth, ('integration_name', 'duration_sketch'),
+            StepRun.objects.exclude(host=''), ('host', 'request_ms')
+        )
+        
+        circuits = self._circuit_states()
         
         result = []
         for host, stats in host_stats.items():
-            durations = sorted(stats['durations'])
-            error_rate = stats['failed'] / stats['calls'] if stats['calls'] > 0 else 0
+            if stats['calls'] == 0:
+                continue
+            error_rate = stats['failed'] / stats['calls']
+            circuit, circuit_status = circuits.get(host, ('closed', 'healthy'))
             
             result.append({
                 'host': host,
+                'app_type': stats['app_type'],
                 'calls': stats['calls'],
-                'p95_latency_ms': self._calculate_percentile(durations, 95),
+                'p95_latency_ms': sketches[host].percentile(95),
                 'error_rate': round(error_rate, 4),
-                'status': 'healthy' if error_rate < 0.05 else 'degraded' if error_rate < 0.1 else 'down'
+                'status': self._worst_status(self._health_status(error_rate), circuit_status),
+                'circuit': circuit
             })
         
         return sorted(result, key=lambda x: x['calls'], reverse=True)
     
+    # Window helpers
+    def _periods(self, days: int) -> Tuple[Tuple[date, date], Tuple[date, date]]:
+        """(first, last) day of the current window, ending today, and of the one before it"""
+        today = timezone.localdate()
+        first_day = today - timedelta(days=days - 1)
+        prev_first = first_day - timedelta(days=days)
+        return (first_day, today), (prev_first, first_day - timedelta(days=1))
+    
+    def _split_period(self, first_day: date, last_day: date) -> Tuple[Optional[Tuple[date, date]], Optional[datetime]]:
+        """Days of the period served from rollups, and where raw rows take over.
+        
+        Returns the (first, last) rolled-up days or None, and the moment
+        from which raw rows have to be aggregated (up to the end of
+        last_day), or None when the rollups cover the whole period.
+        """
+        if not hasattr(self, '_rolled_up_through'):
+            self._rolled_up_through = RollupWatermark.rolled_up_through_date()
+        through = self._rolled_up_through
+        
+        if through is None or through < first_day:
+            return None, day_start(first_day)
+        if through >= last_day:
+            return (first_day, last_day), None
+        return (first_day, through), day_start(through + timedelta(days=1))
+    
+    def _rollups(self, model, days: Tuple[date, date]) -> QuerySet:
+        """Rollup rows of model for the (first, last) days"""
+        if model is IntegrationHealth:
+            # Circuit breaker events share the table; they aren't rollups
+            return model.objects.filter(
+                circuit_state='',
+                timestamp__gte=day_start(days[0]),
+                timestamp__lt=day_start(days[1] + timedelta(days=1))
+            )
+        return model.objects.filter(date__range=days)
+    
+    def _window_sketches(self, first_day: date, last_day: date, model, rollup_fields: Tuple[str, str], raw: QuerySet, raw_fields: Tuple[str, str], group: Optional[Callable] = None, raw_group: Optional[Callable] = None) -> Dict[Any, DDSketch]:
+        """Duration sketch per group over whole days.
+        
+        rollup_fields name the group and sketch columns of model's rollup
+        rows, merged for the rolled-up days. raw_fields name the group and
+        duration columns of raw, whose rows after the watermark are added
+        one by one. group (or raw_group for raw rows) maps a group value to
+        the returned key.
+        """
+        rolled_up, raw_from = self._split_period(first_day, last_day)
+        sketches = defaultdict(DDSketch)
+        
+        if rolled_up:
+            rows = self._rollups(model, rolled_up).values_list(*rollup_fields)
+            for key, data in rows.iterator(chunk_size=500):
+                sketches[group(key) if group else key].merge(DDSketch.from_dict(data))
+        
+        if raw_from is not None:
+            raw_group = raw_group or group
+            rows = raw.filter(
+                started_at__gte=raw_from,
+                started_at__lt=day_start(last_day + timedelta(days=1))
+            ).values_list(*raw_fields)
+            for key, duration in rows.iterator(chunk_size=2000):
+                sketches[raw_group(key) if raw_group else key].add(duration)
+        
+        return sketches
+    
+    def _workflow_totals(self, first_day: date, last_day: date) -> Dict[str, Dict[str, Any]]:
+        """RUN_TOTAL_FIELDS and name per workflow over whole days"""
+        rolled_up, raw_from = self._split_period(first_day, last_day)
+        totals = {}
+        
+        rows = []
+        if rolled_up:
+            rows += self._rollups(WorkflowMetrics, rolled_up).values(
+                'workflow_id', 'workflow__name'
+            ).order_by().annotate(**{field: Sum(field) for field in self.RUN_TOTAL_FIELDS})
+        if raw_from is not None:
+            success = Q(status='success')
+            rows += WorkflowRun.objects.filter(
+                started_at__gte=raw_from,
+                started_at__lt=day_start(last_day + timedelta(days=1))
+            ).values('workflow_id', 'workflow__name').order_by().annotate(
+                total_runs=Count('run_id'),
+                successful_runs=Count('run_id', filter=success),
+                failed_runs=Count('run_id', filter=Q(status='failed')),
+                duration_sum_ms=Sum('duration_ms'),
+                success_duration_sum_ms=Sum('duration_ms', filter=success),
+            )
+        
+        for row in rows:
+            workflow_totals = totals.setdefault(row['workflow_id'], {
+                'name': row['workflow__name'],
+                **{field: 0 for field in self.RUN_TOTAL_FIELDS}
+            })
+            for field in self.RUN_TOTAL_FIELDS:
+                workflow_totals[field] += row[field] or 0
+        return totals
+    
+    def _step_totals(self, first_day: date, last_day: date) -> Dict[str, Dict[str, Any]]:
+        """STEP_TOTAL_FIELDS and max_duration_ms per step name over whole days"""
+        rolled_up, raw_from = self._split_period(first_day, last_day)
+        totals = {}
+        
+        rows = []
+        if rolled_up:
+            rows += self._rollups(StepMetrics, rolled_up).values('step_name').order_by().annotate(
+                max_duration_ms=Max('max_duration_ms'),
+                **{field: Sum(field) for field in self.STEP_TOTAL_FIELDS}
+            )
+        if raw_from is not None:
+            rows += StepRun.objects.filter(
+                started_at__gte=raw_from,
+                started_at__lt=day_start(last_day + timedelta(days=1))
+            ).values('step_name').order_by().annotate(
+                total_calls=Count('step_id'),
+                failed_calls=Count('step_id', filter=Q(status='failed')),
+                skipped_calls=Count('step_id', filter=Q(status='skipped')),
+                duration_sum_ms=Sum('duration_ms'),
+                max_duration_ms=Max('duration_ms'),
+            )
+        
+        for row in rows:
+            step_totals = totals.setdefault(row['step_name'], {
+                'max_duration_ms': 0,
+                **{field: 0 for field in self.STEP_TOTAL_FIELDS}
+            })
+            for field in self.STEP_TOTAL_FIELDS:
+                step_totals[field] += row[field] or 0
+            step_totals['max_duration_ms'] = max(step_totals['max_duration_ms'], row['max_duration_ms'] or 0)
+        return totals
+    
+    def _sum_totals(self, rows, fields) -> Dict[str, int]:
+        sums = {field: 0 for field in fields}
+        for row in rows:
+            for field in fields:
+                sums[field] += row[field]
+        return sums
+    
     # Helper methods
     def _calculate_percentile(self, data: List[int], percentile: int) -> int:
         if not data:
@@ -310,22 +484,45 @@ class AnalyticsService:
         sorted_data = sorted(data)
         index = int(len(sorted_data) * percentile / 100)
         return sorted_data[min(index, len(sorted_data) - 1)]
-
-    def _categorize_single_error(self, error_msg: str) -> str:
-        error_lower = error_msg.lower()
-        if 'timeout' in error_lower:
-            return 'Timeout'
-        elif 'auth' in error_lower or '401' in error_lower:
-            return 'Authentication'
-        elif 'rate limit' in error_lower or '429' in error_lower:
-            return 'Rate Limit'
-        elif '404' in error_lower:
-            return 'Not Found'
-        elif '400' in error_lower:
-            return 'Validation'
-        else:
-            return 'Other'
-
+    
+    def _host_calls(self, steps: QuerySet) -> QuerySet:
+        """Calls and failures per host of the steps that made an HTTP call"""
+        return steps.exclude(host='').values('host').order_by().annotate(
+            app=Max('app_type'),
+            calls=Count('step_id'),
+            failed=Count('step_id', filter=Q(status='failed')),
+        )
+    
+    def _health_status(self, error_rate: float) -> str:
+        return 'healthy' if error_rate < 0.05 else 'degraded' if error_rate < 0.1 else 'down'
+    
+    def _worst_status(self, *statuses: str) -> str:
+        return max(statuses, key=self.HEALTH_STATUSES.index)
+    
+    def _circuit_states(self) -> Dict[str, Tuple[str, str]]:
+        """(circuit state, status) per host from the latest breaker event of
+        each of its credentials, the most severe one winning.
+        
+        Events older than INTEGRATION_CIRCUIT_OPEN_SECONDS are ignored: by
+        then an open circuit lets probes through and a half-open one has
+        expired its probes, and the process that wrote them may be gone.
+        Hosts without a recent event show as closed.
+        """
+        cutoff = timezone.now() - timedelta(seconds=settings.INTEGRATION_CIRCUIT_OPEN_SECONDS)
+        # circuit_state > '' is an index range; rollup rows have none
+        events = IntegrationHealth.objects.filter(circuit_state__gt='', timestamp__gte=cutoff)
+        newer = events.filter(
+            integration_name=OuterRef('integration_name'),
+            credential=OuterRef('credential'),
+            timestamp__gt=OuterRef('timestamp')
+        )
+        
+        states = {}
+        for host, state, status in events.filter(~Exists(newer)).values_list('integration_name', 'circuit_state', 'status'):
+            if host not in states or self._worst_status(states[host][1], status) != states[host][1]:
+                states[host] = (state, status)
+        return states
+    
     def _empty_overview(self) -> Dict[str, Any]:
         return {
             'total_runs': 0,
@@ -0,0 +1,124 @@
+# analytics/sketches.py
+from django.conf import settings
+from typing import Any, Dict, Iterable, Optional
+import math
+
+class DDSketch:
+    """Mergeable quantile sketch for durations (DDSketch, Masson et al. 2019).
+    
+    Values are counted in logarithmic bins whose width grows with the value,
+    so with relative accuracy a every percentile it returns is within
+    a * v of v, the exact value at the same rank as _calculate_percentile
+    picks it (e.g. 1% -> a true p95 of 2000 ms is reported as 1980-2020 ms).
+    Results are also clamped to the exact min and max.
+    
+    Memory is bounded by max_bins. 2048 bins at 1% span ratios of ~1e17
+    between smallest and largest value, far more than any duration range,
+    so the bound only matters in theory. If it is ever hit, the lowest bins
+    are folded together and only low percentiles lose accuracy.
+    
+    Sketches built with the same accuracy merge exactly: merging the
+    sketches of two days gives the same bins as one sketch of both days.
+    """
+    
+    def __init__(self, relative_accuracy: Optional[float] = None, max_bins: Optional[int] = None):
+        self.relative_accuracy = relative_accuracy or settings.ANALYTICS_SKETCH_RELATIVE_ACCURACY
+        self.max_bins = max_bins or settings.ANALYTICS_SKETCH_MAX_BINS
+        self.gamma = (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0  # values <= 0 cannot go in a log bin
+        self.count = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+    
+    def add(self, value: int, count: int = 1):
+        if value > 0:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + count
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        else:
+            self.zero_count += count
+        
+        self.count += count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+    
+    def extend(self, values: Iterable[int]):
+        for value in values:
+            self.add(value)
+    
+    def merge(self, other: 'DDSketch'):
+        if other.count == 0:
+            return
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError(
+                f"Cannot merge sketches with relative accuracy {other.relative_accuracy} and {self.relative_accuracy}"
+            )
+        
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+        
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+    
+    def percentile(self, percentile: int) -> int:
+        """Value at the rank _calculate_percentile would pick, within the relative accuracy"""
+        if self.count == 0:
+            return 0
+        
+        rank = min(int(self.count * percentile / 100), self.count - 1)
+        if rank < self.zero_count:
+            return max(self.min, 0)
+        
+        seen = self.zero_count
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                # Midpoint of the bin (gamma^(i-1), gamma^i] in relative terms
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return int(round(min(max(value, self.min), self.max)))
+        return self.max
+    
+    def percentiles(self, percentiles: Iterable[int]) -> Dict[int, int]:
+        return {p: self.percentile(p) for p in percentiles}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact JSON-serializable form, stored on the rollup rows"""
+        if self.count == 0:
+            return {}
+        return {
+            'alpha': self.relative_accuracy,
+            'zero': self.zero_count,
+            'min': self.min,
+            'max': self.max,
+            'bins': sorted(self.bins.items()),
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'DDSketch':
+        if not data:
+            return cls()
+        
+        sketch = cls(relative_accuracy=data['alpha'])
+        sketch.bins = {index: count for index, count in data['bins']}
+        sketch.zero_count = data['zero']
+        sketch.count = sketch.zero_count + sum(sketch.bins.values())
+        sketch.min = data['min']
+        sketch.max = data['max']
+        return sketch
+    
+    def _collapse(self):
+        # Fold the lowest bins into one so the highest percentiles, the ones
+        # dashboards show, keep their accuracy
+        indexes = sorted(self.bins)
+        excess = len(indexes) - self.max_bins
+        target = indexes[excess]
+        for index in indexes[:excess]:
+            self.bins[target] += self.bins.pop(index)
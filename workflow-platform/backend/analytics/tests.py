@@ -1,3 +1,175 @@
-from django.test import TestCase
+# analytics/tests.py
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from runs.models import WorkflowRun, StepRun
+from workflows.models import Workflow
+from .rollups import MetricsRollup
+from .services import AnalyticsService
+from .sketches import DDSketch
+import random
 
-# Create your tests here.
+def create_workflows(count: int, offset: int = 0):
+    """Workflows with a few successful and failed runs today and three days ago"""
+    now = timezone.now()
+    for i in range(offset, offset + count):
+        workflow = Workflow.objects.create(name=f'Workflow {i}', enabled=True)
+        for j, days_ago in enumerate((0, 0, 3, 3)):
+            status = 'failed' if j % 2 else 'success'
+            run = WorkflowRun.objects.create(
+                run_id=f'run_{i}_{j}',
+                workflow=workflow,
+                status=status,
+                duration_ms=100 * (j + 1),
+                error_message='Request timed out' if status == 'failed' else '',
+                error_category='timeout' if status == 'failed' else ''
+            )
+            started_at = now - timedelta(days=days_ago)
+            WorkflowRun.objects.filter(pk=run.pk).update(started_at=started_at)
+            StepRun.objects.create(
+                run=run,
+                step_name='Slack: Send Message',
+                status=status,
+                started_at=started_at,
+                duration_ms=50 * (j + 1),
+                app_type='slack',
+                host='slack.com',
+                request_ms=40 * (j + 1)
+            )
+
+class AnalyticsQueryCountTest(TestCase):
+    """Each analytics section costs a fixed number of queries, however many workflows there are"""
+    
+    SECTIONS = [
+        ('overview', lambda service: service.get_overview_stats(7)),
+        ('time series', lambda service: service.get_time_series(7, 'day')),
+        ('errors', lambda service: service.get_error_breakdown(7)),
+        ('workflows', lambda service: service.get_workflow_performance(7)),
+        ('steps', lambda service: service.get_step_diagnostics(7)),
+        ('hosts', lambda service: service.get_host_health(7)),
+    ]
+    
+    def query_counts(self):
+        counts = {}
+        for name, section in self.SECTIONS:
+            with CaptureQueriesContext(connection) as queries:
+                self.assertTrue(section(AnalyticsService()))
+            counts[name] = len(queries)
+        return counts
+    
+    def assert_constant_queries(self):
+        create_workflows(3)
+        counts = self.query_counts()
+        
+        create_workflows(9, offset=3)
+        for name, section in self.SECTIONS:
+            with self.subTest(section=name), self.assertNumQueries(counts[name]):
+                section(AnalyticsService())
+    
+    def test_raw_runs(self):
+        self.assert_constant_queries()
+    
+    def test_rolled_up_days(self):
+        self.assert_constant_queries()
+        MetricsRollup().run()
+        
+        # Rollups and raw rows together, still independent of the workflow count
+        counts = self.query_counts()
+        create_workflows(12, offset=12)
+        MetricsRollup().rebuild()
+        for name, section in self.SECTIONS:
+            with self.subTest(section=name), self.assertNumQueries(counts[name]):
+                section(AnalyticsService())
+
+class DDSketchTest(SimpleTestCase):
+    """Merged sketch percentiles stay within the relative accuracy of the exact ones"""
+    
+    PERCENTILES = (1, 25, 50, 90, 95, 99, 100)
+    
+    DISTRIBUTIONS = {
+        'uniform': lambda rng: rng.randint(1, 10000),
+        'lognormal': lambda rng: int(rng.lognormvariate(6, 1.5)),
+        'bimodal': lambda rng: rng.choice([rng.randint(5, 50), rng.randint(20000, 30000)]),
+        'with zeros': lambda rng: rng.choice([0, 0, rng.randint(1, 500)]),
+        'constant': lambda rng: 1234,
+    }
+    
+    def assert_within_accuracy(self, sketch: DDSketch, values, label: str):
+        exact = AnalyticsService()._calculate_percentile
+        for percentile in self.PERCENTILES:
+            expected = exact(values, percentile)
+            # Rounding to whole milliseconds adds up to half a unit
+            tolerance = sketch.relative_accuracy * expected + 0.5
+            with self.subTest(label, percentile=percentile):
+                self.assertLessEqual(abs(sketch.percentile(percentile) - expected), tolerance)
+    
+    def test_merged_days_match_exact_percentiles(self):
+        for name, draw in self.DISTRIBUTIONS.items():
+            rng = random.Random(name)
+            merged, values = DDSketch(relative_accuracy=0.01), []
+            for day in range(7):
+                day_values = [draw(rng) for _ in range(2000)]
+                day_sketch = DDSketch(relative_accuracy=0.01)
+                day_sketch.extend(day_values)
+                # Round-trip through the form stored on the rollup rows
+                merged.merge(DDSketch.from_dict(day_sketch.to_dict()))
+                values += day_values
+            
+            self.assertEqual(merged.count, len(values))
+            self.assert_within_accuracy(merged, values, name)
+    
+    def test_other_accuracies(self):
+        rng = random.Random(5)
+        values = [int(rng.lognormvariate(7, 2)) + 1 for _ in range(10000)]
+        for accuracy in (0.005, 0.02, 0.05):
+            sketch = DDSketch(relative_accuracy=accuracy)
+            sketch.extend(values)
+            self.assert_within_accuracy(sketch, values, f'accuracy {accuracy}')
+    
+    def test_merging_equals_one_sketch(self):
+        rng = random.Random(9)
+        first, second = [rng.randint(1, 5000) for _ in range(500)], [rng.randint(0, 90000) for _ in range(500)]
+        merged, whole = DDSketch(relative_accuracy=0.01), DDSketch(relative_accuracy=0.01)
+        for values in (first, second):
+            part = DDSketch(relative_accuracy=0.01)
+            part.extend(values)
+            merged.merge(part)
+        whole.extend(first + second)
+        self.assertEqual(merged.to_dict(), whole.to_dict())
+    
+    def test_mismatched_accuracy_refuses_to_merge(self):
+        sketch, other = DDSketch(relative_accuracy=0.01), DDSketch(relative_accuracy=0.02)
+        other.add(10)
+        with self.assertRaises(ValueError):
+            sketch.merge(other)
+    
+    def test_collapse_at_max_bins(self):
+        values = list(range(1, 100000))
+        sketch = DDSketch(relative_accuracy=0.01, max_bins=50)
+        sketch.extend(values)
+        
+        # The lowest bins are folded into one; nothing is lost from the count
+        self.assertLessEqual(len(sketch.bins), 50)
+        self.assertEqual(sketch.count, len(values))
+        self.assertEqual(sketch.min, 1)
+        
+        # High percentiles keep their accuracy, low ones are pushed up
+        exact = AnalyticsService()._calculate_percentile
+        for percentile in (90, 95, 99, 100):
+            expected = exact(values, percentile)
+            self.assertLessEqual(abs(sketch.percentile(percentile) - expected), 0.01 * expected + 0.5)
+        self.assertGreater(sketch.percentile(1), exact(values, 1) * 1.01)
+    
+    def test_collapse_when_merging(self):
+        low, high = DDSketch(relative_accuracy=0.01, max_bins=40), DDSketch(relative_accuracy=0.01, max_bins=40)
+        low.extend(range(1, 30))
+        high.extend(range(100, 100000, 7))
+        low.merge(high)
+        
+        self.assertLessEqual(len(low.bins), 40)
+        self.assertEqual(low.count, 29 + len(range(100, 100000, 7)))
+        values = list(range(1, 30)) + list(range(100, 100000, 7))
+        expected = AnalyticsService()._calculate_percentile(values, 99)
+        self.assertLessEqual(abs(low.percentile(99) - expected), 0.01 * expected + 0.5)
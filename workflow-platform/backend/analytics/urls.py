@@ -1,7 +1,8 @@
 # analytics/urls.py
 from django.urls import path
-from .views import AnalyticsView
+from .views import AnalyticsView, AnalyticsCacheStatsView
 
 urlpatterns = [
     path('', AnalyticsView.as_view(), name='analytics'),
+    path('cache-stats/', AnalyticsCacheStatsView.as_view(), name='analytics-cache-stats'),
 ]
@@ -2,22 +2,108 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from concurrent.futures import ThreadPoolExecutor, wait
+from django.conf import settings
+from django.db import connection
+from .cache import analytics_cache
 from .services import AnalyticsService
+from typing import Any, Callable, Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Response key -> how to compute it. 'overview' is spread into the top level.
+SECTIONS: Dict[str, Callable[[AnalyticsService, int, str], Any]] = {
+    'overview': lambda service, days, granularity: service.get_overview_stats(days),
+    'timeSeries': lambda service, days, granularity: service.get_time_series(days, granularity),
+    'errors': lambda service, days, granularity: service.get_error_breakdown(days),
+    'workflows': lambda service, days, granularity: service.get_workflow_performance(days),
+    'steps': lambda service, days, granularity: service.get_step_diagnostics(days),
+    'hosts': lambda service, days, granularity: service.get_host_health(days),
+}
+
+# Shared by all requests, so concurrent dashboards can't multiply DB load
+_section_pool = ThreadPoolExecutor(
+    max_workers=settings.ANALYTICS_SECTION_WORKERS,
+    thread_name_prefix='analytics-section'
+)
+
+def _compute_section(name: str, days: int, granularity: str) -> Any:
+    params = (days, granularity) if name == 'timeSeries' else (days,)
+    try:
+        # A request waiting on another one's computation gives up its pool
+        # thread at the section deadline, like the request itself does
+        return analytics_cache.get_or_compute(
+            name, params, lambda: SECTIONS[name](AnalyticsService(), days, granularity),
+            max_wait=settings.ANALYTICS_SECTION_TIMEOUT
+        )
+    finally:
+        # Pool threads get their own connection; don't leak it
+        connection.close()
 
 class AnalyticsView(APIView):
     def get(self, request):
         """Get complete analytics data"""
-        days = int(request.query_params.get('days', 7))
+        granularity = request.query_params.get('granularity', 'day')
+        try:
+            days = int(request.query_params.get('days', 7))
+        except ValueError:
+            return Response({'error': 'days must be a whole number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if granularity not in AnalyticsService.GRANULARITIES:
+            return Response(
+                {'error': f"granularity must be one of: {', '.join(AnalyticsService.GRANULARITIES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        max_days = AnalyticsService.GRANULARITY_MAX_DAYS.get(granularity)
+        if max_days is not None and days > max_days:
+            return Response(
+                {'error': f"granularity '{granularity}' covers at most {max_days} day(s)"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        service = AnalyticsService()
+        sections = self._requested_sections(request)
+        unknown = [name for name in sections if name not in SECTIONS]
+        if unknown:
+            return Response(
+                {'error': f"Unknown sections: {', '.join(unknown)}. Available: {', '.join(SECTIONS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        data = {
-            **service.get_overview_stats(days),
-            'timeSeries': service.get_time_series(days),
-            'errors': service.get_error_breakdown(days),
-            'workflows': service.get_workflow_performance(days),
-            'steps': service.get_step_diagnostics(days),
-            'hosts': service.get_host_health(days)
+        # Sections run side by side; whatever isn't done by the deadline is
+        # left out and still lands in the cache for the next request
+        futures = {
+            name: _section_pool.submit(_compute_section, name, days, granularity)
+            for name in sections
         }
+        wait(futures.values(), timeout=settings.ANALYTICS_SECTION_TIMEOUT)
         
-        return Response(data)
\ No newline at end of file
+        data = {}
+        section_errors = {}
+        for name, future in futures.items():
+            if not future.done() or isinstance(future.exception(), TimeoutError):
+                section_errors[name] = f"Timed out after {settings.ANALYTICS_SECTION_TIMEOUT:g}s"
+            elif future.exception() is not None:
+                logger.error("Analytics section %s failed", name, exc_info=future.exception())
+                section_errors[name] = 'Failed to compute'
+            elif name == 'overview':
+                data.update(future.result())
+            else:
+                data[name] = future.result()
+        
+        if section_errors:
+            data['sectionErrors'] = section_errors
+        
+        return Response(data)
+    
+    def _requested_sections(self, request) -> List[str]:
+        """?sections=overview,timeSeries narrows the response; default is every section"""
+        sections = request.query_params.get('sections')
+        if not sections:
+            return list(SECTIONS)
+        return [name.strip() for name in sections.split(',') if name.strip()]
+
+class AnalyticsCacheStatsView(APIView):
+    def get(self, request):
+        """Hit/miss counters of the analytics cache in this process"""
+        return Response(analytics_cache.stats())
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
 from pathlib import Path
+import json
 import os
 from dotenv import load_dotenv
 
@@ -87,6 +88,11 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Queue workers write concurrently; wait for the lock instead of
+        # failing with "database is locked"
+        'OPTIONS': {
+            'timeout': 20,
+        },
     }
 }
 
@@ -144,3 +150,151 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Workflow execution
+# 'queue' makes the trigger endpoint enqueue a pending run for `manage.py run_workers`,
+# 'inline' executes the run inside the request like before.
+WORKFLOW_TRIGGER_MODE = os.getenv('WORKFLOW_TRIGGER_MODE', 'queue')
+WORKFLOW_WORKER_CONCURRENCY = int(os.getenv('WORKFLOW_WORKER_CONCURRENCY', '4'))
+WORKFLOW_WORKER_POLL_INTERVAL = float(os.getenv('WORKFLOW_WORKER_POLL_INTERVAL', '1.0'))
+# Workers refresh the lease of the runs they execute every HEARTBEAT_SECONDS.
+# A run still running after LEASE_SECONDS without a heartbeat lost its
+# worker and is failed (not re-queued: its steps may have had side effects).
+WORKFLOW_WORKER_HEARTBEAT_SECONDS = float(os.getenv('WORKFLOW_WORKER_HEARTBEAT_SECONDS', '30'))
+WORKFLOW_RUN_LEASE_SECONDS = float(os.getenv('WORKFLOW_RUN_LEASE_SECONDS', '300'))
+# Upper bound on steps of one run executing at the same time in parallel mode
+WORKFLOW_STEP_MAX_PARALLELISM = int(os.getenv('WORKFLOW_STEP_MAX_PARALLELISM', '8'))
+# Runs one async worker process keeps in flight (`run_workers --async`)
+WORKFLOW_ASYNC_MAX_IN_FLIGHT = int(os.getenv('WORKFLOW_ASYNC_MAX_IN_FLIGHT', '100'))
+
+# Integrations
+# Per-host keep-alive pools for the blocking client. POOL_BLOCK=True turns
+# POOL_MAXSIZE into a hard cap on concurrent connections to one host.
+INTEGRATION_POOL_MAXSIZE = int(os.getenv('INTEGRATION_POOL_MAXSIZE', '10'))
+INTEGRATION_POOL_BLOCK = os.getenv('INTEGRATION_POOL_BLOCK', 'False') == 'True'
+INTEGRATION_HTTP_KEEPALIVE = os.getenv('INTEGRATION_HTTP_KEEPALIVE', 'True') == 'True'
+INTEGRATION_HTTP_RETRIES = int(os.getenv('INTEGRATION_HTTP_RETRIES', '2'))
+INTEGRATION_CONNECT_TIMEOUT = float(os.getenv('INTEGRATION_CONNECT_TIMEOUT', '5'))
+INTEGRATION_READ_TIMEOUT = float(os.getenv('INTEGRATION_READ_TIMEOUT', '30'))
+# Connection pool of the shared async HTTP client (one per event loop)
+INTEGRATION_ASYNC_MAX_CONNECTIONS = int(os.getenv('INTEGRATION_ASYNC_MAX_CONNECTIONS', '200'))
+INTEGRATION_ASYNC_MAX_KEEPALIVE = int(os.getenv('INTEGRATION_ASYNC_MAX_KEEPALIVE', '100'))
+# Client-side rate limits per app and credential (token bucket): `rate` calls
+# per second with bursts of up to `burst`. INTEGRATION_RATE_LIMITS (JSON, e.g.
+# '{"slack": {"rate": 0.5, "burst": 2}}') overrides apps; null disables one.
+# Buckets are kept per process, not shared: each process gets rate/N and
+# burst/N (at least 1), N being INTEGRATION_RATE_LIMIT_PROCESSES, or else the
+# process count run_workers started (1 outside of it, so a web process or a
+# single worker gets the whole limit). Set it to the total number of
+# processes calling the APIs when web processes trigger inline next to the
+# workers. A 429 pauses only the process that got it, and bursts can still
+# add up to N over the limit.
+INTEGRATION_RATE_LIMITS = {
+    'slack': {'rate': 1, 'burst': 3},
+    'notion': {'rate': 3, 'burst': 3},
+    'trello': {'rate': 10, 'burst': 10},
+    'google_calendar': {'rate': 5, 'burst': 10},
+    **json.loads(os.getenv('INTEGRATION_RATE_LIMITS', '{}')),
+}
+INTEGRATION_RATE_LIMIT_PROCESSES = int(os.getenv('INTEGRATION_RATE_LIMIT_PROCESSES', '0'))
+# Calls that would wait longer than MAX_WAIT seconds for a slot (or a 429
+# Retry-After) fail instead. A 429 is retried up to RETRIES times, after
+# Retry-After or BACKOFF * 2^attempt seconds when the API sends none.
+INTEGRATION_RATE_LIMIT_MAX_WAIT = float(os.getenv('INTEGRATION_RATE_LIMIT_MAX_WAIT', '30'))
+INTEGRATION_RATE_LIMIT_RETRIES = int(os.getenv('INTEGRATION_RATE_LIMIT_RETRIES', '3'))
+INTEGRATION_RATE_LIMIT_BACKOFF = float(os.getenv('INTEGRATION_RATE_LIMIT_BACKOFF', '1'))
+# Circuit breaker per API host and credential. It opens once the calls of
+# the last WINDOW seconds number at least MIN_CALLS and FAILURE_RATE of them
+# failed (transport errors, 5xx) or SLOW_CALL_RATE took SLOW_CALL_MS or
+# longer. Open circuits fail calls fast for OPEN_SECONDS, then let PROBES
+# calls through and close if they all succeed. Steps failed fast are
+# deferred until then if their retry policy has 'circuit_open' in retry_on;
+# only async workers defer them, blocking workers fail the step right away.
+INTEGRATION_CIRCUIT_WINDOW = float(os.getenv('INTEGRATION_CIRCUIT_WINDOW', '60'))
+INTEGRATION_CIRCUIT_MIN_CALLS = int(os.getenv('INTEGRATION_CIRCUIT_MIN_CALLS', '10'))
+INTEGRATION_CIRCUIT_FAILURE_RATE = float(os.getenv('INTEGRATION_CIRCUIT_FAILURE_RATE', '0.5'))
+INTEGRATION_CIRCUIT_SLOW_CALL_MS = int(os.getenv('INTEGRATION_CIRCUIT_SLOW_CALL_MS', '10000'))
+INTEGRATION_CIRCUIT_SLOW_CALL_RATE = float(os.getenv('INTEGRATION_CIRCUIT_SLOW_CALL_RATE', '0.8'))
+INTEGRATION_CIRCUIT_OPEN_SECONDS = float(os.getenv('INTEGRATION_CIRCUIT_OPEN_SECONDS', '30'))
+INTEGRATION_CIRCUIT_PROBES = int(os.getenv('INTEGRATION_CIRCUIT_PROBES', '2'))
+# Results of read-only actions cached per credential and params (opt-in):
+# "<app_type>.<action>" -> TTL seconds, e.g. INTEGRATION_READ_CACHE_TTLS=
+# '{"google_calendar.list_events": 30}'. Only actions a service declares
+# read-only qualify; MAX_ENTRIES bounds the cache (least recently used go).
+INTEGRATION_READ_CACHE_TTLS = json.loads(os.getenv('INTEGRATION_READ_CACHE_TTLS', '{}'))
+INTEGRATION_READ_CACHE_MAX_ENTRIES = int(os.getenv('INTEGRATION_READ_CACHE_MAX_ENTRIES', '1000'))
+# Seconds a cached linked integration and its service instance stay valid
+# in processes that did not see the change (edits invalidate the local cache)
+INTEGRATION_CACHE_TTL = float(os.getenv('INTEGRATION_CACHE_TTL', '60'))
+# Step records are kept in memory and bulk-written when the run completes.
+# CHECKPOINT_STEPS > 0 also flushes every N finished steps; CRASH_SAFE
+# inserts each step's 'running' row as soon as the step starts.
+WORKFLOW_RECORD_CHECKPOINT_STEPS = int(os.getenv('WORKFLOW_RECORD_CHECKPOINT_STEPS', '0'))
+WORKFLOW_RECORD_CRASH_SAFE = os.getenv('WORKFLOW_RECORD_CRASH_SAFE', 'False') == 'True'
+# Step retries (utils/retries.py). 'default' applies to every step, an app's
+# entry overrides it and WorkflowStep.retry_policy overrides both. Attempt n
+# waits backoff_base * 2^(n-1) seconds (capped at backoff_max, full jitter);
+# only failures whose class is in retry_on are retried. The default retries
+# only failures the API never acted on (429s, open circuits, connections
+# that could not be made), as write actions may not be idempotent. Opt into
+# 'timeout', 'server_error' and 'connection' per app or step where repeating
+# a call is safe, e.g. {"google_calendar": {"retry_on": ["rate_limit",
+# "circuit_open", "connect", "timeout", "server_error", "connection"]}}.
+# The JSON env var WORKFLOW_STEP_RETRY_POLICIES adds or replaces entries.
+WORKFLOW_STEP_RETRY_POLICIES = {
+    'default': {
+        'max_attempts': 3,
+        'backoff_base': 1.0,
+        'backoff_max': 30.0,
+        'jitter': True,
+        'retry_on': ['rate_limit', 'circuit_open', 'connect'],
+    },
+    **json.loads(os.getenv('WORKFLOW_STEP_RETRY_POLICIES', '{}')),
+}
+# Webhook triggers with an Idempotency-Key header (or a value at the
+# workflow's dedup_key_path) repeated within this many seconds return the
+# original run instead of starting a new one. `prune_runs` purges older keys.
+WEBHOOK_DEDUP_WINDOW_SECONDS = int(os.getenv('WEBHOOK_DEDUP_WINDOW_SECONDS', '86400'))
+# Buffer Workflow.total_runs/last_run increments per process and write them
+# every N milliseconds (0 = one targeted UPDATE per completed run)
+WORKFLOW_RUN_COUNTER_FLUSH_MS = int(os.getenv('WORKFLOW_RUN_COUNTER_FLUSH_MS', '0'))
+
+# Analytics
+# Days with runs still pending/running are not rolled up until this many
+# hours after they end; later, stuck runs no longer hold the rollup back
+ANALYTICS_ROLLUP_GRACE_HOURS = float(os.getenv('ANALYTICS_ROLLUP_GRACE_HOURS', '6'))
+# Percentile sketches on the rollup rows: reported percentiles are within
+# this fraction of the exact value; MAX_BINS bounds each sketch's size
+ANALYTICS_SKETCH_RELATIVE_ACCURACY = float(os.getenv('ANALYTICS_SKETCH_RELATIVE_ACCURACY', '0.01'))
+ANALYTICS_SKETCH_MAX_BINS = int(os.getenv('ANALYTICS_SKETCH_MAX_BINS', '2048'))
+# Analytics responses are cached per section (see analytics/cache.py): fresh
+# for CACHE_TTL seconds or until runs complete, then served stale for up to
+# CACHE_STALE_TTL more seconds while one request recomputes them
+ANALYTICS_CACHE_TTL = float(os.getenv('ANALYTICS_CACHE_TTL', '30'))
+ANALYTICS_CACHE_STALE_TTL = float(os.getenv('ANALYTICS_CACHE_STALE_TTL', '300'))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Use django.core.cache.backends.filebased.FileBasedCache with a directory
+    # LOCATION to share entries and invalidations with the worker processes
+    'analytics': {
+        'BACKEND': os.getenv('ANALYTICS_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('ANALYTICS_CACHE_LOCATION', 'analytics'),
+    },
+}
+# Analytics sections are computed side by side on a thread pool shared by all
+# requests; sections still running after SECTION_TIMEOUT seconds are left out
+# of the response (listed under sectionErrors) instead of holding it up
+ANALYTICS_SECTION_WORKERS = int(os.getenv('ANALYTICS_SECTION_WORKERS', '6'))
+ANALYTICS_SECTION_TIMEOUT = float(os.getenv('ANALYTICS_SECTION_TIMEOUT', '10'))
+
+# Run history retention (`manage.py prune_runs`)
+# Runs older than RETENTION_DAYS (0 = keep forever) are rolled up, written to
+# gzipped JSONL files in ARCHIVE_DIR and deleted; Workflow.retention_days
+# overrides the global value per workflow. Deletes go BATCH_SIZE runs per
+# transaction with BATCH_PAUSE_MS between them so writers are not held up.
+RUNS_RETENTION_DAYS = int(os.getenv('RUNS_RETENTION_DAYS', '90'))
+RUNS_ARCHIVE_DIR = os.getenv('RUNS_ARCHIVE_DIR', str(BASE_DIR / 'archives'))
+RUNS_PRUNE_BATCH_SIZE = int(os.getenv('RUNS_PRUNE_BATCH_SIZE', '500'))
+RUNS_PRUNE_BATCH_PAUSE_MS = int(os.getenv('RUNS_PRUNE_BATCH_PAUSE_MS', '50'))
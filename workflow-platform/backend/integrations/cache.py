@@ -0,0 +1,53 @@
+# integrations/cache.py
+from django.conf import settings
+from .models import Integration
+from typing import Any, Callable, Dict, Tuple
+import threading
+import time
+
+class IntegrationCache:
+    """In-process cache of the linked integration per app type and its service instance.
+    
+    Entries are dropped by the Integration save/delete signals. Those only
+    fire in the process that made the change, so the TTL bounds how long
+    other processes (queue workers) can keep using stale credentials.
+    """
+    
+    def __init__(self):
+        self._entries: Dict[str, Tuple[float, str, Any]] = {}
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a lookup that raced with one does
+        # not store what it read before the change
+        self._generation = 0
+    
+    def get_service(self, app_type: str, build: Callable[[Integration], Any]) -> Any:
+        entry = self._entries.get(app_type)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[2]
+        
+        generation = self._generation
+        integration = Integration.objects.get(
+            app_type=app_type,
+            linked=True
+        )
+        service = build(integration)
+        
+        with self._lock:
+            if generation == self._generation:
+                expires_at = time.monotonic() + settings.INTEGRATION_CACHE_TTL
+                self._entries[app_type] = (expires_at, integration.id, service)
+        return service
+    
+    def invalidate(self, integration: Integration):
+        with self._lock:
+            self._generation += 1
+            for app_type, (_, integration_id, _) in list(self._entries.items()):
+                if app_type == integration.app_type or integration_id == integration.id:
+                    del self._entries[app_type]
+    
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+integration_cache = IntegrationCache()
@@ -1,14 +1,245 @@
 # integrations/services/base.py
+from .circuit import CircuitBreaker, get_breaker
+from .http import get_async_client, get_session, get_timeout
+from .read_cache import read_cache
+from .ratelimit import RateLimitExceeded, TokenBucket, get_bucket, retry_after_seconds
+from django.conf import settings
+from typing import Dict, Any, Callable, Optional
+from urllib.parse import urlsplit
+import asyncio
+import httpx
 import requests
-from typing import Dict, Any
+import time
+
+class IntegrationCall:
+    """A single HTTP request to a third-party API and how to read its response.
+    
+    Services describe their actions as calls so the same definition can be
+    sent by the blocking client or awaited on the shared async client.
+    """
+    
+    def __init__(self, method: str, url: str, parse: Callable[[Any], Dict[str, Any]], **kwargs):
+        self.method = method
+        self.url = url
+        self.parse = parse
+        self.kwargs = kwargs
 
 class BaseIntegration:
+    """Base for the third-party API services.
+    
+    Every call goes through _perform/_perform_async, which add a "call"
+    entry to the parsed result describing the HTTP exchange: app type,
+    host, status, time to first byte, total request time, retries and
+    response size. A call that fails in transport raises with the same
+    metadata on the exception's call_metadata. Service instances are
+    shared between threads, so the metadata travels with the result
+    rather than being kept on the instance.
+    
+    Calls also pass the circuit breaker of their host and credential: while
+    it is open they fail fast with error_code 'circuit_open' and a
+    retry_after, and every call that goes out reports its outcome to it.
+    """
+    
+    APP_TYPE = ''
+    # Actions that only read, so their results may be cached (see read_cache.py)
+    READ_ONLY_ACTIONS = ()
+    
     def __init__(self, api_key: str, api_secret: str = None):
         self.api_key = api_key
         self.api_secret = api_secret
     
     def test_connection(self) -> Dict[str, Any]:
-        raise NotImplementedError
+        return self._perform(self._test_connection_call())
     
     def execute_action(self, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        call = self._action_call(action, params)
+        if call is None:
+            return {"success": False, "error": f"Unknown action: {action}"}
+        return read_cache.get(self, action, params, lambda: self._perform(call))
+    
+    async def test_connection_async(self) -> Dict[str, Any]:
+        return await self._perform_async(self._test_connection_call())
+    
+    async def execute_action_async(self, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        call = self._action_call(action, params)
+        if call is None:
+            return {"success": False, "error": f"Unknown action: {action}"}
+        return await read_cache.get_async(self, action, params, lambda: self._perform_async(call))
+    
+    def _test_connection_call(self) -> IntegrationCall:
+        raise NotImplementedError
+    
+    def _action_call(self, action: str, params: Dict[str, Any]) -> Optional[IntegrationCall]:
+        """Build the call for an action, or None if the action is unknown"""
         raise NotImplementedError
+    
+    def _error_result(self, response, error: str) -> Dict[str, Any]:
+        """Failed call result carrying the HTTP status and the API's own error
+        code, so failures can be categorized without reading the message"""
+        return {
+            "success": False,
+            "error": error,
+            "status_code": response.status_code,
+            "error_code": self._error_code(response)
+        }
+    
+    def _error_code(self, response) -> Optional[str]:
+        """Machine-readable error code from an error response body, if the API has one"""
+        return None
+    
+    def _response_json(self, response) -> Dict[str, Any]:
+        try:
+            data = response.json()
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+    
+    def _perform(self, call: IntegrationCall) -> Dict[str, Any]:
+        kwargs = {'timeout': get_timeout(), **call.kwargs}
+        breaker = get_breaker(self.APP_TYPE, urlsplit(call.url).netloc, self.api_key)
+        if not breaker.allow():
+            return self._circuit_open_result(call, breaker)
+        bucket = get_bucket(self.APP_TYPE, self.api_key)
+        attempt = 0
+        # Outcome for the breaker; stays None unless the API was reached
+        failed, request_ms = None, 0
+        
+        try:
+            while True:
+                if bucket is not None:
+                    try:
+                        bucket.acquire()
+                    except RateLimitExceeded as error:
+                        return self._rate_limited_result(call, error)
+                
+                started = time.perf_counter()
+                try:
+                    response = get_session(call.url).request(call.method, call.url, **kwargs)
+                except requests.RequestException as error:
+                    error.call_metadata = self._call_metadata(call, started, retries=attempt)
+                    failed, request_ms = True, error.call_metadata['request_ms']
+                    raise
+                
+                delay = self._rate_limit_delay(response, attempt, bucket)
+                if delay is None:
+                    break
+                time.sleep(delay)
+                attempt += 1
+            
+            # requests reads the body before returning; elapsed stops at the headers
+            metadata = self._call_metadata(
+                call, started,
+                response=response,
+                ttfb_ms=int(response.elapsed.total_seconds() * 1000),
+                retries=attempt + self._retry_count(response)
+            )
+            failed, request_ms = response.status_code >= 500, metadata['request_ms']
+        finally:
+            # Every allowed call reports back, however it ended, or a
+            # half-open circuit would keep waiting on its probe
+            breaker.record(failed, request_ms)
+        return self._parse(call, response, metadata)
+    
+    async def _perform_async(self, call: IntegrationCall) -> Dict[str, Any]:
+        client = get_async_client()
+        breaker = get_breaker(self.APP_TYPE, urlsplit(call.url).netloc, self.api_key)
+        if not breaker.allow():
+            return self._circuit_open_result(call, breaker)
+        bucket = get_bucket(self.APP_TYPE, self.api_key)
+        attempt = 0
+        failed, request_ms = None, 0
+        
+        try:
+            while True:
+                if bucket is not None:
+                    try:
+                        await bucket.acquire_async()
+                    except RateLimitExceeded as error:
+                        return self._rate_limited_result(call, error)
+                
+                started = time.perf_counter()
+                try:
+                    # Streamed so the headers and the body can be timed separately
+                    response = await client.send(client.build_request(call.method, call.url, **call.kwargs), stream=True)
+                    ttfb_ms = int((time.perf_counter() - started) * 1000)
+                    try:
+                        await response.aread()
+                    finally:
+                        await response.aclose()
+                except httpx.HTTPError as error:
+                    error.call_metadata = self._call_metadata(call, started, retries=attempt)
+                    failed, request_ms = True, error.call_metadata['request_ms']
+                    raise
+                
+                delay = self._rate_limit_delay(response, attempt, bucket)
+                if delay is None:
+                    break
+                await asyncio.sleep(delay)
+                attempt += 1
+            
+            metadata = self._call_metadata(call, started, response=response, ttfb_ms=ttfb_ms, retries=attempt)
+            failed, request_ms = response.status_code >= 500, metadata['request_ms']
+        finally:
+            # Also when the step is cancelled mid-call
+            breaker.record(failed, request_ms)
+        return self._parse(call, response, metadata)
+    
+    def _rate_limit_delay(self, response, attempt: int, bucket: Optional[TokenBucket]) -> Optional[float]:
+        """Seconds to sleep before retrying a 429 response, or None to return it as is.
+        
+        A 429 means the API rejected the request unprocessed, so even a POST
+        is safe to send again. With a bucket, the whole credential is paused
+        for Retry-After and the bucket spaces out the retry with every other
+        waiting call; the caller itself then has nothing extra to sleep.
+        """
+        if response.status_code != 429 or attempt >= settings.INTEGRATION_RATE_LIMIT_RETRIES:
+            return None
+        
+        delay = retry_after_seconds(response, attempt)
+        if delay > settings.INTEGRATION_RATE_LIMIT_MAX_WAIT:
+            return None
+        if bucket is None:
+            return delay
+        bucket.pause(delay)
+        return 0.0
+    
+    def _rate_limited_result(self, call: IntegrationCall, error: RateLimitExceeded) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "error": str(error),
+            "status_code": None,
+            "error_code": "rate_limited",
+            "call": self._call_metadata(call, time.perf_counter())
+        }
+    
+    def _circuit_open_result(self, call: IntegrationCall, breaker: CircuitBreaker) -> Dict[str, Any]:
+        retry_after = breaker.retry_after()
+        return {
+            "success": False,
+            "error": f"Circuit open for {breaker.host}: failing fast, next probe in {retry_after:.1f}s",
+            "status_code": None,
+            "error_code": "circuit_open",
+            "retry_after": retry_after,
+            "call": self._call_metadata(call, time.perf_counter())
+        }
+    
+    def _parse(self, call: IntegrationCall, response, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        result = call.parse(response)
+        result['call'] = metadata
+        return result
+    
+    def _call_metadata(self, call: IntegrationCall, started: float, response=None, ttfb_ms: Optional[int] = None, retries: int = 0) -> Dict[str, Any]:
+        return {
+            'app_type': self.APP_TYPE,
+            'host': urlsplit(call.url).netloc,
+            'http_status': response.status_code if response is not None else None,
+            'ttfb_ms': ttfb_ms,
+            'request_ms': int((time.perf_counter() - started) * 1000),
+            'retries': retries,
+            'response_bytes': len(response.content) if response is not None else None,
+        }
+    
+    def _retry_count(self, response) -> int:
+        # urllib3 keeps the retries it made for this response on the raw response
+        retries = getattr(response.raw, 'retries', None)
+        return len(retries.history) if retries is not None else 0
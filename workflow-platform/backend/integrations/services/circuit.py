@@ -0,0 +1,202 @@
+# integrations/services/circuit.py
+from analytics.cache import analytics_cache
+from analytics.models import IntegrationHealth
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.utils import timezone
+from .ratelimit import credential_digest
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, Optional, Tuple
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Host status the analytics panel shows while a circuit is in each state
+CIRCUIT_HEALTH_STATUS = {
+    CLOSED: 'healthy',
+    HALF_OPEN: 'degraded',
+    OPEN: 'down',
+}
+
+# One breaker per (host, credential), shared by every service instance,
+# thread and event loop in the process
+_breakers: Dict[Tuple[str, str], 'CircuitBreaker'] = {}
+_breakers_lock = threading.Lock()
+
+# State changes are written to IntegrationHealth from this thread: breakers
+# also trip on the event loop, where the ORM can't be used, and a call
+# should not wait on a database write either way
+_health_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='circuit-health')
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for one API host and credential.
+    
+    While closed, calls go through and their outcomes over the last
+    INTEGRATION_CIRCUIT_WINDOW seconds are kept. Once that window holds
+    MIN_CALLS calls and the share that failed (transport errors and 5xx)
+    reaches FAILURE_RATE, or the share slower than SLOW_CALL_MS reaches
+    SLOW_CALL_RATE, the circuit opens and calls fail fast for
+    OPEN_SECONDS. Then it is half-open: PROBES calls go through, and the
+    circuit closes once they all succeed or opens again on the first one
+    that fails or is slow. Probes that have not all reported OPEN_SECONDS
+    after the circuit went half-open count as failed, so a lost probe
+    can't leave it half-open for good.
+    
+    State lives in the process; every change is also recorded as an
+    IntegrationHealth row (see record_state_change).
+    """
+    
+    def __init__(self, app_type: str, host: str, credential: str):
+        self.app_type = app_type
+        self.host = host
+        self.credential = credential
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.half_opened_at = 0.0
+        self.probes = 0
+        self.probe_successes = 0
+        # (time, failed, slow, request_ms) of recent calls, with running totals
+        self.calls: Deque[Tuple[float, bool, bool, int]] = deque()
+        self.failed = 0
+        self.slow = 0
+        self.request_ms = 0
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        """Whether a call may go out now. A caller that gets True reports
+        the call's outcome with record()."""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < settings.INTEGRATION_CIRCUIT_OPEN_SECONDS:
+                    return False
+                self._transition(HALF_OPEN)
+            
+            if self.state == HALF_OPEN:
+                if self.probes >= settings.INTEGRATION_CIRCUIT_PROBES:
+                    if time.monotonic() - self.half_opened_at >= settings.INTEGRATION_CIRCUIT_OPEN_SECONDS:
+                        self._transition(OPEN)
+                    return False
+                self.probes += 1
+            return True
+    
+    def record(self, failed: Optional[bool], request_ms: int = 0):
+        """Outcome of an allowed call; None if it never reached the API"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if failed is None:
+                    self.probes = max(0, self.probes - 1)
+                elif failed or request_ms >= settings.INTEGRATION_CIRCUIT_SLOW_CALL_MS:
+                    self._transition(OPEN)
+                else:
+                    self.probe_successes += 1
+                    if self.probe_successes >= settings.INTEGRATION_CIRCUIT_PROBES:
+                        self._transition(CLOSED)
+                return
+            
+            # Calls that were let through before the circuit opened
+            if failed is None or self.state == OPEN:
+                return
+            
+            now = time.monotonic()
+            slow = request_ms >= settings.INTEGRATION_CIRCUIT_SLOW_CALL_MS
+            self.calls.append((now, failed, slow, request_ms))
+            self.failed += failed
+            self.slow += slow
+            self.request_ms += request_ms
+            self._evict(now - settings.INTEGRATION_CIRCUIT_WINDOW)
+            
+            if self._tripped():
+                self._transition(OPEN)
+    
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets probe calls through"""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.opened_at + settings.INTEGRATION_CIRCUIT_OPEN_SECONDS - time.monotonic())
+    
+    def _tripped(self) -> bool:
+        calls = len(self.calls)
+        if calls < settings.INTEGRATION_CIRCUIT_MIN_CALLS:
+            return False
+        return (
+            self.failed / calls >= settings.INTEGRATION_CIRCUIT_FAILURE_RATE
+            or self.slow / calls >= settings.INTEGRATION_CIRCUIT_SLOW_CALL_RATE
+        )
+    
+    def _evict(self, before: float):
+        while self.calls and self.calls[0][0] < before:
+            _, failed, slow, request_ms = self.calls.popleft()
+            self.failed -= failed
+            self.slow -= slow
+            self.request_ms -= request_ms
+    
+    def _transition(self, state: str):
+        # Snapshot of the window that led here, for the health row
+        window = {'calls': len(self.calls), 'failed': self.failed, 'request_ms': self.request_ms}
+        
+        self.state = state
+        self.probes = self.probe_successes = 0
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        elif state == HALF_OPEN:
+            self.half_opened_at = time.monotonic()
+        # Every state starts judging the host afresh
+        self.calls.clear()
+        self.failed = self.slow = self.request_ms = 0
+        
+        logger.warning("Circuit for %s (%s) is now %s", self.host, self.app_type, state)
+        _health_writer.submit(record_state_change, self.app_type, self.host, self.credential, state, window)
+
+
+def get_breaker(app_type: str, host: str, credential: Optional[str]) -> CircuitBreaker:
+    """Shared breaker for an API host and credential"""
+    key = (host, credential_digest(credential))
+    breaker = _breakers.get(key)
+    if breaker is not None:
+        return breaker
+    
+    with _breakers_lock:
+        if key not in _breakers:
+            _breakers[key] = CircuitBreaker(app_type, host, key[1])
+        return _breakers[key]
+
+
+def record_state_change(app_type: str, host: str, credential: str, state: str, window: Dict[str, int]):
+    """Write a breaker state change as an IntegrationHealth row.
+    
+    Rows with a circuit_state are events, next to the daily rollup rows
+    (which have none); the host panel reads the latest one per host and
+    credential.
+    """
+    calls, failed = window['calls'], window['failed']
+    try:
+        IntegrationHealth.objects.create(
+            integration_name=host,
+            app_type=app_type,
+            credential=credential,
+            timestamp=timezone.now(),
+            circuit_state=state,
+            total_calls=calls,
+            successful_calls=calls - failed,
+            failed_calls=failed,
+            avg_response_time_ms=window['request_ms'] // calls if calls else 0,
+            duration_sum_ms=window['request_ms'],
+            error_rate=round(failed / calls, 4) if calls else 0.0,
+            availability_percent=round((calls - failed) / calls * 100, 2) if calls else 100.0,
+            status=CIRCUIT_HEALTH_STATUS[state]
+        )
+        analytics_cache.invalidate(['hosts'])
+    except DatabaseError:
+        logger.exception("Could not record circuit state of %s", host)
+    finally:
+        # The writer thread is long-lived; don't hold a connection between changes
+        connection.close()
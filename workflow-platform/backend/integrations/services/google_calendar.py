@@ -1,10 +1,11 @@
 # integrations/services/google_calendar.py
-import requests
-from .base import BaseIntegration
-from typing import Dict, Any
+from .base import BaseIntegration, IntegrationCall
+from typing import Dict, Any, Optional
 from datetime import datetime
 
 class GoogleCalendarIntegration(BaseIntegration):
+    APP_TYPE = 'google_calendar'
+    READ_ONLY_ACTIONS = ('list_events',)
     BASE_URL = "https://www.googleapis.com/calendar/v3"
     
     def _get_headers(self) -> Dict[str, str]:
@@ -13,22 +14,26 @@ class GoogleCalendarIntegration(BaseIntegration):
             "Content-Type": "application/json"
         }
     
-    def test_connection(self) -> Dict[str, Any]:
+    def _error_code(self, response) -> Optional[str]:
+        error = self._response_json(response).get('error')
+        return error.get('status') if isinstance(error, dict) else None
+    
+    def _test_connection_call(self) -> IntegrationCall:
         """Test Google Calendar API connection"""
-        response = requests.get(
+        def parse(response) -> Dict[str, Any]:
+            if response.status_code == 200:
+                return {
+                    "success": True,
+                    "calendars": len(response.json().get('items', []))
+                }
+            return self._error_result(response, "Failed to connect to Google Calendar")
+        
+        return IntegrationCall(
+            'GET',
             f"{self.BASE_URL}/users/me/calendarList",
+            parse,
             headers=self._get_headers()
         )
-        
-        if response.status_code == 200:
-            return {
-                "success": True,
-                "calendars": len(response.json().get('items', []))
-            }
-        return {
-            "success": False,
-            "error": "Failed to connect to Google Calendar"
-        }
     
     def create_event(
         self,
@@ -39,6 +44,18 @@ class GoogleCalendarIntegration(BaseIntegration):
         description: str = ""
     ) -> Dict[str, Any]:
         """Create a calendar event"""
+        return self._perform(
+            self._create_event_call(calendar_id, summary, start_time, end_time, description)
+        )
+    
+    def _create_event_call(
+        self,
+        calendar_id: str,
+        summary: str,
+        start_time: str,
+        end_time: str,
+        description: str = ""
+    ) -> IntegrationCall:
         payload = {
             "summary": summary,
             "description": description,
@@ -52,26 +69,29 @@ class GoogleCalendarIntegration(BaseIntegration):
             }
         }
         
-        response = requests.post(
+        def parse(response) -> Dict[str, Any]:
+            if response.status_code in [200, 201]:
+                data = response.json()
+                return {
+                    "success": True,
+                    "event_id": data.get('id'),
+                    "link": data.get('htmlLink')
+                }
+            return self._error_result(response, f"Failed to create event: {response.text}")
+        
+        return IntegrationCall(
+            'POST',
             f"{self.BASE_URL}/calendars/{calendar_id}/events",
+            parse,
             headers=self._get_headers(),
             json=payload
         )
-        
-        if response.status_code in [200, 201]:
-            data = response.json()
-            return {
-                "success": True,
-                "event_id": data.get('id'),
-                "link": data.get('htmlLink')
-            }
-        return {
-            "success": False,
-            "error": f"Failed to create event: {response.text}"
-        }
     
     def list_events(self, calendar_id: str, max_results: int = 10) -> Dict[str, Any]:
         """List upcoming events"""
+        return self._perform(self._list_events_call(calendar_id, max_results))
+    
+    def _list_events_call(self, calendar_id: str, max_results: int = 10) -> IntegrationCall:
         params = {
             "maxResults": max_results,
             "timeMin": datetime.utcnow().isoformat() + 'Z',
@@ -79,26 +99,26 @@ class GoogleCalendarIntegration(BaseIntegration):
             "orderBy": "startTime"
         }
         
-        response = requests.get(
+        def parse(response) -> Dict[str, Any]:
+            if response.status_code == 200:
+                data = response.json()
+                return {
+                    "success": True,
+                    "events": data.get('items', [])
+                }
+            return self._error_result(response, f"Failed to list events: {response.text}")
+        
+        return IntegrationCall(
+            'GET',
             f"{self.BASE_URL}/calendars/{calendar_id}/events",
+            parse,
             headers=self._get_headers(),
             params=params
         )
-        
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                "success": True,
-                "events": data.get('items', [])
-            }
-        return {
-            "success": False,
-            "error": f"Failed to list events: {response.text}"
-        }
     
-    def execute_action(self, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    def _action_call(self, action: str, params: Dict[str, Any]) -> Optional[IntegrationCall]:
         if action == 'create_event':
-            return self.create_event(
+            return self._create_event_call(
                 params.get('calendar_id', 'primary'),
                 params.get('summary'),
                 params.get('start_time'),
@@ -106,9 +126,9 @@ class GoogleCalendarIntegration(BaseIntegration):
                 params.get('description', '')
             )
         elif action == 'list_events':
-            return self.list_events(
+            return self._list_events_call(
                 params.get('calendar_id', 'primary'),
                 params.get('max_results', 10)
             )
         else:
-            return {"success": False, "error": f"Unknown action: {action}"}
\ No newline at end of file
+            return None
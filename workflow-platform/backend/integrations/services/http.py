@@ -0,0 +1,123 @@
+# integrations/services/http.py
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Tuple
+from urllib.parse import urlsplit
+from urllib3.util.retry import Retry
+import asyncio
+import httpx
+import requests
+import threading
+import weakref
+
+# One keep-alive session per API host, shared by every service instance and
+# thread in the process
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+# httpx clients are bound to the event loop that opened their connections,
+# so keep one pooled client per running loop
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_timeout() -> Tuple[float, float]:
+    """(connect, read) timeout in seconds for integration calls"""
+    return (settings.INTEGRATION_CONNECT_TIMEOUT, settings.INTEGRATION_READ_TIMEOUT)
+
+
+def get_session(url: str) -> requests.Session:
+    """Pooled session for the host of url"""
+    host = urlsplit(url).netloc
+    session = _sessions.get(host)
+    if session is not None:
+        return session
+    
+    with _sessions_lock:
+        if host not in _sessions:
+            _sessions[host] = _build_session()
+        return _sessions[host]
+
+
+def _build_session() -> requests.Session:
+    # Connection errors are always safe to retry. Read errors (which is how
+    # a reset on a reused keep-alive connection surfaces) are only retried
+    # for idempotent methods, so a POST that may have reached the API is
+    # never sent twice.
+    retries = Retry(
+        total=settings.INTEGRATION_HTTP_RETRIES,
+        connect=settings.INTEGRATION_HTTP_RETRIES,
+        read=settings.INTEGRATION_HTTP_RETRIES,
+        status=0,
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        backoff_factor=0.2,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.INTEGRATION_POOL_MAXSIZE,
+        pool_block=settings.INTEGRATION_POOL_BLOCK,
+        max_retries=retries,
+    )
+    
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not settings.INTEGRATION_HTTP_KEEPALIVE:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Connection pool usage per host for this process"""
+    stats = {}
+    for host, session in list(_sessions.items()):
+        adapter = session.get_adapter(f'https://{host}')
+        pools = adapter.poolmanager.pools
+        
+        host_stats = {
+            'maxsize': settings.INTEGRATION_POOL_MAXSIZE,
+            'in_use': 0,
+            'idle': 0,
+            'connections_opened': 0,
+            'requests': 0,
+        }
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None or pool.pool is None:
+                continue
+            # The queue holds idle connections plus None placeholders for
+            # slots that were never filled; whatever is missing is checked out
+            queued = list(pool.pool.queue)
+            host_stats['idle'] += sum(1 for conn in queued if conn is not None)
+            host_stats['in_use'] += pool.pool.maxsize - len(queued)
+            host_stats['connections_opened'] += pool.num_connections
+            host_stats['requests'] += pool.num_requests
+        
+        stats[host] = host_stats
+    return stats
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Shared keep-alive client for the current event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    
+    if client is None or client.is_closed:
+        connect_timeout, read_timeout = get_timeout()
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=settings.INTEGRATION_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.INTEGRATION_ASYNC_MAX_KEEPALIVE,
+            ),
+        )
+        _async_clients[loop] = client
+    
+    return client
+
+
+async def close_async_client():
+    """Close the client of the current event loop, if one was opened"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -1,9 +1,9 @@
 # integrations/services/notion.py
-import requests
-from .base import BaseIntegration
-from typing import Dict, Any
+from .base import BaseIntegration, IntegrationCall
+from typing import Dict, Any, Optional
 
 class NotionIntegration(BaseIntegration):
+    APP_TYPE = 'notion'
     BASE_URL = "https://api.notion.com/v1"
     NOTION_VERSION = "2022-06-28"
     
@@ -14,27 +14,28 @@ class NotionIntegration(BaseIntegration):
             "Notion-Version": self.NOTION_VERSION
         }
     
-    def test_connection(self) -> Dict[str, Any]:
+    def _error_code(self, response) -> Optional[str]:
+        return self._response_json(response).get('code')
+    
+    def _test_connection_call(self) -> IntegrationCall:
         """Test Notion API connection"""
-        response = requests.get(
-            f"{self.BASE_URL}/users/me",
-            headers=self._get_headers()
-        )
+        def parse(response) -> Dict[str, Any]:
+            if response.status_code == 200:
+                data = response.json()
+                return {
+                    "success": True,
+                    "user": data.get('name'),
+                    "type": data.get('type')
+                }
+            return self._error_result(response, "Failed to connect to Notion")
         
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                "success": True,
-                "user": data.get('name'),
-                "type": data.get('type')
-            }
-        return {
-            "success": False,
-            "error": "Failed to connect to Notion"
-        }
+        return IntegrationCall('GET', f"{self.BASE_URL}/users/me", parse, headers=self._get_headers())
     
     def create_page(self, database_id: str, title: str, content: str) -> Dict[str, Any]:
         """Create a new page in Notion database"""
+        return self._perform(self._create_page_call(database_id, title, content))
+    
+    def _create_page_call(self, database_id: str, title: str, content: str) -> IntegrationCall:
         payload = {
             "parent": {"database_id": database_id},
             "properties": {
@@ -66,26 +67,29 @@ class NotionIntegration(BaseIntegration):
             ]
         }
         
-        response = requests.post(
+        def parse(response) -> Dict[str, Any]:
+            if response.status_code in [200, 201]:
+                data = response.json()
+                return {
+                    "success": True,
+                    "page_id": data.get('id'),
+                    "url": data.get('url')
+                }
+            return self._error_result(response, f"Failed to create page: {response.text}")
+        
+        return IntegrationCall(
+            'POST',
             f"{self.BASE_URL}/pages",
+            parse,
             headers=self._get_headers(),
             json=payload
         )
-        
-        if response.status_code in [200, 201]:
-            data = response.json()
-            return {
-                "success": True,
-                "page_id": data.get('id'),
-                "url": data.get('url')
-            }
-        return {
-            "success": False,
-            "error": f"Failed to create page: {response.text}"
-        }
     
     def update_page(self, page_id: str, title: str, content: str = None) -> Dict[str, Any]:
         """Update an existing Notion page"""
+        return self._perform(self._update_page_call(page_id, title, content))
+    
+    def _update_page_call(self, page_id: str, title: str, content: str = None) -> IntegrationCall:
         payload = {
             "properties": {
                 "Ticket": {
@@ -100,35 +104,35 @@ class NotionIntegration(BaseIntegration):
             }
         }
         
-        response = requests.patch(
+        def parse(response) -> Dict[str, Any]:
+            if response.status_code == 200:
+                data = response.json()
+                return {
+                    "success": True,
+                    "page_id": data.get('id')
+                }
+            return self._error_result(response, f"Failed to update page: {response.text}")
+        
+        return IntegrationCall(
+            'PATCH',
             f"{self.BASE_URL}/pages/{page_id}",
+            parse,
             headers=self._get_headers(),
             json=payload
         )
-        
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                "success": True,
-                "page_id": data.get('id')
-            }
-        return {
-            "success": False,
-            "error": f"Failed to update page: {response.text}"
-        }
     
-    def execute_action(self, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    def _action_call(self, action: str, params: Dict[str, Any]) -> Optional[IntegrationCall]:
         if action == 'create_page':
-            return self.create_page(
+            return self._create_page_call(
                 params.get('database_id'),
                 params.get('title'),
                 params.get('content', '')
             )
         elif action == 'update_page':
-            return self.update_page(
+            return self._update_page_call(
                 params.get('page_id'),
                 params.get('title'),
                 params.get('content')
             )
         else:
-            return {"success": False, "error": f"Unknown action: {action}"}
+            return None
@@ -0,0 +1,149 @@
+# integrations/services/ratelimit.py
+from django.conf import settings
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+import asyncio
+import hashlib
+import threading
+import time
+
+# One bucket per (app type, credential), shared by every service instance,
+# thread and event loop in the process
+_buckets: Dict[Tuple[str, str], 'TokenBucket'] = {}
+_buckets_lock = threading.Lock()
+# Worker processes started together by run_workers (see share_limits)
+_worker_processes = 0
+
+
+class RateLimitExceeded(Exception):
+    """A call would have had to wait longer than INTEGRATION_RATE_LIMIT_MAX_WAIT"""
+
+
+class TokenBucket:
+    """Token bucket for one API credential: `rate` calls per second, `burst` at once.
+    
+    Callers reserve a token and are told how long to wait for it. Tokens
+    can go negative: each waiting caller owns a later slot, so a burst of
+    calls is spread out at `rate` instead of all waking at the same time.
+    When the API answers 429, pause() stops the bucket until the
+    Retry-After time; callers already waiting take a new slot after it.
+    """
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.generation = 0  # bumped by pause(), invalidates earlier slots
+        self._lock = threading.Lock()
+    
+    def acquire(self, max_wait: Optional[float] = None) -> float:
+        """Block until a call may go out; returns the seconds waited"""
+        waited = 0.0
+        while True:
+            wait, generation = self._reserve(max_wait, waited)
+            if wait:
+                time.sleep(wait)
+                waited += wait
+            if self.generation == generation:
+                return waited
+    
+    async def acquire_async(self, max_wait: Optional[float] = None) -> float:
+        waited = 0.0
+        while True:
+            wait, generation = self._reserve(max_wait, waited)
+            if wait:
+                await asyncio.sleep(wait)
+                waited += wait
+            if self.generation == generation:
+                return waited
+    
+    def pause(self, seconds: float):
+        """Hand out no tokens for `seconds`, then refill from empty"""
+        with self._lock:
+            resume = time.monotonic() + seconds
+            if resume > self.updated:
+                self.updated = resume
+                self.tokens = 0.0
+                self.generation += 1
+    
+    def _reserve(self, max_wait: Optional[float], waited: float) -> Tuple[float, int]:
+        max_wait = settings.INTEGRATION_RATE_LIMIT_MAX_WAIT if max_wait is None else max_wait
+        with self._lock:
+            now = time.monotonic()
+            if now > self.updated:
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+            
+            ready_at = self.updated + max(0.0, (1 - self.tokens) / self.rate)
+            wait = max(0.0, ready_at - now)
+            if waited + wait > max_wait:
+                raise RateLimitExceeded(
+                    f"Rate limit: no call slot within {max_wait:g}s (limit {self.rate:g}/s)"
+                )
+            self.tokens -= 1
+            return wait, self.generation
+
+
+def share_limits(processes: int):
+    """Split each configured limit across this many worker processes.
+    
+    Buckets live in process memory, so N processes calling with the same
+    credential would together send N times its limit; each one gets
+    rate/N instead. Called by run_workers with its process count.
+    """
+    global _worker_processes
+    _worker_processes = processes
+    with _buckets_lock:
+        _buckets.clear()
+
+
+def limit_share() -> int:
+    """Number of processes each configured limit is divided between: the
+    setting, else the workers run_workers started, else just this one"""
+    return max(1, settings.INTEGRATION_RATE_LIMIT_PROCESSES or _worker_processes or 1)
+
+
+def get_bucket(app_type: str, credential: Optional[str]) -> Optional[TokenBucket]:
+    """Shared bucket for an app and credential, or None if the app has no limit
+    configured. Its rate is this process's share of the limit (see share_limits)."""
+    limit = settings.INTEGRATION_RATE_LIMITS.get(app_type)
+    if not limit:
+        return None
+    
+    key = (app_type, credential_digest(credential))
+    bucket = _buckets.get(key)
+    if bucket is not None:
+        return bucket
+    
+    with _buckets_lock:
+        if key not in _buckets:
+            processes = limit_share()
+            _buckets[key] = TokenBucket(
+                rate=float(limit['rate']) / processes,
+                burst=max(1, int(limit['burst']) // processes)
+            )
+        return _buckets[key]
+
+
+def credential_digest(credential: Optional[str]) -> str:
+    """Short digest identifying a credential, so per-credential state is not
+    keyed (or recorded) by the secret itself"""
+    return hashlib.sha256((credential or '').encode()).hexdigest()[:16]
+
+
+def retry_after_seconds(response, attempt: int) -> float:
+    """Delay a 429 response asks for, from Retry-After (seconds or HTTP date)
+    or exponential backoff from INTEGRATION_RATE_LIMIT_BACKOFF without one"""
+    value = response.headers.get('Retry-After')
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            pass
+    return settings.INTEGRATION_RATE_LIMIT_BACKOFF * 2 ** attempt
@@ -0,0 +1,153 @@
+# integrations/services/read_cache.py
+from django.conf import settings
+from .ratelimit import credential_digest
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import copy
+import json
+import threading
+import time
+
+# How a cached read was served: the call's cache_status (and StepRun's)
+HIT = 'hit'
+MISS = 'miss'
+COALESCED = 'coalesced'
+
+
+class ReadCache:
+    """TTL and LRU bounded cache of read-only action results.
+    
+    Opt-in per action: only actions a service lists in READ_ONLY_ACTIONS
+    and that have a TTL in INTEGRATION_READ_CACHE_TTLS are cached. Entries
+    are keyed by app, action, credential and the action's params, expire
+    after the action's TTL, and the least recently used are dropped beyond
+    INTEGRATION_READ_CACHE_MAX_ENTRIES. Identical reads that miss while one
+    is in flight wait for its result instead of calling the API again, from
+    threads and event loops alike. Only successful results are stored.
+    
+    Results served from the cache (hits, and coalesced waiters) carry call
+    metadata without a host, since they made no HTTP call of their own.
+    """
+    
+    def __init__(self):
+        # key -> (expires_at, result without its call metadata)
+        self._entries: 'OrderedDict[str, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+    
+    def ttl(self, service, action: str) -> Optional[float]:
+        """Seconds results of the action are kept, or None if it is not cached"""
+        if action not in service.READ_ONLY_ACTIONS:
+            return None
+        return settings.INTEGRATION_READ_CACHE_TTLS.get(f'{service.APP_TYPE}.{action}') or None
+    
+    def get(self, service, action: str, params: Dict[str, Any], perform: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Result of the read, from the cache or from perform()"""
+        ttl = self.ttl(service, action)
+        if ttl is None:
+            return perform()
+        
+        key = self._key(service, action, params)
+        status, value = self._lookup(service, action, key)
+        if status == HIT:
+            return self._served(service, value, HIT)
+        if status == COALESCED:
+            return self._served(service, value.result(), COALESCED)
+        
+        try:
+            result = perform()
+        except BaseException as error:
+            self._complete(key, value, ttl, error=error)
+            raise
+        self._complete(key, value, ttl, result=result)
+        return self._miss(result)
+    
+    async def get_async(self, service, action: str, params: Dict[str, Any], perform: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        ttl = self.ttl(service, action)
+        if ttl is None:
+            return await perform()
+        
+        key = self._key(service, action, params)
+        status, value = self._lookup(service, action, key)
+        if status == HIT:
+            return self._served(service, value, HIT)
+        if status == COALESCED:
+            return self._served(service, await asyncio.wrap_future(value), COALESCED)
+        
+        try:
+            result = await perform()
+        except BaseException as error:
+            self._complete(key, value, ttl, error=error)
+            raise
+        self._complete(key, value, ttl, result=result)
+        return self._miss(result)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hits, misses and coalesced reads per action, for this process"""
+        with self._lock:
+            actions = {name: dict(counts) for name, counts in self._stats.items()}
+            entries = len(self._entries)
+        for counts in actions.values():
+            reads = counts[HIT] + counts[MISS] + counts[COALESCED]
+            counts['hit_rate'] = round((counts[HIT] + counts[COALESCED]) / reads, 4) if reads else 0
+        return {'entries': entries, 'actions': actions}
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def _lookup(self, service, action: str, key: str) -> Tuple[str, Any]:
+        """(HIT, result), (COALESCED, future of the read in flight) or
+        (MISS, future the caller has to complete)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                status, value = HIT, entry[1]
+            elif key in self._in_flight:
+                status, value = COALESCED, self._in_flight[key]
+            else:
+                status, value = MISS, Future()
+                self._in_flight[key] = value
+            
+            counts = self._stats.setdefault(f'{service.APP_TYPE}.{action}', {HIT: 0, MISS: 0, COALESCED: 0})
+            counts[status] += 1
+            return status, value
+    
+    def _complete(self, key: str, future: Future, ttl: float, result: Optional[Dict[str, Any]] = None, error: Optional[BaseException] = None):
+        with self._lock:
+            del self._in_flight[key]
+            if result is not None and result.get('success'):
+                stored = {name: value for name, value in result.items() if name != 'call'}
+                self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(stored))
+                self._entries.move_to_end(key)
+                while len(self._entries) > settings.INTEGRATION_READ_CACHE_MAX_ENTRIES:
+                    self._entries.popitem(last=False)
+        
+        # Waiters copy the result themselves; they must not share the caller's
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result({name: value for name, value in result.items() if name != 'call'})
+    
+    def _served(self, service, result: Dict[str, Any], status: str) -> Dict[str, Any]:
+        served = copy.deepcopy(result)
+        served['call'] = {'app_type': service.APP_TYPE, 'cache_status': status}
+        return served
+    
+    def _miss(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        if 'call' in result:
+            result['call']['cache_status'] = MISS
+        return result
+    
+    def _key(self, service, action: str, params: Dict[str, Any]) -> str:
+        credential = credential_digest(f'{service.api_key}:{service.api_secret or ""}')
+        normalized = json.dumps(params, sort_keys=True, separators=(',', ':'), default=str)
+        return f'{service.APP_TYPE}.{action}:{credential}:{normalized}'
+
+
+read_cache = ReadCache()
@@ -1,30 +1,38 @@
 # integrations/services/slack.py
-import requests
-from .base import BaseIntegration
-from typing import Dict, Any
+from .base import BaseIntegration, IntegrationCall
+from typing import Dict, Any, Optional
 
 class SlackIntegration(BaseIntegration):
+    APP_TYPE = 'slack'
+    READ_ONLY_ACTIONS = ('list_channels',)
     BASE_URL = "https://slack.com/api"
     
-    def test_connection(self) -> Dict[str, Any]:
+    def _error_code(self, response) -> Optional[str]:
+        # Slack answers most errors with HTTP 200 and {"ok": false, "error": "..."}
+        return self._response_json(response).get('error')
+    
+    def _test_connection_call(self) -> IntegrationCall:
         """Test Slack API connection"""
         headers = {"Authorization": f"Bearer {self.api_key}"}
-        response = requests.get(f"{self.BASE_URL}/auth.test", headers=headers)
-        data = response.json()
         
-        if data.get('ok'):
-            return {
-                "success": True,
-                "team": data.get('team'),
-                "user": data.get('user')
-            }
-        return {
-            "success": False,
-            "error": data.get('error', 'Unknown error')
-        }
+        def parse(response) -> Dict[str, Any]:
+            data = response.json()
+            
+            if data.get('ok'):
+                return {
+                    "success": True,
+                    "team": data.get('team'),
+                    "user": data.get('user')
+                }
+            return self._error_result(response, data.get('error', 'Unknown error'))
+        
+        return IntegrationCall('GET', f"{self.BASE_URL}/auth.test", parse, headers=headers)
     
     def send_message(self, channel_id: str, message: str) -> Dict[str, Any]:
         """Send a message to a Slack channel"""
+        return self._perform(self._send_message_call(channel_id, message))
+    
+    def _send_message_call(self, channel_id: str, message: str) -> IntegrationCall:
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
@@ -34,47 +42,51 @@ class SlackIntegration(BaseIntegration):
             "text": message
         }
         
-        response = requests.post(
+        def parse(response) -> Dict[str, Any]:
+            data = response.json()
+            
+            if data.get('ok'):
+                return {
+                    "success": True,
+                    "message_ts": data.get('ts'),
+                    "channel": data.get('channel')
+                }
+            return self._error_result(response, data.get('error', 'Failed to send message'))
+        
+        return IntegrationCall(
+            'POST',
             f"{self.BASE_URL}/chat.postMessage",
+            parse,
             headers=headers,
             json=payload
         )
-        data = response.json()
-        
-        if data.get('ok'):
-            return {
-                "success": True,
-                "message_ts": data.get('ts'),
-                "channel": data.get('channel')
-            }
-        return {
-            "success": False,
-            "error": data.get('error', 'Failed to send message')
-        }
     
     def list_channels(self) -> Dict[str, Any]:
         """List all channels"""
+        return self._perform(self._list_channels_call())
+    
+    def _list_channels_call(self) -> IntegrationCall:
         headers = {"Authorization": f"Bearer {self.api_key}"}
-        response = requests.get(f"{self.BASE_URL}/conversations.list", headers=headers)
-        data = response.json()
         
-        if data.get('ok'):
-            return {
-                "success": True,
-                "channels": data.get('channels', [])
-            }
-        return {
-            "success": False,
-            "error": data.get('error', 'Failed to list channels')
-        }
+        def parse(response) -> Dict[str, Any]:
+            data = response.json()
+            
+            if data.get('ok'):
+                return {
+                    "success": True,
+                    "channels": data.get('channels', [])
+                }
+            return self._error_result(response, data.get('error', 'Failed to list channels'))
+        
+        return IntegrationCall('GET', f"{self.BASE_URL}/conversations.list", parse, headers=headers)
     
-    def execute_action(self, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    def _action_call(self, action: str, params: Dict[str, Any]) -> Optional[IntegrationCall]:
         if action == 'send_message':
-            return self.send_message(
+            return self._send_message_call(
                 params.get('channel_id'),
                 params.get('message')
             )
         elif action == 'list_channels':
-            return self.list_channels()
+            return self._list_channels_call()
         else:
-            return {"success": False, "error": f"Unknown action: {action}"}
+            return None
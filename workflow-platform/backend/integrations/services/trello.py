@@ -1,9 +1,10 @@
 # integrations/services/trello.py
-import requests
-from .base import BaseIntegration
-from typing import Dict, Any
+from .base import BaseIntegration, IntegrationCall
+from typing import Dict, Any, Optional
 
 class TrelloIntegration(BaseIntegration):
+    APP_TYPE = 'trello'
+    READ_ONLY_ACTIONS = ('list_boards',)
     BASE_URL = "https://api.trello.com/1"
     
     def _get_auth_params(self) -> Dict[str, str]:
@@ -12,25 +13,27 @@ class TrelloIntegration(BaseIntegration):
             "token": self.api_secret
         }
     
-    def test_connection(self) -> Dict[str, Any]:
+    def _test_connection_call(self) -> IntegrationCall:
         """Test Trello API connection"""
         params = self._get_auth_params()
-        response = requests.get(f"{self.BASE_URL}/members/me", params=params)
         
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                "success": True,
-                "username": data.get('username'),
-                "fullName": data.get('fullName')
-            }
-        return {
-            "success": False,
-            "error": "Failed to connect to Trello"
-        }
+        def parse(response) -> Dict[str, Any]:
+            if response.status_code == 200:
+                data = response.json()
+                return {
+                    "success": True,
+                    "username": data.get('username'),
+                    "fullName": data.get('fullName')
+                }
+            return self._error_result(response, "Failed to connect to Trello")
+        
+        return IntegrationCall('GET', f"{self.BASE_URL}/members/me", parse, params=params)
     
     def create_card(self, list_id: str, name: str, description: str = "") -> Dict[str, Any]:
         """Create a new card in Trello"""
+        return self._perform(self._create_card_call(list_id, name, description))
+    
+    def _create_card_call(self, list_id: str, name: str, description: str = "") -> IntegrationCall:
         params = self._get_auth_params()
         params.update({
             "idList": list_id,
@@ -38,65 +41,66 @@ class TrelloIntegration(BaseIntegration):
             "desc": description
         })
         
-        response = requests.post(f"{self.BASE_URL}/cards", params=params)
+        def parse(response) -> Dict[str, Any]:
+            if response.status_code == 200:
+                data = response.json()
+                return {
+                    "success": True,
+                    "card_id": data.get('id'),
+                    "url": data.get('url')
+                }
+            return self._error_result(response, f"Failed to create card: {response.text}")
         
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                "success": True,
-                "card_id": data.get('id'),
-                "url": data.get('url')
-            }
-        return {
-            "success": False,
-            "error": f"Failed to create card: {response.text}"
-        }
+        return IntegrationCall('POST', f"{self.BASE_URL}/cards", parse, params=params)
     
     def move_card(self, card_id: str, list_id: str) -> Dict[str, Any]:
         """Move a card to a different list"""
+        return self._perform(self._move_card_call(card_id, list_id))
+    
+    def _move_card_call(self, card_id: str, list_id: str) -> IntegrationCall:
         params = self._get_auth_params()
         params['idList'] = list_id
         
-        response = requests.put(f"{self.BASE_URL}/cards/{card_id}", params=params)
+        def parse(response) -> Dict[str, Any]:
+            if response.status_code == 200:
+                return {
+                    "success": True,
+                    "card_id": card_id
+                }
+            return self._error_result(response, f"Failed to move card: {response.text}")
         
-        if response.status_code == 200:
-            return {
-                "success": True,
-                "card_id": card_id
-            }
-        return {
-            "success": False,
-            "error": f"Failed to move card: {response.text}"
-        }
+        return IntegrationCall('PUT', f"{self.BASE_URL}/cards/{card_id}", parse, params=params)
     
     def list_boards(self) -> Dict[str, Any]:
         """List all boards"""
+        return self._perform(self._list_boards_call())
+    
+    def _list_boards_call(self) -> IntegrationCall:
         params = self._get_auth_params()
-        response = requests.get(f"{self.BASE_URL}/members/me/boards", params=params)
         
-        if response.status_code == 200:
-            return {
-                "success": True,
-                "boards": response.json()
-            }
-        return {
-            "success": False,
-            "error": "Failed to list boards"
-        }
+        def parse(response) -> Dict[str, Any]:
+            if response.status_code == 200:
+                return {
+                    "success": True,
+                    "boards": response.json()
+                }
+            return self._error_result(response, "Failed to list boards")
+        
+        return IntegrationCall('GET', f"{self.BASE_URL}/members/me/boards", parse, params=params)
     
-    def execute_action(self, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    def _action_call(self, action: str, params: Dict[str, Any]) -> Optional[IntegrationCall]:
         if action == 'create_card':
-            return self.create_card(
+            return self._create_card_call(
                 params.get('list_id'),
                 params.get('name'),
                 params.get('description', '')
             )
         elif action == 'move_card':
-            return self.move_card(
+            return self._move_card_call(
                 params.get('card_id'),
                 params.get('list_id')
             )
         elif action == 'list_boards':
-            return self.list_boards()
+            return self._list_boards_call()
         else:
-            return {"success": False, "error": f"Unknown action: {action}"}
\ No newline at end of file
+            return None
@@ -0,0 +1,10 @@
+# integrations/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .cache import integration_cache
+from .models import Integration
+
+@receiver(post_save, sender=Integration)
+@receiver(post_delete, sender=Integration)
+def invalidate_integration_cache(sender, instance, **kwargs):
+    integration_cache.invalidate(instance)
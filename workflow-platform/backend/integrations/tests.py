@@ -1,3 +1,34 @@
-from django.test import TestCase
+# integrations/tests.py
+from django.test import SimpleTestCase, override_settings
+from .services import ratelimit
 
-# Create your tests here.
+@override_settings(INTEGRATION_RATE_LIMITS={'slack': {'rate': 4, 'burst': 8}}, INTEGRATION_RATE_LIMIT_PROCESSES=0)
+class RateLimitShareTest(SimpleTestCase):
+    """Per-process buckets split a limit only across the processes sharing it"""
+    
+    def setUp(self):
+        ratelimit.share_limits(0)
+        self.addCleanup(ratelimit.share_limits, 0)
+    
+    def assert_bucket(self, rate: float, burst: int):
+        bucket = ratelimit.get_bucket('slack', 'xoxb-test')
+        self.assertEqual((bucket.rate, bucket.burst), (rate, burst))
+    
+    @override_settings(WORKFLOW_WORKER_CONCURRENCY=4)
+    def test_single_process_gets_the_whole_limit(self):
+        # Web processes and workers not started by run_workers
+        self.assertEqual(ratelimit.limit_share(), 1)
+        self.assert_bucket(4.0, 8)
+    
+    def test_run_workers_splits_the_limit(self):
+        ratelimit.share_limits(4)
+        self.assert_bucket(1.0, 2)
+        
+        # Bursts never drop below one call
+        ratelimit.share_limits(16)
+        self.assert_bucket(0.25, 1)
+    
+    @override_settings(INTEGRATION_RATE_LIMIT_PROCESSES=2)
+    def test_setting_overrides_the_worker_count(self):
+        ratelimit.share_limits(4)
+        self.assert_bucket(2.0, 4)
@@ -8,6 +8,8 @@ from .services.slack import SlackIntegration
 from .services.notion import NotionIntegration
 from .services.trello import TrelloIntegration
 from .services.google_calendar import GoogleCalendarIntegration
+from .services.http import get_pool_stats
+from .services.read_cache import read_cache
 
 class IntegrationViewSet(viewsets.ModelViewSet):
     queryset = Integration.objects.all()
@@ -52,6 +54,16 @@ class IntegrationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
     
+    @action(detail=False, methods=['get'])
+    def pool_stats(self, request):
+        """HTTP connection pool usage per API host (for this server process)"""
+        return Response(get_pool_stats())
+    
+    @action(detail=False, methods=['get'])
+    def read_cache_stats(self, request):
+        """Read cache hit rates per action (for this server process)"""
+        return Response(read_cache.stats())
+    
     @action(detail=True, methods=['post'])
     def unlink(self, request, pk=None):
         """Unlink integration"""
@@ -0,0 +1,97 @@
+# runs/dedup.py
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import TriggerDedupKey, WorkflowRun
+from datetime import timedelta
+from typing import Any, Callable, List, Optional, Tuple, Union
+import hashlib
+import json
+import re
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+# One step of a key path: .name, ['name'] or [index]
+_PATH_STEP = re.compile(r"""\.([A-Za-z_][\w-]*)|\[(\d+)\]|\[['"]([^'"]+)['"]\]""")
+
+
+def parse_key_path(path: str) -> List[Union[str, int]]:
+    """Steps of a JSONPath-style key path such as $.event.id or $.items[0]['id'].
+    
+    Only child names and list indexes are supported; the leading $ is optional.
+    """
+    rest = path.strip()
+    rest = rest[1:] if rest.startswith('$') else rest
+    if rest and rest[0] not in '.[':
+        rest = f'.{rest}'
+    
+    steps, position = [], 0
+    while position < len(rest):
+        match = _PATH_STEP.match(rest, position)
+        if match is None:
+            raise ValueError(f"Unsupported key path at '{rest[position:]}'")
+        name, index, quoted = match.groups()
+        steps.append(int(index) if index is not None else name or quoted)
+        position = match.end()
+    
+    if not steps:
+        raise ValueError('Key path selects nothing')
+    return steps
+
+
+def extract_key(payload: Any, path: str) -> Optional[str]:
+    """Value at path in the payload as a key string, or None if it isn't there"""
+    value = payload
+    for step in parse_key_path(path):
+        try:
+            value = value[step]
+        except (KeyError, IndexError, TypeError):
+            return None
+    if value is None or value == '':
+        return None
+    return value if isinstance(value, str) else json.dumps(value, sort_keys=True)
+
+
+def trigger_key(workflow, request) -> Optional[str]:
+    """Idempotency key of a trigger request: the header, else the
+    workflow's dedup_key_path into the payload"""
+    key = request.headers.get(IDEMPOTENCY_HEADER, '').strip()
+    if key:
+        return key
+    if workflow.dedup_key_path:
+        return extract_key(request.data, workflow.dedup_key_path)
+    return None
+
+
+def trigger_once(workflow, key: str, create_run: Callable[[], WorkflowRun]) -> Tuple[WorkflowRun, bool]:
+    """Create a run for the key unless one exists within the dedup window.
+    
+    Returns (run, duplicate). The key is claimed and the run created in one
+    transaction, so of concurrent triggers with the same key exactly one
+    creates a run: the others hit the unique index and get that run.
+    """
+    key_hash = hashlib.sha256(key.encode()).hexdigest()
+    now = timezone.now()
+    keys = TriggerDedupKey.objects.filter(workflow=workflow, key_hash=key_hash)
+    
+    with transaction.atomic():
+        # An expired key is free again
+        keys.filter(expires_at__lte=now).delete()
+        try:
+            with transaction.atomic():
+                entry = TriggerDedupKey.objects.create(
+                    workflow=workflow,
+                    key_hash=key_hash,
+                    expires_at=now + timedelta(seconds=settings.WEBHOOK_DEDUP_WINDOW_SECONDS)
+                )
+        except IntegrityError:
+            return keys.select_related('run').get().run, True
+        
+        entry.run = create_run()
+        entry.save(update_fields=['run'])
+    return entry.run, False
+
+
+def purge_expired_keys() -> int:
+    """Delete dedup keys past their window; returns how many"""
+    return TriggerDedupKey.objects.filter(expires_at__lte=timezone.now()).delete()[0]
@@ -0,0 +1,114 @@
+# runs/errors.py
+from typing import Any, Dict, Optional
+import httpx
+import requests
+
+TIMEOUT = 'timeout'
+AUTHENTICATION = 'authentication'
+RATE_LIMIT = 'rate_limit'
+NOT_FOUND = 'not_found'
+VALIDATION = 'validation'
+OTHER = 'other'
+
+ERROR_CATEGORY_CHOICES = [
+    (TIMEOUT, 'Timeout'),
+    (AUTHENTICATION, 'Authentication'),
+    (RATE_LIMIT, 'Rate Limit'),
+    (NOT_FOUND, 'Not Found'),
+    (VALIDATION, 'Validation'),
+    (OTHER, 'Other'),
+]
+
+ERROR_CATEGORY_LABELS = dict(ERROR_CATEGORY_CHOICES)
+
+HTTP_STATUS_CATEGORIES = {
+    400: VALIDATION,
+    401: AUTHENTICATION,
+    403: AUTHENTICATION,
+    404: NOT_FOUND,
+    408: TIMEOUT,
+    410: NOT_FOUND,
+    422: VALIDATION,
+    429: RATE_LIMIT,
+    504: TIMEOUT,
+}
+
+# Error codes the APIs put in their bodies: Slack's `error` (sent with
+# HTTP 200), Notion's `code` and Google's `error.status`
+API_ERROR_CODE_CATEGORIES = {
+    # Slack
+    'not_authed': AUTHENTICATION,
+    'invalid_auth': AUTHENTICATION,
+    'account_inactive': AUTHENTICATION,
+    'token_revoked': AUTHENTICATION,
+    'token_expired': AUTHENTICATION,
+    'missing_scope': AUTHENTICATION,
+    'no_permission': AUTHENTICATION,
+    'not_in_channel': AUTHENTICATION,
+    'ratelimited': RATE_LIMIT,
+    'invalid_arguments': VALIDATION,
+    'invalid_arg_name': VALIDATION,
+    'invalid_blocks': VALIDATION,
+    'no_text': VALIDATION,
+    'msg_too_long': VALIDATION,
+    'too_many_attachments': VALIDATION,
+    # Notion
+    'unauthorized': AUTHENTICATION,
+    'restricted_resource': AUTHENTICATION,
+    'rate_limited': RATE_LIMIT,
+    'object_not_found': NOT_FOUND,
+    'validation_error': VALIDATION,
+    'invalid_json': VALIDATION,
+    'invalid_request': VALIDATION,
+    'invalid_request_url': VALIDATION,
+    # Google
+    'UNAUTHENTICATED': AUTHENTICATION,
+    'PERMISSION_DENIED': AUTHENTICATION,
+    'RESOURCE_EXHAUSTED': RATE_LIMIT,
+    'NOT_FOUND': NOT_FOUND,
+    'INVALID_ARGUMENT': VALIDATION,
+    'FAILED_PRECONDITION': VALIDATION,
+    'DEADLINE_EXCEEDED': TIMEOUT,
+}
+
+def categorize_error(message: Optional[str], status_code: Optional[int] = None, error_code: Optional[str] = None) -> str:
+    """Error category of a failed call or run.
+    
+    The HTTP status and the API's error code decide when the integration
+    reported them; the message text is only read for failures that carry
+    neither (older rows, errors raised outside an integration call).
+    """
+    if status_code in HTTP_STATUS_CATEGORIES:
+        return HTTP_STATUS_CATEGORIES[status_code]
+    
+    if error_code:
+        if error_code in API_ERROR_CODE_CATEGORIES:
+            return API_ERROR_CODE_CATEGORIES[error_code]
+        if error_code.endswith('_not_found'):
+            return NOT_FOUND
+    
+    return categorize_message(message)
+
+def categorize_result(result: Dict[str, Any]) -> str:
+    """Error category of a failed integration result"""
+    return categorize_error(result.get('error'), result.get('status_code'), result.get('error_code'))
+
+def categorize_exception(error: Exception) -> str:
+    if isinstance(error, (requests.Timeout, httpx.TimeoutException, TimeoutError)):
+        return TIMEOUT
+    return categorize_message(str(error))
+
+def categorize_message(message: Optional[str]) -> str:
+    message = (message or '').lower()
+    if 'timeout' in message or 'timed out' in message:
+        return TIMEOUT
+    elif 'auth' in message or 'unauthorized' in message or '401' in message:
+        return AUTHENTICATION
+    elif 'rate limit' in message or 'ratelimited' in message or '429' in message:
+        return RATE_LIMIT
+    elif 'not found' in message or 'not_found' in message or '404' in message:
+        return NOT_FOUND
+    elif 'validation' in message or '400' in message:
+        return VALIDATION
+    else:
+        return OTHER
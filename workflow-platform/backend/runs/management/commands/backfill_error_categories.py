@@ -0,0 +1,64 @@
+# runs/management/commands/backfill_error_categories.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from runs.errors import categorize_error
+from runs.models import WorkflowRun, StepRun
+
+
+class Command(BaseCommand):
+    help = (
+        'Set error_category on failed runs and steps recorded before the column existed. '
+        'Steps are categorized from the status and error code in their output, when the '
+        'integration reported them, otherwise from the message; runs take the category of '
+        'their first failed step. Rolled-up days keep their counts; use rollup_metrics '
+        '--rebuild to recount them (days already pruned keep theirs).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows read and updated per transaction')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        steps = self._backfill(StepRun, batch_size, self._categorize_steps)
+        runs = self._backfill(WorkflowRun, batch_size, self._categorize_runs)
+        self.stdout.write(self.style.SUCCESS(f'Categorized {steps} step(s) and {runs} run(s)'))
+
+    def _backfill(self, model, batch_size, categorize) -> int:
+        pending = model.objects.filter(status='failed', error_category='').order_by('pk')
+        updated = 0
+        last_pk = None
+
+        while True:
+            batch = pending if last_pk is None else pending.filter(pk__gt=last_pk)
+            rows = list(batch.only('pk', 'error_message')[:batch_size])
+            if not rows:
+                return updated
+
+            categorize(rows)
+            with transaction.atomic():
+                model.objects.bulk_update(rows, ['error_category'])
+
+            updated += len(rows)
+            last_pk = rows[-1].pk
+
+    def _categorize_steps(self, steps):
+        outputs = dict(StepRun.objects.filter(pk__in=[step.pk for step in steps]).values_list('pk', 'output_data'))
+        for step in steps:
+            output = outputs.get(step.pk) or {}
+            step.error_category = categorize_error(
+                step.error_message,
+                output.get('status_code'),
+                output.get('error_code')
+            )
+
+    def _categorize_runs(self, runs):
+        first_failures = {}
+        failed_steps = StepRun.objects.filter(
+            run_id__in=[run.pk for run in runs],
+            status='failed'
+        ).order_by('run_id', 'order').values_list('run_id', 'error_category')
+        for run_id, category in failed_steps:
+            first_failures.setdefault(run_id, category)
+
+        for run in runs:
+            run.error_category = first_failures.get(run.pk) or categorize_error(run.error_message)
@@ -0,0 +1,111 @@
+# runs/management/commands/benchmark_run_queries.py
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from runs.models import WorkflowRun, StepRun
+from workflows.models import Workflow
+import random
+import time
+
+SEED_BATCH_SIZE = 5000
+STEP_NAMES = ['Slack: Send Message', 'Notion: Create Page', 'Trello: Create Card', 'Google Calendar: List Events']
+
+
+class Command(BaseCommand):
+    help = (
+        'Print query plans and timings for the run/step queries behind analytics and the runs API. '
+        'Run it against a scratch database (--settings) before and after migrating to compare indexes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Insert this many synthetic runs (one step each) first')
+        parser.add_argument('--workflows', type=int, default=50, help='Workflows to spread seeded runs over')
+        parser.add_argument('--days', type=int, default=7, help='Analytics window to query')
+        parser.add_argument('--repeat', type=int, default=3, help='Timings are the best of this many executions')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self._seed(options['seed'], options['workflows'])
+
+        workflow = Workflow.objects.order_by('id').first()
+        since = timezone.now() - timedelta(days=options['days'])
+
+        # Each entry reads only the columns the real code path needs, so a
+        # covering index can show up in the plan
+        queries = [
+            ('overview: window by status',
+             WorkflowRun.objects.filter(started_at__gte=since)
+             .order_by().values_list('status', flat=True)),
+            ('overview: success durations',
+             WorkflowRun.objects.filter(started_at__gte=since, status='success')
+             .order_by('duration_ms').values_list('duration_ms', flat=True)),
+            ('per-workflow window',
+             WorkflowRun.objects.filter(workflow=workflow, started_at__gte=since)
+             .order_by().values_list('status', 'duration_ms')),
+            ('runs list: status filter',
+             WorkflowRun.objects.filter(status='failed').order_by('-started_at')[:50]),
+            ('runs list: workflow filter',
+             WorkflowRun.objects.filter(workflow=workflow).order_by('-started_at')[:50]),
+            ('queue claim',
+             WorkflowRun.objects.filter(status='pending').order_by('started_at').values_list('run_id', flat=True)[:10]),
+            ('step diagnostics',
+             StepRun.objects.filter(started_at__gte=since)
+             .order_by().values_list('step_name', 'status', 'duration_ms')),
+            ('step window by name',
+             StepRun.objects.filter(step_name=STEP_NAMES[0], started_at__gte=since)
+             .order_by().values_list('duration_ms', flat=True)),
+        ]
+
+        self.stdout.write(f'{WorkflowRun.objects.count()} runs, {StepRun.objects.count()} step runs\n')
+        for label, queryset in queries:
+            best = None
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                list(queryset.all())
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+
+            self.stdout.write(f'{label}: {best * 1000:.1f} ms')
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f'    {line}')
+
+    def _seed(self, count, workflow_count):
+        workflows = list(Workflow.objects.all()[:workflow_count])
+        for i in range(len(workflows), workflow_count):
+            workflows.append(Workflow.objects.create(name=f'Benchmark workflow {i}'))
+
+        now = timezone.now()
+        created = 0
+        while created < count:
+            batch = min(SEED_BATCH_SIZE, count - created)
+            runs, steps = [], []
+            for _ in range(batch):
+                started_at = now - timedelta(seconds=random.randint(0, 60 * 86400))
+                status = random.choices(['success', 'failed', 'pending'], weights=[90, 9, 1])[0]
+                duration = random.randint(50, 8000)
+                run = WorkflowRun(
+                    run_id=f'run_{random.getrandbits(48):012x}',
+                    workflow=random.choice(workflows),
+                    status=status,
+                    started_at=started_at,
+                    duration_ms=duration,
+                )
+                runs.append(run)
+                steps.append(StepRun(
+                    step_id=StepRun.generate_id(),
+                    run=run,
+                    step_name=random.choice(STEP_NAMES),
+                    status=status,
+                    started_at=started_at,
+                    duration_ms=duration,
+                ))
+
+            with transaction.atomic():
+                WorkflowRun.objects.bulk_create(runs)
+                # started_at is auto_now_add on runs; put the seeded times back
+                WorkflowRun.objects.bulk_update(runs, ['started_at'], batch_size=SEED_BATCH_SIZE)
+                StepRun.objects.bulk_create(steps)
+            created += batch
+            self.stdout.write(f'Seeded {created}/{count} runs', ending='\r')
+        self.stdout.write('')
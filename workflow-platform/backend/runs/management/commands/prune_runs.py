@@ -0,0 +1,61 @@
+# runs/management/commands/prune_runs.py
+from django.core.management.base import BaseCommand
+from runs.retention import RunPruner
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete runs past their retention (Workflow.retention_days, else RUNS_RETENTION_DAYS). '
+        'Expired days are rolled up into the analytics metrics first, then each batch of runs '
+        'is written with its steps to a gzipped JSONL archive before it is deleted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be pruned')
+        parser.add_argument('--batch-size', type=int, help='Runs deleted per transaction (default RUNS_PRUNE_BATCH_SIZE)')
+        parser.add_argument('--archive-dir', help='Where archive files go (default RUNS_ARCHIVE_DIR)')
+        parser.add_argument('--vacuum', action='store_true', help='VACUUM afterwards so SQLite returns the freed space to disk')
+
+    def handle(self, *args, **options):
+        pruner = RunPruner(batch_size=options['batch_size'], archive_dir=options['archive_dir'])
+
+        if options['dry_run']:
+            counts = pruner.count()
+            self.stdout.write(
+                f"Would roll up {counts['days_to_roll_up']} day(s) first; "
+                f"runs are pruned up to the rollup watermark {self._watermark(counts['watermark'])}"
+            )
+            self.stdout.write(f"Would prune {counts['runs']} run(s) and {counts['steps']} step(s)")
+            return
+
+        report = pruner.prune()
+        if report['days_rolled_up']:
+            self.stdout.write(f"Rolled up {report['days_rolled_up']} day(s) first")
+        self.stdout.write(f"Pruning up to the rollup watermark {self._watermark(report['watermark'])}")
+        if report['dedup_keys']:
+            self.stdout.write(f"Purged {report['dedup_keys']} expired trigger dedup key(s)")
+        if not report['runs']:
+            self.stdout.write('Nothing to prune')
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {report['runs']} run(s) and {report['steps']} step(s), "
+            f"{self._size(report['payload_bytes'])} of run data"
+        ))
+        self.stdout.write(f"Archived to {report['archive']} ({self._size(report['archive_bytes'])})")
+
+        if options['vacuum']:
+            reclaimed = pruner.vacuum()
+            if reclaimed is None:
+                self.stdout.write('--vacuum only applies to SQLite; skipped')
+            else:
+                self.stdout.write(f'VACUUM reclaimed {self._size(reclaimed)} on disk')
+
+    def _watermark(self, day) -> str:
+        return str(day) if day else '(none yet: nothing is pruned before the first rollup)'
+
+    def _size(self, size: int) -> str:
+        for unit in ('B', 'KB', 'MB', 'GB'):
+            if size < 1024 or unit == 'GB':
+                return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+            size /= 1024
@@ -0,0 +1,132 @@
+# runs/management/commands/run_workers.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+import multiprocessing
+import signal
+import threading
+
+
+def _worker_main(poll_interval, burst, max_in_flight, stop_event, processes):
+    # Spawned children start from a blank interpreter; forked ones are
+    # already set up and setup() is a no-op for them.
+    import django
+    django.setup()
+    
+    from integrations.services.ratelimit import share_limits
+    from utils.run_queue import run_worker, run_async_worker
+    
+    # Each process calls the APIs with its share of the rate limits
+    share_limits(processes)
+    
+    # Ctrl-C goes to the whole process group. Let the parent decide when to
+    # stop so a run is never abandoned halfway through.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        if max_in_flight:
+            run_async_worker(
+                max_in_flight=max_in_flight,
+                poll_interval=poll_interval,
+                burst=burst,
+                stop_event=stop_event
+            )
+        else:
+            run_worker(poll_interval=poll_interval, burst=burst, stop_event=stop_event)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Start a pool of worker processes that execute queued workflow runs'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.WORKFLOW_WORKER_CONCURRENCY,
+            help='Number of worker processes'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.WORKFLOW_WORKER_POLL_INTERVAL,
+            help='Seconds to wait between polls when the queue is empty'
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Exit once the queue is drained instead of polling forever'
+        )
+        parser.add_argument(
+            '--async',
+            action='store_true',
+            dest='use_async',
+            help='Run each worker as an event loop with many runs in flight'
+        )
+        parser.add_argument(
+            '--max-in-flight',
+            type=int,
+            default=settings.WORKFLOW_ASYNC_MAX_IN_FLIGHT,
+            help='Runs each async worker executes concurrently'
+        )
+    
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        poll_interval = options['poll_interval']
+        burst = options['burst']
+        # 0 selects the blocking one-run-at-a-time worker
+        max_in_flight = max(1, options['max_in_flight']) if options['use_async'] else 0
+        
+        if concurrency == 1:
+            from integrations.services.ratelimit import share_limits
+            from utils.run_queue import run_worker, run_async_worker
+            share_limits(1)
+            stop_event = threading.Event()
+            
+            def stop(signum, frame):
+                self.stdout.write('Shutting down after the current run...')
+                stop_event.set()
+            
+            signal.signal(signal.SIGINT, stop)
+            signal.signal(signal.SIGTERM, stop)
+            
+            self.stdout.write('Starting 1 worker in-process')
+            if max_in_flight:
+                processed = run_async_worker(
+                    max_in_flight=max_in_flight,
+                    poll_interval=poll_interval,
+                    burst=burst,
+                    stop_event=stop_event
+                )
+            else:
+                processed = run_worker(poll_interval=poll_interval, burst=burst, stop_event=stop_event)
+            self.stdout.write(self.style.SUCCESS(f'Processed {processed} runs'))
+            return
+        
+        # Never share the parent's database connection with forked children
+        connections.close_all()
+        
+        stop_event = multiprocessing.Event()
+        workers = [
+            multiprocessing.Process(
+                target=_worker_main,
+                args=(poll_interval, burst, max_in_flight, stop_event, concurrency),
+                name=f'workflow-worker-{i}'
+            )
+            for i in range(concurrency)
+        ]
+        
+        def shutdown(signum, frame):
+            self.stdout.write('Shutting down workers after their current run...')
+            stop_event.set()
+        
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+        
+        self.stdout.write(f'Starting {concurrency} workers')
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        
+        self.stdout.write(self.style.SUCCESS('All workers stopped'))
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-18 03:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('runs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='steprun',
+            name='started_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
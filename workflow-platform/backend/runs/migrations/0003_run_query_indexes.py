@@ -0,0 +1,34 @@
+# Generated by Django 5.0.1 on 2026-10-18 03:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('runs', '0002_steprun_started_at_default'),
+        ('workflows', '0003_workflowstep_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='steprun',
+            index=models.Index(fields=['step_name', 'started_at'], name='steprun_name_started_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='steprun',
+            index=models.Index(fields=['started_at', 'step_name', 'status', 'duration_ms'], name='steprun_started_cover_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workflowrun',
+            index=models.Index(fields=['started_at', 'status'], name='run_started_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workflowrun',
+            index=models.Index(fields=['workflow', 'started_at'], name='run_workflow_started_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workflowrun',
+            index=models.Index(fields=['status', 'started_at', 'duration_ms'], name='run_status_started_dur_idx'),
+        ),
+    ]
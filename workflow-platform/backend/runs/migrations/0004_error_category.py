@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('runs', '0003_run_query_indexes'),
+        ('workflows', '0003_workflowstep_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='steprun',
+            name='error_category',
+            field=models.CharField(blank=True, choices=[('timeout', 'Timeout'), ('authentication', 'Authentication'), ('rate_limit', 'Rate Limit'), ('not_found', 'Not Found'), ('validation', 'Validation'), ('other', 'Other')], max_length=20),
+        ),
+        migrations.AddField(
+            model_name='workflowrun',
+            name='error_category',
+            field=models.CharField(blank=True, choices=[('timeout', 'Timeout'), ('authentication', 'Authentication'), ('rate_limit', 'Rate Limit'), ('not_found', 'Not Found'), ('validation', 'Validation'), ('other', 'Other')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='steprun',
+            index=models.Index(fields=['started_at', 'error_category'], name='steprun_started_errcat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workflowrun',
+            index=models.Index(fields=['started_at', 'error_category'], name='run_started_errcat_idx'),
+        ),
+    ]
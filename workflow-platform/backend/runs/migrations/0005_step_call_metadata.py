@@ -0,0 +1,56 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('runs', '0004_error_category'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='steprun',
+            name='app_type',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='steprun',
+            name='host',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='steprun',
+            name='http_status',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='steprun',
+            name='request_ms',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='steprun',
+            name='response_bytes',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='steprun',
+            name='retries',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='steprun',
+            name='ttfb_ms',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='steprun',
+            index=models.Index(fields=['started_at', 'host', 'app_type', 'status', 'request_ms'], name='steprun_started_host_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='steprun',
+            index=models.Index(fields=['app_type', 'started_at'], name='steprun_app_started_idx'),
+        ),
+    ]
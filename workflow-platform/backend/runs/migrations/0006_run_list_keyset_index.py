@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('runs', '0005_step_call_metadata'),
+        ('workflows', '0003_workflowstep_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workflowrun',
+            index=models.Index(fields=['-started_at', '-run_id'], name='run_started_id_idx'),
+        ),
+    ]
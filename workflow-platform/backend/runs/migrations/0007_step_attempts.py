@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('runs', '0006_run_list_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='steprun',
+            name='attempt_log',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='steprun',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 05:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('runs', '0007_step_attempts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='steprun',
+            name='cache_status',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+    ]
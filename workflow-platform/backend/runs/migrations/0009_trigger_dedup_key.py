@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-18 05:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('runs', '0008_steprun_cache_status'),
+        ('workflows', '0006_workflow_dedup_key_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TriggerDedupKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key_hash', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+                ('run', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='runs.workflowrun')),
+                ('workflow', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigger_keys', to='workflows.workflow')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='trigger_dedup_expires_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='triggerdedupkey',
+            constraint=models.UniqueConstraint(fields=('workflow', 'key_hash'), name='trigger_dedup_key_uniq'),
+        ),
+    ]
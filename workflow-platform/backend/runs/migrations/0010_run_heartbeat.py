@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 05:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('runs', '0009_trigger_dedup_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflowrun',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
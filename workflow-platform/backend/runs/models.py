@@ -1,6 +1,8 @@
 # runs/models.py
 from django.db import models
+from django.utils import timezone
 from workflows.models import Workflow
+from .errors import ERROR_CATEGORY_CHOICES
 import uuid
 
 class WorkflowRun(models.Model):
@@ -19,6 +21,11 @@ class WorkflowRun(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     duration_ms = models.IntegerField(default=0)
     error_message = models.TextField(blank=True)
+    # Set when the run fails, from the failing step's structured error
+    error_category = models.CharField(max_length=20, choices=ERROR_CATEGORY_CHOICES, blank=True)
+    # Lease of a queued run: stamped when a worker claims it and refreshed
+    # while the worker executes it (see utils/run_queue.py)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
     
     def save(self, *args, **kwargs):
         if not self.run_id:
@@ -30,6 +37,19 @@ class WorkflowRun(models.Model):
     
     class Meta:
         ordering = ['-started_at']
+        indexes = [
+            # Analytics windows: started_at range, counted by status
+            models.Index(fields=['started_at', 'status'], name='run_started_status_idx'),
+            # Runs list pages, keyed on (started_at, run_id) newest first
+            models.Index(fields=['-started_at', '-run_id'], name='run_started_id_idx'),
+            # Per-workflow analytics and the runs list filtered by workflow
+            models.Index(fields=['workflow', 'started_at'], name='run_workflow_started_idx'),
+            # Runs list filtered by status, queue claiming, and duration
+            # percentiles, which can be read from the index alone
+            models.Index(fields=['status', 'started_at', 'duration_ms'], name='run_status_started_dur_idx'),
+            # Error breakdown: failed runs of a window grouped by category
+            models.Index(fields=['started_at', 'error_category'], name='run_started_errcat_idx'),
+        ]
 
 class StepRun(models.Model):
     STATUS_CHOICES = [
@@ -44,17 +64,77 @@ class StepRun(models.Model):
     step_name = models.CharField(max_length=255)
     order = models.IntegerField(default=0)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
-    started_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: step rows are bulk-inserted after the fact and must
+    # keep the time the step actually started
+    started_at = models.DateTimeField(default=timezone.now)
     completed_at = models.DateTimeField(null=True, blank=True)
     duration_ms = models.IntegerField(default=0)
     input_data = models.JSONField(default=dict)
     output_data = models.JSONField(null=True, blank=True)
     error_message = models.TextField(blank=True)
+    error_category = models.CharField(max_length=20, choices=ERROR_CATEGORY_CHOICES, blank=True)
+    
+    # The step's HTTP call, as reported by the integration (see BaseIntegration)
+    app_type = models.CharField(max_length=50, blank=True)
+    host = models.CharField(max_length=255, blank=True)
+    http_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    ttfb_ms = models.IntegerField(null=True, blank=True)
+    request_ms = models.IntegerField(null=True, blank=True)
+    retries = models.PositiveSmallIntegerField(default=0)
+    response_bytes = models.IntegerField(null=True, blank=True)
+    # hit/miss/coalesced for actions served through the read cache
+    # (integrations/services/read_cache.py); empty for uncached calls
+    cache_status = models.CharField(max_length=10, blank=True)
+    
+    # Attempts made under the step's retry policy, and one entry per attempt
+    # (status, error, duration, wait before the next one)
+    attempts = models.PositiveSmallIntegerField(default=1)
+    attempt_log = models.JSONField(default=list, blank=True)
+    
+    CALL_FIELDS = ('app_type', 'host', 'http_status', 'ttfb_ms', 'request_ms', 'retries', 'response_bytes', 'cache_status')
     
     def save(self, *args, **kwargs):
         if not self.step_id:
-            self.step_id = f"steprun_{uuid.uuid4().hex[:12]}"
+            self.step_id = self.generate_id()
         super().save(*args, **kwargs)
     
+    @staticmethod
+    def generate_id() -> str:
+        return f"steprun_{uuid.uuid4().hex[:12]}"
+    
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['step_name', 'started_at'], name='steprun_name_started_idx'),
+            # Step diagnostics and host health group a started_at window;
+            # covering status and duration avoids touching the JSON-heavy rows
+            models.Index(fields=['started_at', 'step_name', 'status', 'duration_ms'], name='steprun_started_cover_idx'),
+            models.Index(fields=['started_at', 'error_category'], name='steprun_started_errcat_idx'),
+            # Host health: calls, failures and latency per host, from the index alone
+            models.Index(fields=['started_at', 'host', 'app_type', 'status', 'request_ms'], name='steprun_started_host_idx'),
+            models.Index(fields=['app_type', 'started_at'], name='steprun_app_started_idx'),
+        ]
+
+class TriggerDedupKey(models.Model):
+    """Idempotency key of a webhook trigger and the run it started.
+    
+    A trigger carrying a key (Idempotency-Key header or the workflow's
+    dedup_key_path) that is already here and unexpired gets the original
+    run back instead of a new one (see runs/dedup.py). Keys are stored as
+    SHA-256 digests; the unique index makes each lookup a single probe.
+    """
+    workflow = models.ForeignKey(Workflow, related_name='trigger_keys', on_delete=models.CASCADE)
+    key_hash = models.CharField(max_length=64)
+    # Set in the same transaction that claims the key
+    run = models.ForeignKey(WorkflowRun, related_name='+', null=True, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['workflow', 'key_hash'], name='trigger_dedup_key_uniq'),
+        ]
+        indexes = [
+            # Purging expired keys
+            models.Index(fields=['expires_at'], name='trigger_dedup_expires_idx'),
+        ]
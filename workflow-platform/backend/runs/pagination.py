@@ -0,0 +1,90 @@
+# runs/pagination.py
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import Optional, Tuple
+
+class RunKeysetPagination(BasePagination):
+    """Newest-first pages of runs, keyed on (started_at, run_id).
+    
+    The cursor is the key of the last run on the previous page, so each
+    page is an index range scan from there instead of an OFFSET that reads
+    and discards every earlier row. run_id breaks ties between runs that
+    started in the same instant. Pages only go forward; the response has
+    a `next` link while more runs remain.
+    """
+    
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self._page_size(request)
+        
+        queryset = queryset.order_by('-started_at', '-run_id')
+        position = self._decode_cursor(request.query_params.get(self.cursor_query_param))
+        if position is not None:
+            started_at, run_id = position
+            # The outer bound lets the database range-scan the index; the OR
+            # alone is not usable as an index range
+            queryset = queryset.filter(
+                Q(started_at__lt=started_at) | Q(started_at=started_at, run_id__lt=run_id),
+                started_at__lte=started_at
+            )
+        
+        # One extra row tells whether there is a next page
+        runs = list(queryset[:self.page_size + 1])
+        self.has_next = len(runs) > self.page_size
+        runs = runs[:self.page_size]
+        self.last = runs[-1] if runs else None
+        return runs
+    
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+    
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+    
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next:
+            return None
+        cursor = self._encode_cursor(self.last.started_at.isoformat(), self.last.run_id)
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+    
+    def _page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+        return max(1, min(size, self.max_page_size))
+    
+    def _encode_cursor(self, started_at: str, run_id: str) -> str:
+        return urlsafe_b64encode(f'{started_at}|{run_id}'.encode()).decode()
+    
+    def _decode_cursor(self, cursor: Optional[str]) -> Optional[Tuple]:
+        if not cursor:
+            return None
+        try:
+            started_at, run_id = urlsafe_b64decode(cursor.encode()).decode().split('|', 1)
+            started_at = parse_datetime(started_at)
+        except (ValueError, UnicodeDecodeError):
+            started_at = None
+        if started_at is None:
+            raise NotFound('Invalid cursor')
+        return started_at, run_id
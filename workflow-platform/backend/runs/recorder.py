@@ -0,0 +1,76 @@
+# runs/recorder.py
+from django.conf import settings
+from django.db import transaction
+from .models import WorkflowRun, StepRun
+from typing import List
+import threading
+
+class RunRecorder:
+    """Collects the StepRun records of one run in memory and writes them in batches.
+    
+    By default nothing is written until the run completes, when all step
+    rows go out in a single bulk insert inside the run's final transaction.
+    WORKFLOW_RECORD_CHECKPOINT_STEPS flushes every N finished steps for long
+    runs, and WORKFLOW_RECORD_CRASH_SAFE inserts each step's 'running' row
+    as soon as it starts, so a crashed worker still leaves a trace.
+    """
+    
+    def __init__(self, run: WorkflowRun):
+        self.run = run
+        self.checkpoint_every = settings.WORKFLOW_RECORD_CHECKPOINT_STEPS
+        self.crash_safe = settings.WORKFLOW_RECORD_CRASH_SAFE
+        self._lock = threading.Lock()
+        self._new: List[StepRun] = []
+        self._dirty: List[StepRun] = []
+        self._finished_since_flush = 0
+    
+    def start_step(self, step) -> StepRun:
+        step_run = StepRun(
+            step_id=StepRun.generate_id(),
+            run=self.run,
+            step_name=step.get_action_type_display(),
+            order=step.order,
+            status='running',
+            input_data=step.config
+        )
+        
+        if self.crash_safe:
+            step_run.save(force_insert=True)
+        else:
+            with self._lock:
+                self._new.append(step_run)
+        return step_run
+    
+    def finish_step(self, step_run: StepRun):
+        with self._lock:
+            # Rows not written yet go out with their final state in the
+            # pending insert; rows already written need an update
+            if not step_run._state.adding and step_run not in self._dirty:
+                self._dirty.append(step_run)
+            self._finished_since_flush += 1
+            checkpoint = self.checkpoint_every and self._finished_since_flush >= self.checkpoint_every
+        
+        if checkpoint:
+            self.flush()
+    
+    def flush(self):
+        """Write all pending step changes in one transaction"""
+        # Held for the whole write so a step cannot finish between being
+        # serialized for the insert and being marked as written
+        with self._lock:
+            new, self._new = self._new, []
+            dirty, self._dirty = self._dirty, []
+            self._finished_since_flush = 0
+            
+            if not new and not dirty:
+                return
+            
+            with transaction.atomic():
+                if new:
+                    StepRun.objects.bulk_create(new)
+                if dirty:
+                    StepRun.objects.bulk_update(dirty, [
+                        'status', 'completed_at', 'duration_ms',
+                        'output_data', 'error_message', 'error_category',
+                        'attempts', 'attempt_log', *StepRun.CALL_FIELDS
+                    ])
@@ -0,0 +1,172 @@
+# runs/retention.py
+from analytics.models import RollupWatermark
+from analytics.rollups import MetricsRollup
+from analytics.services import day_start
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+from workflows.models import Workflow
+from .dedup import purge_expired_keys
+from .models import WorkflowRun, StepRun
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import gzip
+import json
+import os
+import time
+
+class RunPruner:
+    """Deletes run history past its retention without losing what it recorded.
+    
+    A run expires once it is older than its workflow's retention_days, or
+    RUNS_RETENTION_DAYS for workflows without one. Retention is counted in
+    whole days, so a pass drops whole days of history at a time, and a day
+    is only pruned after the metric rollups cover it: analytics keeps its
+    totals and percentiles for pruned days. Runs still pending or running
+    are never pruned.
+    
+    Each batch of expired runs is appended, with its steps, to a gzipped
+    JSONL archive and synced to disk before the batch is deleted in its
+    own short transaction. Expired webhook dedup keys are purged on the way.
+    The last day runs were deleted from is kept as the PRUNED watermark, so
+    `rollup_metrics --rebuild` leaves the rollups of pruned days alone.
+    """
+    
+    FINISHED_STATUSES = ('success', 'failed')
+    
+    def __init__(self, batch_size: Optional[int] = None, archive_dir: Optional[str] = None, pause_ms: Optional[int] = None):
+        self.batch_size = batch_size or settings.RUNS_PRUNE_BATCH_SIZE
+        self.archive_dir = Path(archive_dir or settings.RUNS_ARCHIVE_DIR)
+        self.pause = (settings.RUNS_PRUNE_BATCH_PAUSE_MS if pause_ms is None else pause_ms) / 1000
+    
+    def expired_runs(self, through: Optional[date] = None) -> QuerySet:
+        """Runs past their retention on days rolled up through `through`
+        (default: the current watermark)"""
+        through = through or RollupWatermark.rolled_up_through_date()
+        if through is None:
+            return WorkflowRun.objects.none()
+        # Nothing past the last rolled-up day goes, whatever the policy says
+        rolled_up_until = day_start(through + timedelta(days=1))
+        
+        policies = Q()
+        if settings.RUNS_RETENTION_DAYS:
+            policies |= Q(
+                workflow__retention_days__isnull=True,
+                started_at__lt=min(self._cutoff(settings.RUNS_RETENTION_DAYS), rolled_up_until)
+            )
+        overrides = Workflow.objects.filter(retention_days__gt=0).values_list('retention_days', flat=True).distinct()
+        for days in overrides:
+            policies |= Q(
+                workflow__retention_days=days,
+                started_at__lt=min(self._cutoff(days), rolled_up_until)
+            )
+        
+        if not policies:
+            return WorkflowRun.objects.none()
+        return WorkflowRun.objects.filter(policies, status__in=self.FINISHED_STATUSES)
+    
+    def count(self) -> Dict[str, Any]:
+        """Runs and steps the next prune() would remove, after the rollup it
+        does first: counted against the watermark that rollup would reach"""
+        pending = MetricsRollup().pending_days()
+        watermark = pending[-1] if pending else RollupWatermark.rolled_up_through_date()
+        expired = self.expired_runs(watermark)
+        return {
+            'runs': expired.count(),
+            'steps': StepRun.objects.filter(run__in=expired.values('run_id')).count(),
+            'days_to_roll_up': len(pending),
+            'watermark': watermark,
+        }
+    
+    def prune(self) -> Dict[str, Any]:
+        """Roll up, archive and delete every expired run"""
+        report = {
+            'days_rolled_up': len(MetricsRollup().run()),
+            'runs': 0,
+            'steps': 0,
+            'payload_bytes': 0,
+            'archive': None,
+            'archive_bytes': 0,
+            'dedup_keys': purge_expired_keys(),
+            'watermark': RollupWatermark.rolled_up_through_date(),
+        }
+        
+        expired = self.expired_runs().order_by('started_at', 'run_id')
+        archive = None
+        try:
+            while True:
+                # Deleted rows drop out of the query, so the next batch is
+                # always the oldest remaining one
+                batch = list(expired.values_list('run_id', 'started_at')[:self.batch_size])
+                if not batch:
+                    break
+                run_ids = [run_id for run_id, _ in batch]
+                
+                if archive is None:
+                    archive = self._open_archive()
+                    report['archive'] = archive.name
+                report['payload_bytes'] += self._archive_batch(archive, run_ids)
+                
+                with transaction.atomic():
+                    report['steps'] += StepRun.objects.filter(run_id__in=run_ids).delete()[0]
+                    report['runs'] += WorkflowRun.objects.filter(run_id__in=run_ids).delete()[0]
+                    RollupWatermark.advance(RollupWatermark.PRUNED, timezone.localdate(batch[-1][1]))
+                
+                time.sleep(self.pause)
+        finally:
+            if archive is not None:
+                archive.close()
+        
+        if report['archive']:
+            report['archive_bytes'] = os.path.getsize(report['archive'])
+        return report
+    
+    def vacuum(self) -> Optional[int]:
+        """Give the pages freed by deletes back to the filesystem (SQLite only).
+        
+        Returns the bytes the database file shrank by, or None on other
+        databases. VACUUM rewrites the whole file and blocks writers while
+        it runs, so it is left to an explicit `prune_runs --vacuum`.
+        """
+        if connection.vendor != 'sqlite':
+            return None
+        with connection.cursor() as cursor:
+            before = self._sqlite_size(cursor)
+            cursor.execute('VACUUM')
+            return before - self._sqlite_size(cursor)
+    
+    def _sqlite_size(self, cursor) -> int:
+        cursor.execute('PRAGMA page_count')
+        pages = cursor.fetchone()[0]
+        cursor.execute('PRAGMA page_size')
+        return pages * cursor.fetchone()[0]
+    
+    def _cutoff(self, days: int):
+        # Keep today plus `days` whole days before it
+        return day_start(timezone.localdate() - timedelta(days=days))
+    
+    def _open_archive(self) -> gzip.GzipFile:
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        name = f"runs-{timezone.now().strftime('%Y%m%dT%H%M%S')}.jsonl.gz"
+        return gzip.open(self.archive_dir / name, 'wb')
+    
+    def _archive_batch(self, archive: gzip.GzipFile, run_ids: List[str]) -> int:
+        """Append one line per run (steps nested) and sync it; returns the uncompressed bytes"""
+        steps = defaultdict(list)
+        for step in StepRun.objects.filter(run_id__in=run_ids).order_by('run_id', 'order').values():
+            steps[step['run_id']].append(step)
+        
+        written = 0
+        for run in WorkflowRun.objects.filter(run_id__in=run_ids).order_by('started_at', 'run_id').values():
+            line = json.dumps({**run, 'step_runs': steps[run['run_id']]}, cls=DjangoJSONEncoder).encode() + b'\n'
+            archive.write(line)
+            written += len(line)
+        
+        # The rows are deleted right after; make sure they are on disk first
+        archive.flush()
+        os.fsync(archive.fileno())
+        return written
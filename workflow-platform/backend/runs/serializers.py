@@ -8,7 +8,9 @@ class StepRunSerializer(serializers.ModelSerializer):
         fields = [
             'step_id', 'step_name', 'order', 'status',
             'started_at', 'completed_at', 'duration_ms',
-            'input_data', 'output_data', 'error_message'
+            'input_data', 'output_data', 'error_message', 'error_category',
+            'app_type', 'host', 'http_status', 'ttfb_ms', 'request_ms',
+            'retries', 'response_bytes', 'cache_status', 'attempts', 'attempt_log'
         ]
 
 class WorkflowRunSerializer(serializers.ModelSerializer):
@@ -21,5 +23,25 @@ class WorkflowRunSerializer(serializers.ModelSerializer):
         fields = [
             'run_id', 'workflow_id', 'workflow_name', 'status',
             'inputs', 'started_at', 'completed_at', 'duration_ms',
-            'error_message', 'step_runs'
-        ]
\ No newline at end of file
+            'error_message', 'error_category', 'step_runs'
+        ]
+
+class WorkflowRunListSerializer(serializers.ModelSerializer):
+    """Runs list row: the run without its inputs and step payloads"""
+    workflow_name = serializers.CharField(source='workflow.name', read_only=True)
+    workflow_id = serializers.CharField(read_only=True)
+    
+    class Meta:
+        model = WorkflowRun
+        fields = [
+            'run_id', 'workflow_id', 'workflow_name', 'status',
+            'started_at', 'completed_at', 'duration_ms',
+            'error_message', 'error_category'
+        ]
+
+class WorkflowRunExpandedListSerializer(WorkflowRunListSerializer):
+    """Runs list row with its steps, for ?expand=steps"""
+    step_runs = StepRunSerializer(many=True, read_only=True)
+    
+    class Meta(WorkflowRunListSerializer.Meta):
+        fields = WorkflowRunListSerializer.Meta.fields + ['step_runs']
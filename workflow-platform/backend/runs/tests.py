@@ -1,3 +1,261 @@
-from django.test import TestCase
+# runs/tests.py
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from integrations.cache import integration_cache
+from integrations.models import Integration
+from integrations.services import circuit
+from utils import run_queue
+from utils.executor import WorkflowExecutor
+from workflows.models import Workflow, WorkflowStep
+from .dedup import trigger_once
+from .models import TriggerDedupKey, WorkflowRun, StepRun
+from .retention import RunPruner
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+import builtins
+import tempfile
+import time
 
-# Create your tests here.
+def create_slack_workflow(**step_fields) -> Workflow:
+    """Enabled workflow with one Slack step, and a linked Slack integration"""
+    Integration.objects.create(app_type='slack', label='Slack', api_key='xoxb-test')
+    workflow = Workflow.objects.create(name='Notify', enabled=True)
+    WorkflowStep.objects.create(
+        workflow=workflow,
+        order=0,
+        action_type='slack_send_message',
+        app_id='slack',
+        config={'channel': '#general', 'message': 'hi'},
+        **step_fields
+    )
+    return workflow
+
+@override_settings(INTEGRATION_RATE_LIMITS={})
+class StepRetryTest(TestCase):
+    """Which retry policy a failed step gets, and what retrying it blocks"""
+    
+    def setUp(self):
+        integration_cache.clear()
+        circuit._breakers.clear()
+        self.addCleanup(circuit._breakers.clear)
+    
+    def open_circuit(self):
+        breaker = circuit.get_breaker('slack', 'slack.com', 'xoxb-test')
+        breaker.state, breaker.opened_at = circuit.OPEN, time.monotonic()
+    
+    def test_sync_executor_fails_fast(self):
+        workflow = create_slack_workflow(retry_policy={'max_attempts': 5, 'retry_on': ['circuit_open']})
+        self.open_circuit()
+        
+        with mock.patch('requests.Session.request') as request, mock.patch('utils.executor.time.sleep') as sleep:
+            started = time.monotonic()
+            run = WorkflowExecutor(workflow).execute({})
+        
+        self.assertLess(time.monotonic() - started, 5)
+        sleep.assert_not_called()
+        request.assert_not_called()
+        self.assertEqual(run.status, 'failed')
+        step_run = run.step_runs.get()
+        self.assertEqual(step_run.attempts, 1)
+        self.assertEqual(step_run.attempt_log[0]['failure'], 'circuit_open')
+        self.assertNotIn('retry_in_ms', step_run.attempt_log[0])
+    
+    @override_settings(WORKFLOW_STEP_RETRY_POLICIES={
+        'default': {'max_attempts': 1},
+        'slack': {'max_attempts': 3, 'backoff_base': 0, 'jitter': False, 'retry_on': ['other']},
+    })
+    def test_app_policy_applies_when_the_service_fails_to_build(self):
+        workflow = create_slack_workflow()
+        # No linked integration, so the step fails before any service exists
+        Integration.objects.update(linked=False)
+        
+        run = WorkflowExecutor(workflow).execute({})
+        
+        step_run = run.step_runs.get()
+        self.assertEqual(run.status, 'failed')
+        self.assertEqual(step_run.attempts, 3)
+        self.assertEqual({entry['failure'] for entry in step_run.attempt_log}, {'other'})
+
+class RunQueueTest(TestCase):
+    """Claiming queued runs, renewing their lease and reaping expired ones"""
+    
+    def setUp(self):
+        self.workflow = Workflow.objects.create(name='Queued', enabled=True)
+    
+    def enqueue(self, count: int):
+        return [WorkflowExecutor(self.workflow).create_run({}, 'pending').run_id for _ in range(count)]
+    
+    def running_run(self, heartbeat_age: timedelta = None) -> WorkflowRun:
+        run = WorkflowExecutor(self.workflow).create_run({}, 'running')
+        if heartbeat_age is not None:
+            WorkflowRun.objects.filter(pk=run.pk).update(heartbeat_at=timezone.now() - heartbeat_age)
+        return run
+    
+    def test_each_run_is_claimed_once(self):
+        run_ids = self.enqueue(3)
+        claimed = [run_queue.claim_next_run() for _ in range(4)]
+        
+        self.assertIsNone(claimed[-1])
+        self.assertCountEqual([run.run_id for run in claimed[:-1]], run_ids)
+        for run in claimed[:-1]:
+            self.assertEqual(run.status, 'running')
+            self.assertIsNotNone(run.heartbeat_at)
+    
+    def test_worker_losing_the_race_takes_the_next_run(self):
+        run_ids = self.enqueue(2)
+        rival = []
+        
+        # Another worker claims the queue head between this worker reading
+        # the candidates and trying to flip the first one
+        def list_then_race(candidates):
+            candidates = builtins.list(candidates)
+            if not rival:
+                rival.append(None)
+                with mock.patch('utils.run_queue.list', builtins.list, create=True):
+                    rival[0] = run_queue._claim_compare_and_swap()
+            return candidates
+        
+        with mock.patch('utils.run_queue.list', list_then_race, create=True):
+            claimed = run_queue._claim_compare_and_swap()
+        
+        self.assertEqual(rival[0].run_id, run_ids[0])
+        self.assertEqual(claimed.run_id, run_ids[1])
+        self.assertEqual(WorkflowRun.objects.filter(status='running').count(), 2)
+    
+    def test_heartbeat_renews_the_lease(self):
+        run = self.running_run(heartbeat_age=timedelta(minutes=2))
+        other = self.running_run(heartbeat_age=timedelta(minutes=2))
+        
+        heartbeat = run_queue.RunHeartbeat()
+        heartbeat.add(run.run_id)
+        heartbeat.beat()
+        
+        run.refresh_from_db()
+        other.refresh_from_db()
+        self.assertGreater(run.heartbeat_at, timezone.now() - timedelta(seconds=5))
+        self.assertLess(other.heartbeat_at, timezone.now() - timedelta(minutes=1))
+    
+    @override_settings(WORKFLOW_RUN_LEASE_SECONDS=60)
+    def test_expired_leases_are_reaped(self):
+        expired = self.running_run(heartbeat_age=timedelta(minutes=5))
+        StepRun.objects.create(run=expired, step_name='Slack: Send Message', status='running')
+        alive = self.running_run(heartbeat_age=timedelta(seconds=10))
+        inline = self.running_run()
+        
+        self.assertEqual(run_queue.reap_expired_runs(), [expired.run_id])
+        self.assertEqual(run_queue.reap_expired_runs(), [])
+        
+        expired.refresh_from_db()
+        self.assertEqual(expired.status, 'failed')
+        self.assertEqual(expired.step_runs.get().status, 'failed')
+        self.assertEqual(WorkflowRun.objects.get(pk=alive.pk).status, 'running')
+        self.assertEqual(WorkflowRun.objects.get(pk=inline.pk).status, 'running')
+    
+    @override_settings(WORKFLOW_RUN_LEASE_SECONDS=60, WORKFLOW_RUN_COUNTER_FLUSH_MS=0)
+    def test_late_worker_does_not_resurrect_a_reaped_run(self):
+        run = self.running_run(heartbeat_age=timedelta(minutes=5))
+        run_queue.reap_expired_runs()
+        
+        # The worker only now gets to finish it
+        run = WorkflowExecutor(self.workflow).execute_run(run)
+        
+        self.assertEqual(run.status, 'failed')
+        run.refresh_from_db()
+        self.assertEqual(run.status, 'failed')
+        self.assertEqual(run.error_message, 'Worker stopped while executing the run')
+        self.workflow.refresh_from_db()
+        self.assertEqual(self.workflow.total_runs, 0)
+
+@override_settings(WORKFLOW_TRIGGER_MODE='queue', WEBHOOK_DEDUP_WINDOW_SECONDS=3600)
+class TriggerDedupTest(TestCase):
+    """A repeated idempotency key gets the original run instead of a new one"""
+    
+    def setUp(self):
+        self.workflow = Workflow.objects.create(name='Webhook', enabled=True)
+        self.client = APIClient()
+    
+    def trigger(self, key: str):
+        return self.client.post(
+            f'/api/workflows/{self.workflow.id}/trigger/', {'event': 'push'}, format='json', HTTP_IDEMPOTENCY_KEY=key
+        )
+    
+    def test_duplicate_within_the_window_returns_the_original_run(self):
+        first = self.trigger('delivery-1')
+        second = self.trigger('delivery-1')
+        
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(second.status_code, 200)
+        self.assertTrue(second.json()['duplicate'])
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.json()['run_id'], first.json()['run_id'])
+        self.assertEqual(WorkflowRun.objects.count(), 1)
+        
+        # Other keys are not affected
+        self.assertNotEqual(self.trigger('delivery-2').json()['run_id'], first.json()['run_id'])
+    
+    def test_key_outside_the_window_creates_a_new_run(self):
+        first = self.trigger('delivery-1')
+        TriggerDedupKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        
+        second = self.trigger('delivery-1')
+        
+        self.assertEqual(second.status_code, 202)
+        self.assertNotIn('duplicate', second.json())
+        self.assertNotEqual(second.json()['run_id'], first.json()['run_id'])
+        self.assertEqual(WorkflowRun.objects.count(), 2)
+        # The expired key was replaced, not kept next to the new one
+        self.assertEqual(TriggerDedupKey.objects.get().run.run_id, second.json()['run_id'])
+    
+    def test_concurrent_triggers_create_one_run(self):
+        executor = WorkflowExecutor(self.workflow)
+        create_run = lambda: executor.create_run({'event': 'push'}, 'pending')
+        rival = []
+        now = timezone.now
+        
+        # Another request with the same key gets in and commits after this
+        # one started but before it claims the key
+        def now_then_race():
+            if not rival:
+                rival.append(None)
+                rival[0] = trigger_once(self.workflow, 'delivery-1', create_run)
+            return now()
+        
+        with mock.patch('runs.dedup.timezone.now', now_then_race):
+            run, duplicate = trigger_once(self.workflow, 'delivery-1', create_run)
+        
+        self.assertEqual(rival[0][1], False)
+        self.assertTrue(duplicate)
+        self.assertEqual(run.run_id, rival[0][0].run_id)
+        self.assertEqual(WorkflowRun.objects.count(), 1)
+
+@override_settings(RUNS_RETENTION_DAYS=3)
+class PruneDryRunTest(TestCase):
+    """The dry run counts what prune() removes, rollup included"""
+    
+    def setUp(self):
+        workflow = Workflow.objects.create(name='Old runs', enabled=True)
+        for days_ago in (10, 9, 8, 1):
+            run = WorkflowRun.objects.create(workflow=workflow, status='success', duration_ms=100)
+            started_at = timezone.now() - timedelta(days=days_ago)
+            WorkflowRun.objects.filter(pk=run.pk).update(started_at=started_at)
+            StepRun.objects.create(run=run, step_name='Slack: Send Message', status='success', started_at=started_at)
+        self.pruner = RunPruner(archive_dir=tempfile.mkdtemp(), pause_ms=0)
+    
+    def test_count_matches_prune_before_the_first_rollup(self):
+        counts = self.pruner.count()
+        self.assertEqual(counts['days_to_roll_up'], 10)
+        self.assertEqual(counts['watermark'], timezone.localdate() - timedelta(days=1))
+        
+        report = self.pruner.prune()
+        self.assertEqual((counts['runs'], counts['steps']), (report['runs'], report['steps']))
+        self.assertEqual(report['runs'], 3)
+    
+    def test_command_states_the_watermark(self):
+        out = StringIO()
+        call_command('prune_runs', '--dry-run', stdout=out)
+        yesterday = timezone.localdate() - timedelta(days=1)
+        self.assertIn(f'rollup watermark {yesterday}', out.getvalue())
+        self.assertIn('Would prune 3 run(s) and 3 step(s)', out.getvalue())
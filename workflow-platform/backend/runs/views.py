@@ -1,15 +1,35 @@
 # runs/views.py
-from rest_framework import viewsets, filters
+from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import WorkflowRun
-from .serializers import WorkflowRunSerializer
+from .pagination import RunKeysetPagination
+from .serializers import WorkflowRunSerializer, WorkflowRunListSerializer, WorkflowRunExpandedListSerializer
 from django_filters.rest_framework import DjangoFilterBackend
 
 class WorkflowRunViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = WorkflowRun.objects.all().prefetch_related('step_runs')
+    """Runs, newest first.
+    
+    The list is keyset-paginated (see RunKeysetPagination) and leaves out
+    run inputs and steps; `?expand=steps` adds the steps. The detail
+    endpoint returns the full run with its steps.
+    """
+    queryset = WorkflowRun.objects.select_related('workflow')
     serializer_class = WorkflowRunSerializer
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    pagination_class = RunKeysetPagination
+    filter_backends = [DjangoFilterBackend]
     filterset_fields = ['status', 'workflow']
-    ordering_fields = ['started_at', 'duration_ms']
-    ordering = ['-started_at']
\ No newline at end of file
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list' and not self._expand_steps():
+            return queryset.defer('inputs')
+        return queryset.prefetch_related('step_runs')
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return WorkflowRunExpandedListSerializer if self._expand_steps() else WorkflowRunListSerializer
+        return super().get_serializer_class()
+    
+    def _expand_steps(self) -> bool:
+        return 'steps' in self.request.query_params.get('expand', '').split(',')
@@ -1,14 +1,29 @@
 # utils/executor.py
+from analytics.cache import analytics_cache
+from integrations.cache import integration_cache
 from integrations.models import Integration
 from integrations.services.slack import SlackIntegration
 from integrations.services.notion import NotionIntegration
 from integrations.services.trello import TrelloIntegration
 from integrations.services.google_calendar import GoogleCalendarIntegration
+from runs.errors import OTHER, categorize_exception, categorize_result
 from runs.models import WorkflowRun, StepRun
+from runs.recorder import RunRecorder
+from utils.graph import check_dependencies, step_dependencies
+from utils.retries import CIRCUIT_OPEN, RetryPolicy, failure_class, retry_scheduler
+from workflows.counters import run_counters
+from asgiref.sync import sync_to_async
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from django.conf import settings
+from django.db import connection, transaction
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Set, Tuple
+import asyncio
+import logging
 import time
 
+logger = logging.getLogger(__name__)
+
 class WorkflowExecutor:
     SERVICE_MAP = {
         'slack': SlackIntegration,
@@ -20,140 +35,465 @@ class WorkflowExecutor:
     def __init__(self, workflow):
         self.workflow = workflow
     
+    def enqueue(self, inputs: Dict[str, Any]) -> WorkflowRun:
+        """Queue a pending run for the worker pool to pick up"""
+        return self.create_run(inputs, 'pending')
+    
     def execute(self, inputs: Dict[str, Any]) -> WorkflowRun:
-        """Execute the workflow"""
-        # Create run record
-        run = WorkflowRun.objects.create(
+        """Execute the workflow inline"""
+        return self.execute_run(self.create_run(inputs, 'running'))
+    
+    def create_run(self, inputs: Dict[str, Any], status: str) -> WorkflowRun:
+        """Run record of a trigger: 'pending' for the queue, 'running' to execute inline"""
+        return WorkflowRun.objects.create(
             workflow=self.workflow,
-            status='running',
+            status=status,
             inputs=inputs
         )
-        
+    
+    def execute_run(self, run: WorkflowRun) -> WorkflowRun:
+        """Execute an already claimed run"""
         start_time = time.time()
-        context = {'trigger': inputs}
+        context = {'trigger': run.inputs}
+        recorder = RunRecorder(run)
         
         try:
-            # Execute each step in order
-            for step in self.workflow.steps.all():
-                step_result = self._execute_step(run, step, context)
-                
-                if not step_result['success']:
-                    # Step failed
-                    run.status = 'failed'
-                    run.error_message = step_result.get('error', 'Step execution failed')
-                    break
-                
-                # Add step output to context for next steps
-                context[f'step_{step.order}'] = step_result.get('data', {})
-            else:
-                # All steps succeeded
-                run.status = 'success'
+            steps = list(self.workflow.steps.all())
             
-            # Update run duration
-            end_time = time.time()
-            run.duration_ms = int((end_time - start_time) * 1000)
-            run.completed_at = datetime.now()
-            run.save()
-            
-            # Update workflow stats
-            self.workflow.total_runs += 1
-            self.workflow.last_run = run.started_at
-            self.workflow.save()
+            if self.workflow.execution_mode == 'parallel':
+                failed_result = self._execute_graph(recorder, steps, context)
+            else:
+                failed_result = self._execute_sequence(recorder, steps, context)
             
+            self._complete_run(recorder, start_time, failed_result)
             return run
-            
+        
         except Exception as e:
-            run.status = 'failed'
-            run.error_message = str(e)
-            run.duration_ms = int((time.time() - start_time) * 1000)
-            run.completed_at = datetime.now()
-            run.save()
+            self._abort_run(recorder, start_time, e)
             return run
     
-    def _execute_step(
-        self,
-        run: WorkflowRun,
-        step,
-        context: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """Execute a single workflow step"""
-        step_run = StepRun.objects.create(
-            run=run,
-            step_name=step.get_action_type_display(),
-            order=step.order,
-            status='running',
-            input_data=step.config
-        )
+    async def execute_run_async(self, run: WorkflowRun) -> WorkflowRun:
+        """Execute an already claimed run on the event loop.
         
+        Integration calls are awaited on the shared async HTTP client; the
+        database bookkeeping around them runs through sync_to_async.
+        """
         start_time = time.time()
+        context = {'trigger': run.inputs}
+        recorder = RunRecorder(run)
         
         try:
-            # Get integration
-            integration = Integration.objects.get(
-                app_type=step.app_id,
-                linked=True
-            )
+            steps = await sync_to_async(list)(self.workflow.steps.all())
             
-            # Get service class
-            service_class = self.SERVICE_MAP.get(step.app_id)
-            if not service_class:
-                raise ValueError(f"Unknown app: {step.app_id}")
-            
-            # Initialize service
-            if step.app_id == 'trello':
-                service = service_class(integration.api_key, integration.api_secret)
+            if self.workflow.execution_mode == 'parallel':
+                failed_result = await self._execute_graph_async(recorder, steps, context)
             else:
-                service = service_class(integration.api_key)
+                failed_result = await self._execute_sequence_async(recorder, steps, context)
             
-            # Parse action from action_type
-            action = step.action_type.split('_', 1)[1] if '_' in step.action_type else step.action_type
+            await sync_to_async(self._complete_run)(recorder, start_time, failed_result)
+            return run
+        
+        except Exception as e:
+            await sync_to_async(self._abort_run)(recorder, start_time, e)
+            return run
+    
+    def _complete_run(self, recorder: RunRecorder, start_time: float, failed_result: Optional[Dict[str, Any]]):
+        run = recorder.run
+        if failed_result is not None:
+            # Step failed
+            run.status = 'failed'
+            run.error_message = failed_result.get('error', 'Step execution failed')
+            # The failing step's category, so the run is counted by its cause
+            run.error_category = failed_result.get('error_category', OTHER)
+        else:
+            # All steps succeeded
+            run.status = 'success'
+        
+        # Update run duration
+        end_time = time.time()
+        run.duration_ms = int((end_time - start_time) * 1000)
+        run.completed_at = datetime.now()
+        
+        # Step rows, the run and the workflow stats go out in one transaction
+        # (unless the stats are buffered, see WORKFLOW_RUN_COUNTER_FLUSH_MS)
+        with transaction.atomic():
+            recorder.flush()
+            if not self._save_outcome(run):
+                return
             
-            # Replace template variables in config
-            params = self._replace_variables(step.config, context)
+            # Update workflow stats
+            run_counters.record(self.workflow.pk, run.started_at)
+            transaction.on_commit(analytics_cache.invalidate)
+    
+    def _abort_run(self, recorder: RunRecorder, start_time: float, error: Exception):
+        run = recorder.run
+        run.status = 'failed'
+        run.error_message = str(error)
+        run.error_category = categorize_exception(error)
+        run.duration_ms = int((time.time() - start_time) * 1000)
+        run.completed_at = datetime.now()
+        with transaction.atomic():
+            recorder.flush()
+            if self._save_outcome(run):
+                transaction.on_commit(analytics_cache.invalidate)
+    
+    def _save_outcome(self, run: WorkflowRun) -> bool:
+        """Write the run's outcome if it is still running. A run whose lease
+        expired has been failed by reap_expired_runs (utils/run_queue.py) and
+        keeps that; returns False then."""
+        finished = WorkflowRun.objects.filter(pk=run.pk, status='running').update(
+            status=run.status,
+            error_message=run.error_message,
+            error_category=run.error_category,
+            duration_ms=run.duration_ms,
+            completed_at=run.completed_at
+        )
+        if not finished:
+            logger.warning("Run %s finished after it was failed for losing its worker", run.run_id)
+            run.refresh_from_db()
+        return bool(finished)
+    
+    def _execute_sequence(self, recorder: RunRecorder, steps, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Run steps one after another by order. Returns the failing step result, if any."""
+        for step in steps:
+            step_result = self._execute_step(recorder, step, context)
             
-            # Execute action
-            result = service.execute_action(action, params)
+            if not step_result['success']:
+                return step_result
             
-            # Update step run
-            step_run.status = 'success' if result.get('success') else 'failed'
-            step_run.output_data = result
-            step_run.duration_ms = int((time.time() - start_time) * 1000)
-            step_run.completed_at = datetime.now()
+            # Add step output to context for next steps
+            context[f'step_{step.order}'] = step_result.get('data', {})
+        
+        return None
+    
+    async def _execute_sequence_async(self, recorder: RunRecorder, steps, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        for step in steps:
+            step_result = await self._execute_step_async(recorder, step, context)
             
-            if not result.get('success'):
-                step_run.error_message = result.get('error', 'Unknown error')
+            if not step_result['success']:
+                return step_result
             
-            step_run.save()
+            context[f'step_{step.order}'] = step_result.get('data', {})
+        
+        return None
+    
+    def _execute_graph(self, recorder: RunRecorder, steps, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Run steps as soon as their dependencies are done, independent branches in parallel.
+        
+        Each step only sees the trigger and the outputs of the steps it
+        (transitively) depends on, so its rendered config does not depend on
+        thread timing. Once a step fails no new steps are started; steps
+        already in flight are allowed to finish.
+        """
+        graph = self._plan_graph(steps)
+        in_flight = {}
+        
+        with ThreadPoolExecutor(max_workers=graph['max_parallel']) as pool:
+            while graph['pending'] or in_flight:
+                for index in self._ready_steps(graph, len(in_flight)):
+                    step_context = self._graph_step_context(graph, steps, index, context)
+                    future = pool.submit(self._execute_step_in_thread, recorder, steps[index], step_context)
+                    in_flight[future] = index
+                
+                if not in_flight:
+                    break
+                
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = in_flight.pop(future)
+                    self._record_graph_result(graph, steps, index, future.result(), context)
+        
+        return self._graph_failure(graph)
+    
+    async def _execute_graph_async(self, recorder: RunRecorder, steps, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Same scheduling as _execute_graph, with tasks instead of threads"""
+        graph = self._plan_graph(steps)
+        in_flight = {}
+        
+        while graph['pending'] or in_flight:
+            for index in self._ready_steps(graph, len(in_flight)):
+                step_context = self._graph_step_context(graph, steps, index, context)
+                task = asyncio.ensure_future(self._execute_step_async(recorder, steps[index], step_context))
+                in_flight[task] = index
+            
+            if not in_flight:
+                break
             
-            return {
-                'success': result.get('success', False),
-                'data': result,
-                'error': result.get('error')
-            }
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = in_flight.pop(task)
+                self._record_graph_result(graph, steps, index, task.result(), context)
+        
+        return self._graph_failure(graph)
+    
+    def _plan_graph(self, steps) -> Dict[str, Any]:
+        dependencies = self._build_dependency_graph(steps)
+        return {
+            'ancestors': self._collect_ancestors(dependencies),
+            'pending': {index: set(deps) for index, deps in dependencies.items()},
+            'failures': {},
+            'max_parallel': max(1, min(settings.WORKFLOW_STEP_MAX_PARALLELISM, len(steps))),
+        }
+    
+    def _ready_steps(self, graph: Dict[str, Any], running: int) -> List[int]:
+        """Pop the steps whose dependencies are all done, up to the parallelism cap"""
+        if graph['failures']:
+            return []
+        
+        slots = graph['max_parallel'] - running
+        ready = sorted(index for index, deps in graph['pending'].items() if not deps)[:slots]
+        for index in ready:
+            del graph['pending'][index]
+        return ready
+    
+    def _graph_step_context(self, graph: Dict[str, Any], steps, index: int, context: Dict[str, Any]) -> Dict[str, Any]:
+        step_context = {'trigger': context['trigger']}
+        for ancestor in sorted(graph['ancestors'][index]):
+            key = f'step_{steps[ancestor].order}'
+            step_context[key] = context[key]
+        return step_context
+    
+    def _record_graph_result(self, graph: Dict[str, Any], steps, index: int, step_result: Dict[str, Any], context: Dict[str, Any]):
+        if not step_result['success']:
+            graph['failures'][index] = step_result
+            return
+        
+        context[f'step_{steps[index].order}'] = step_result.get('data', {})
+        for deps in graph['pending'].values():
+            deps.discard(index)
+    
+    def _graph_failure(self, graph: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        failures = graph['failures']
+        if failures:
+            # Report the first failing step by position, not by finish time
+            return failures[min(failures)]
+        return None
+    
+    def _execute_step_in_thread(self, recorder: RunRecorder, step, context: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            return self._execute_step(recorder, step, context)
+        finally:
+            # Pool threads get their own connection; don't leak it
+            connection.close()
+    
+    def _build_dependency_graph(self, steps) -> Dict[int, Set[int]]:
+        """Map each step's position to the positions of the steps it needs.
+        
+        Edges come from {{step_N.*}} references anywhere in the step config
+        and from the explicit depends_on list, both keyed by step order.
+        Graphs the serializers would reject (unknown steps, self-dependencies,
+        cycles) fail the run up front rather than deadlocking halfway through.
+        """
+        positions_by_order = {}
+        for index, step in enumerate(steps):
+            positions_by_order.setdefault(step.order, []).append(index)
+        
+        needs = [step_dependencies(step.depends_on, step.compiled_config.references) for step in steps]
+        check_dependencies(zip((step.order for step in steps), needs))
+        
+        return {
+            index: {position for order in orders for position in positions_by_order[order]}
+            for index, orders in enumerate(needs)
+        }
+    
+    def _collect_ancestors(self, graph: Dict[int, Set[int]]) -> Dict[int, Set[int]]:
+        ancestors = {}
+        
+        def visit(index):
+            if index not in ancestors:
+                found = set()
+                for dep in graph[index]:
+                    found.add(dep)
+                    found |= visit(dep)
+                ancestors[index] = found
+            return ancestors[index]
+        
+        for index in graph:
+            visit(index)
+        return ancestors
+    
+    def _execute_step(
+        self,
+        recorder: RunRecorder,
+        step,
+        context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Execute a single workflow step, retrying under its retry policy"""
+        step_run = self._start_step(recorder, step)
+        start_time = time.time()
+        
+        attempt = 0
+        while True:
+            attempt += 1
+            service, result, error, attempt_start = self._attempt_step(step, context)
+            delay = self._retry_delay(step_run, step, service, attempt, attempt_start, result, error, defer_open_circuit=False)
+            if delay is None:
+                break
+            # Sync workers have nothing else to do meanwhile
+            time.sleep(delay)
+        
+        if error is not None:
+            return self._fail_step(recorder, step_run, start_time, error)
+        return self._finish_step(recorder, step_run, start_time, result)
+    
+    async def _execute_step_async(
+        self,
+        recorder: RunRecorder,
+        step,
+        context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        step_run = await sync_to_async(self._start_step)(recorder, step)
+        start_time = time.time()
+        
+        attempt = 0
+        while True:
+            attempt += 1
+            service, result, error, attempt_start = await self._attempt_step_async(step, context)
+            delay = self._retry_delay(step_run, step, service, attempt, attempt_start, result, error)
+            if delay is None:
+                break
+            # Park on a loop timer; the worker keeps serving other runs
+            await retry_scheduler.wait(recorder.run.run_id, delay)
+        
+        if error is not None:
+            return await sync_to_async(self._fail_step)(recorder, step_run, start_time, error)
+        return await sync_to_async(self._finish_step)(recorder, step_run, start_time, result)
+    
+    def _attempt_step(self, step, context: Dict[str, Any]) -> Tuple[Any, Optional[Dict[str, Any]], Optional[Exception], float]:
+        """Run one attempt of a step: (service, result, exception raised, start time)"""
+        service = None
+        attempt_start = time.time()
+        try:
+            service, action, params = self._prepare_step(step, context)
             
+            # Execute action
+            return service, service.execute_action(action, params), None, attempt_start
         except Exception as e:
-            step_run.status = 'failed'
-            step_run.error_message = str(e)
-            step_run.duration_ms = int((time.time() - start_time) * 1000)
-            step_run.completed_at = datetime.now()
-            step_run.save()
+            return service, None, e, attempt_start
+    
+    async def _attempt_step_async(self, step, context: Dict[str, Any]) -> Tuple[Any, Optional[Dict[str, Any]], Optional[Exception], float]:
+        service = None
+        attempt_start = time.time()
+        try:
+            service, action, params = await sync_to_async(self._prepare_step)(step, context)
             
-            return {
-                'success': False,
-                'error': str(e)
-            }
-    
-    def _replace_variables(self, config: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
-        """Replace template variables like {{trigger.title}} with actual values"""
-        result = {}
-        for key, value in config.items():
-            if isinstance(value, str) and '{{' in value:
-                # Simple template replacement
-                for ctx_key, ctx_value in context.items():
-                    if isinstance(ctx_value, dict):
-                        for sub_key, sub_value in ctx_value.items():
-                            template = f"{{{{{ctx_key}.{sub_key}}}}}"
-                            if template in value:
-                                value = value.replace(template, str(sub_value))
-            result[key] = value
-        return result
\ No newline at end of file
+            return service, await service.execute_action_async(action, params), None, attempt_start
+        except Exception as e:
+            return service, None, e, attempt_start
+    
+    def _retry_delay(
+        self,
+        step_run: StepRun,
+        step,
+        service,
+        attempt: int,
+        attempt_start: float,
+        result: Optional[Dict[str, Any]],
+        error: Optional[Exception],
+        defer_open_circuit: bool = True
+    ) -> Optional[float]:
+        """Log a finished attempt on the step run; seconds to wait before the
+        next one, or None when this attempt is the step's outcome.
+        
+        Steps failed fast by an open circuit are only retried when the wait
+        doesn't block (defer_open_circuit, the async path): sleeping until
+        the circuit lets probes through would tie up the worker or graph
+        thread the breaker is there to free.
+        """
+        call = (result or {}).get('call') or getattr(error, 'call_metadata', None) or {}
+        success = error is None and bool(result.get('success'))
+        entry = {
+            'attempt': attempt,
+            'success': success,
+            'duration_ms': int((time.time() - attempt_start) * 1000),
+            'http_status': call.get('http_status'),
+        }
+        step_run.attempts = attempt
+        step_run.attempt_log.append(entry)
+        if success:
+            return None
+        
+        failure = failure_class(result, error)
+        entry['error'] = str(error) if error is not None else result.get('error', 'Unknown error')
+        entry['failure'] = failure
+        
+        if failure == CIRCUIT_OPEN and not defer_open_circuit:
+            return None
+        # The step names its app even when its service could not be built
+        policy = RetryPolicy.for_step(step, step.app_id)
+        if not policy.should_retry(attempt, failure):
+            return None
+        # An open circuit says when it will take calls again
+        delay = max(policy.delay(attempt), (result or {}).get('retry_after') or 0)
+        entry['retry_in_ms'] = int(delay * 1000)
+        return delay
+    
+    def _start_step(self, recorder: RunRecorder, step) -> StepRun:
+        return recorder.start_step(step)
+    
+    def _prepare_step(self, step, context: Dict[str, Any]) -> Tuple[Any, str, Dict[str, Any]]:
+        """Resolve the service, action name and rendered params for a step"""
+        # Linked integration and its service, cached across steps and runs
+        service = integration_cache.get_service(step.app_id, self._build_service)
+        
+        # Parse action from action_type
+        action = step.action_type.split('_', 1)[1] if '_' in step.action_type else step.action_type
+        
+        # Fill {{...}} placeholders from the precompiled config
+        params = step.compiled_config.render(context)
+        
+        return service, action, params
+    
+    def _build_service(self, integration: Integration):
+        # Get service class
+        service_class = self.SERVICE_MAP.get(integration.app_type)
+        if not service_class:
+            raise ValueError(f"Unknown app: {integration.app_type}")
+        
+        # Initialize service
+        if integration.app_type == 'trello':
+            return service_class(integration.api_key, integration.api_secret)
+        return service_class(integration.api_key)
+    
+    def _finish_step(self, recorder: RunRecorder, step_run: StepRun, start_time: float, result: Dict[str, Any]) -> Dict[str, Any]:
+        self._record_call(step_run, result.pop('call', None))
+        
+        # Update step run
+        step_run.status = 'success' if result.get('success') else 'failed'
+        step_run.output_data = result
+        step_run.duration_ms = int((time.time() - start_time) * 1000)
+        step_run.completed_at = datetime.now()
+        
+        if not result.get('success'):
+            step_run.error_message = result.get('error', 'Unknown error')
+            step_run.error_category = categorize_result(result)
+        
+        recorder.finish_step(step_run)
+        
+        return {
+            'success': result.get('success', False),
+            'data': result,
+            'error': result.get('error'),
+            'error_category': step_run.error_category
+        }
+    
+    def _fail_step(self, recorder: RunRecorder, step_run: StepRun, start_time: float, error: Exception) -> Dict[str, Any]:
+        self._record_call(step_run, getattr(error, 'call_metadata', None))
+        step_run.status = 'failed'
+        step_run.error_message = str(error)
+        step_run.error_category = categorize_exception(error)
+        step_run.duration_ms = int((time.time() - start_time) * 1000)
+        step_run.completed_at = datetime.now()
+        recorder.finish_step(step_run)
+        
+        return {
+            'success': False,
+            'error': str(error),
+            'error_category': step_run.error_category
+        }
+    
+    def _record_call(self, step_run: StepRun, call: Optional[Dict[str, Any]]):
+        """Copy the integration's call metadata onto the step's columns"""
+        for field in StepRun.CALL_FIELDS:
+            if call and call.get(field) is not None:
+                setattr(step_run, field, call[field])
@@ -0,0 +1,50 @@
+# utils/graph.py
+from typing import Any, Dict, Iterable, Set, Tuple
+import re
+
+# Context key of a step's result, as referenced from later step configs
+STEP_REFERENCE_PATTERN = re.compile(r'step_(\d+)')
+
+class DependencyError(ValueError):
+    """A step depends on itself, on a step the workflow doesn't have, or
+    on steps that in turn depend on it"""
+
+def step_dependencies(depends_on: Iterable[Any], references: Iterable[str]) -> Set[int]:
+    """Orders of the steps one step needs: its explicit depends_on list and
+    the steps its config reads through {{step_N.*}} placeholders"""
+    orders = {int(order) for order in depends_on or []}
+    for reference in references:
+        match = STEP_REFERENCE_PATTERN.fullmatch(reference)
+        if match:
+            orders.add(int(match.group(1)))
+    return orders
+
+def check_dependencies(steps: Iterable[Tuple[int, Set[int]]]) -> Dict[int, Set[int]]:
+    """Check (order, orders it needs) pairs and return them as a graph.
+    
+    Used when steps are saved (workflows/serializers.py) and again when a
+    run plans them (utils/executor.py), so both reject the same graphs.
+    Several steps may share an order; their dependencies are merged.
+    """
+    graph: Dict[int, Set[int]] = {}
+    for order, needs in steps:
+        graph.setdefault(order, set()).update(needs)
+    
+    for order, needs in graph.items():
+        if order in needs:
+            raise DependencyError(f'Step {order} depends on itself')
+        missing = needs - graph.keys()
+        if missing:
+            raise DependencyError(f"Step {order} depends on unknown steps: {', '.join(map(str, sorted(missing)))}")
+    
+    # Peel off steps whose dependencies are all done; whatever is left is a cycle
+    remaining = {order: set(needs) for order, needs in graph.items()}
+    while remaining:
+        ready = [order for order, needs in remaining.items() if not needs]
+        if not ready:
+            raise DependencyError(f"Dependency cycle between steps {', '.join(map(str, sorted(remaining)))}")
+        for order in ready:
+            del remaining[order]
+        for needs in remaining.values():
+            needs.difference_update(ready)
+    return graph
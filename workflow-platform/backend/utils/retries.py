@@ -0,0 +1,123 @@
+# utils/retries.py
+from django.conf import settings
+from runs.errors import OTHER, TIMEOUT, categorize_exception, categorize_result
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+import asyncio
+import httpx
+import random
+import requests
+
+# Failure classes a retry policy can name in retry_on: the error categories
+# (runs/errors.py) plus these, which only matter for retrying
+SERVER_ERROR = 'server_error'
+# The connection broke after the request may have been sent
+CONNECTION = 'connection'
+# No connection could be made (refused, DNS, connect timeout): the request
+# never left, so retrying can't repeat a write
+CONNECT = 'connect'
+# Failed fast by an open circuit breaker (integrations/services/circuit.py);
+# retrying waits at least until the circuit lets probe calls through
+CIRCUIT_OPEN = 'circuit_open'
+
+def failure_class(result: Optional[Dict[str, Any]] = None, error: Optional[Exception] = None) -> str:
+    """Retry class of a failed step attempt, from its result or the exception it raised"""
+    if error is not None:
+        if _connect_failed(error):
+            return CONNECT
+        category = categorize_exception(error)
+        if category != TIMEOUT and isinstance(error, (requests.ConnectionError, httpx.TransportError)):
+            return CONNECTION
+        return category
+    
+    if result.get('error_code') == CIRCUIT_OPEN:
+        return CIRCUIT_OPEN
+    
+    category = categorize_result(result)
+    status_code = result.get('status_code')
+    if category == OTHER and status_code and status_code >= 500:
+        return SERVER_ERROR
+    return category
+
+def _connect_failed(error: Exception) -> bool:
+    if isinstance(error, (requests.ConnectTimeout, httpx.ConnectError, httpx.ConnectTimeout)):
+        return True
+    # requests raises a plain ConnectionError for refused connections and
+    # failed lookups as well as for connections dropped mid-request
+    if isinstance(error, requests.ConnectionError) and error.args:
+        reason = error.args[0]
+        if isinstance(reason, MaxRetryError):
+            reason = reason.reason
+        return isinstance(reason, NewConnectionError)
+    return False
+
+class RetryPolicy:
+    """How often a failed step is attempted again and how long to wait in between.
+    
+    Options come from WORKFLOW_STEP_RETRY_POLICIES: its 'default' entry,
+    then the entry for the step's app, then the step's own retry_policy,
+    each overriding the one before. The default only retries failures
+    where the API can't have acted on the request (rate limited, open
+    circuit, no connection), since steps may not be idempotent; apps or
+    steps that are safe to repeat opt into 'timeout', 'server_error' and
+    'connection'. Attempt n waits
+    backoff_base * 2^(n-1) seconds, capped at backoff_max; with jitter the
+    wait is drawn uniformly from [0, that] ("full jitter"), so steps that
+    failed together do not retry together.
+    """
+    
+    OPTIONS = ('max_attempts', 'backoff_base', 'backoff_max', 'jitter', 'retry_on')
+    
+    def __init__(self, max_attempts: int = 1, backoff_base: float = 1.0, backoff_max: float = 30.0, jitter: bool = True, retry_on: Iterable[str] = ()):
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff_base = max(0.0, float(backoff_base))
+        self.backoff_max = max(0.0, float(backoff_max))
+        self.jitter = bool(jitter)
+        self.retry_on = frozenset(retry_on)
+    
+    @classmethod
+    def for_step(cls, step, app_type: str = '') -> 'RetryPolicy':
+        policies = settings.WORKFLOW_STEP_RETRY_POLICIES
+        options = {
+            **policies.get('default', {}),
+            **policies.get(app_type, {}),
+            **(getattr(step, 'retry_policy', None) or {}),
+        }
+        return cls(**{name: options[name] for name in cls.OPTIONS if name in options})
+    
+    def should_retry(self, attempt: int, failure: str) -> bool:
+        return attempt < self.max_attempts and failure in self.retry_on
+    
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait after failed attempt number `attempt` (1-based)"""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+class RetryScheduler:
+    """Parks async steps until their retry is due.
+    
+    The wait is a timer on the event loop, not a sleeping thread, and runs
+    with a step parked here don't count against the async queue worker's
+    in-flight limit (see utils/run_queue.py), so it keeps claiming new
+    runs while they wait.
+    """
+    
+    def __init__(self):
+        self._parked = Counter()
+    
+    @property
+    def parked_runs(self) -> int:
+        return len(self._parked)
+    
+    async def wait(self, run_id: str, delay: float):
+        self._parked[run_id] += 1
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._parked[run_id] -= 1
+            if not self._parked[run_id]:
+                del self._parked[run_id]
+
+
+retry_scheduler = RetryScheduler()
@@ -0,0 +1,254 @@
+# utils/run_queue.py
+from analytics.cache import analytics_cache
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from runs.errors import OTHER
+from runs.models import WorkflowRun, StepRun
+from asgiref.sync import sync_to_async
+from datetime import timedelta
+from typing import List, Optional, Set
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# How many queue heads a worker tries before giving up on a poll. Workers
+# that lose the race for the oldest run move on to the next one instead of
+# spinning on the same row.
+CLAIM_BATCH_SIZE = 10
+
+
+def claim_next_run() -> Optional[WorkflowRun]:
+    """Atomically move the oldest pending run to running and return it"""
+    if connection.features.has_select_for_update_skip_locked:
+        return _claim_skip_locked()
+    return _claim_compare_and_swap()
+
+
+def _claim_skip_locked() -> Optional[WorkflowRun]:
+    # PostgreSQL/MySQL: rows locked by other workers are skipped, not waited on
+    with transaction.atomic():
+        run = (
+            WorkflowRun.objects
+            .select_for_update(skip_locked=True, of=('self',))
+            .select_related('workflow')
+            .filter(status='pending')
+            .order_by('started_at')
+            .first()
+        )
+        if run is None:
+            return None
+        
+        run.status = 'running'
+        run.heartbeat_at = timezone.now()
+        run.save(update_fields=['status', 'heartbeat_at'])
+        return run
+
+
+def _claim_compare_and_swap() -> Optional[WorkflowRun]:
+    # SQLite has no row locks. A conditional UPDATE is atomic, so only one
+    # worker can flip a given run from pending to running.
+    candidates = (
+        WorkflowRun.objects
+        .filter(status='pending')
+        .order_by('started_at')
+        .values_list('run_id', flat=True)[:CLAIM_BATCH_SIZE]
+    )
+    
+    for run_id in list(candidates):
+        claimed = WorkflowRun.objects.filter(
+            run_id=run_id,
+            status='pending'
+        ).update(status='running', heartbeat_at=timezone.now())
+        
+        if claimed:
+            return WorkflowRun.objects.select_related('workflow').get(run_id=run_id)
+    
+    return None
+
+
+def reap_expired_runs() -> List[str]:
+    """Fail runs whose worker stopped renewing their lease. Returns their ids.
+    
+    They are failed rather than re-queued: the worker may have died after
+    some of their steps had already acted. Safe to call from any number of
+    workers at once; each run is only failed once.
+    """
+    now = timezone.now()
+    expired = WorkflowRun.objects.filter(
+        status='running',
+        heartbeat_at__lt=now - timedelta(seconds=settings.WORKFLOW_RUN_LEASE_SECONDS)
+    )
+    message = 'Worker stopped while executing the run'
+    with transaction.atomic():
+        reaped = list(expired.values_list('run_id', flat=True))
+        if not reaped:
+            return []
+        expired.filter(run_id__in=reaped).update(
+            status='failed',
+            error_message=message,
+            error_category=OTHER,
+            completed_at=now
+        )
+        # Steps recorded as started (WORKFLOW_RECORD_CRASH_SAFE) never finished
+        StepRun.objects.filter(run_id__in=reaped, status='running').update(
+            status='failed',
+            error_message=message,
+            error_category=OTHER,
+            completed_at=now
+        )
+    
+    if reaped:
+        logger.warning("Failed %d run(s) whose worker stopped: %s", len(reaped), ', '.join(reaped))
+        analytics_cache.invalidate()
+    return reaped
+
+
+class RunHeartbeat:
+    """Renews the lease of the runs a worker is executing, from a thread.
+    
+    Every WORKFLOW_WORKER_HEARTBEAT_SECONDS it stamps heartbeat_at on the
+    worker's runs and reaps runs whose lease expired. Being a thread, it
+    keeps beating while the worker blocks in a long step or its event loop
+    is busy.
+    """
+    
+    def __init__(self):
+        self._runs: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='run-heartbeat', daemon=True)
+    
+    def __enter__(self) -> 'RunHeartbeat':
+        self.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.stop()
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+    
+    def add(self, run_id: str):
+        with self._lock:
+            self._runs.add(run_id)
+    
+    def discard(self, run_id: str):
+        with self._lock:
+            self._runs.discard(run_id)
+    
+    def beat(self):
+        with self._lock:
+            run_ids = list(self._runs)
+        try:
+            if run_ids:
+                WorkflowRun.objects.filter(run_id__in=run_ids, status='running').update(heartbeat_at=timezone.now())
+            reap_expired_runs()
+        except DatabaseError:
+            logger.exception("Could not renew the lease of %d run(s)", len(run_ids))
+        finally:
+            # Don't hold a connection between beats
+            connection.close()
+    
+    def _loop(self):
+        while not self._stopped.wait(settings.WORKFLOW_WORKER_HEARTBEAT_SECONDS):
+            self.beat()
+
+
+def run_worker(poll_interval: float = 1.0, burst: bool = False, stop_event=None) -> int:
+    """Claim and execute runs until stopped. Returns the number of runs processed."""
+    from utils.executor import WorkflowExecutor
+    
+    processed = 0
+    with RunHeartbeat() as heartbeat:
+        while stop_event is None or not stop_event.is_set():
+            run = claim_next_run()
+            
+            if run is None:
+                if burst:
+                    break
+                time.sleep(poll_interval)
+                continue
+            
+            heartbeat.add(run.run_id)
+            try:
+                WorkflowExecutor(run.workflow).execute_run(run)
+            except Exception:
+                # execute_run records step failures itself; this only guards the
+                # worker loop against bugs outside of it
+                logger.exception("Worker crashed while executing %s", run.run_id)
+            finally:
+                heartbeat.discard(run.run_id)
+            processed += 1
+    
+    from integrations.services.http import get_pool_stats
+    from workflows.counters import run_counters
+    run_counters.flush()
+    logger.info("Worker stopping after %d runs, HTTP pools: %s", processed, get_pool_stats())
+    return processed
+
+
+def run_async_worker(max_in_flight: int = 100, poll_interval: float = 1.0, burst: bool = False, stop_event=None) -> int:
+    """Like run_worker, but keeps up to max_in_flight runs going on one event loop"""
+    return asyncio.run(_serve_async(max_in_flight, poll_interval, burst, stop_event))
+
+
+async def _serve_async(max_in_flight: int, poll_interval: float, burst: bool, stop_event) -> int:
+    from integrations.services.http import close_async_client
+    from utils.executor import WorkflowExecutor
+    from utils.retries import retry_scheduler
+    from workflows.counters import run_counters
+    
+    claim = sync_to_async(claim_next_run)
+    in_flight = {}
+    processed = 0
+    heartbeat = RunHeartbeat()
+    heartbeat.start()
+    
+    try:
+        while True:
+            stopping = stop_event is not None and stop_event.is_set()
+            
+            # Top up to the in-flight limit; an empty claim means the queue is
+            # drained. Runs parked on a retry backoff are only waiting on a
+            # timer, so they don't count, up to another max_in_flight of them.
+            drained = False
+            while not stopping and len(in_flight) < max_in_flight + min(retry_scheduler.parked_runs, max_in_flight):
+                run = await claim()
+                if run is None:
+                    drained = True
+                    break
+                task = asyncio.ensure_future(WorkflowExecutor(run.workflow).execute_run_async(run))
+                in_flight[task] = run.run_id
+                heartbeat.add(run.run_id)
+            
+            if not in_flight:
+                if stopping or (burst and drained):
+                    break
+                await asyncio.sleep(poll_interval)
+                continue
+            
+            done, _ = await asyncio.wait(
+                in_flight,
+                timeout=poll_interval,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                run_id = in_flight.pop(task)
+                heartbeat.discard(run_id)
+                if task.exception() is not None:
+                    logger.error("Worker crashed while executing %s", run_id, exc_info=task.exception())
+                processed += 1
+    finally:
+        heartbeat.stop()
+        await close_async_client()
+        await sync_to_async(run_counters.flush)()
+    
+    return processed
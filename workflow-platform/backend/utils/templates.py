@@ -0,0 +1,141 @@
+# utils/templates.py
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Set, Tuple
+import re
+import threading
+
+# {{trigger.title}}, {{step_0.page_id}}, {{trigger.items.0.name}}
+PLACEHOLDER_PATTERN = re.compile(r'\{\{\s*([\w\-]+(?:\.[\w\-]+)*)\s*\}\}')
+
+# How many compiled step configs a process keeps around
+COMPILED_CACHE_SIZE = 1024
+
+_MISSING = object()
+
+class CompiledTemplate:
+    """A config structure whose {{path.to.value}} placeholders are parsed once.
+    
+    Rendering walks the precompiled structure and does one context lookup
+    per placeholder, so it costs the same however large the context grows.
+    Values are substituted as text, and placeholders that do not resolve
+    are left as they are.
+    """
+    
+    def __init__(self, config: Any):
+        self.paths: Set[Tuple[str, ...]] = set()
+        self._render, _ = self._compile(config)
+    
+    @property
+    def references(self) -> Set[str]:
+        """Top-level context keys the template reads, e.g. {'trigger', 'step_0'}"""
+        return {path[0] for path in self.paths}
+    
+    def render(self, context: Dict[str, Any]) -> Any:
+        return self._render(context)
+    
+    def _compile(self, value: Any) -> Tuple[Callable[[Dict[str, Any]], Any], bool]:
+        """Return a render function for value and whether its output is constant"""
+        if isinstance(value, str):
+            return self._compile_string(value)
+        
+        if isinstance(value, dict):
+            items = [(key, self._compile(item)) for key, item in value.items()]
+            if all(constant for _, (_, constant) in items):
+                return self._compile_constant(value), True
+            renderers = [(key, render) for key, (render, _) in items]
+            return (lambda context: {key: render(context) for key, render in renderers}), False
+        
+        if isinstance(value, list):
+            items = [self._compile(item) for item in value]
+            if all(constant for _, constant in items):
+                return self._compile_constant(value), True
+            renderers = [render for render, _ in items]
+            return (lambda context: [render(context) for render in renderers]), False
+        
+        return (lambda context: value), True
+    
+    def _compile_constant(self, value: Any) -> Callable[[Dict[str, Any]], Any]:
+        """Render a placeholder-free dict or list as a fresh copy each time.
+        
+        The config is the step's stored (and cached) config, so handing out
+        the object itself would let whoever changes the rendered params
+        change the step for every later run.
+        """
+        snapshot = _copy_containers(value)
+        return lambda context: _copy_containers(snapshot)
+    
+    def _compile_string(self, value: str) -> Tuple[Callable[[Dict[str, Any]], Any], bool]:
+        parts = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(value):
+            if match.start() > position:
+                parts.append(value[position:match.start()])
+            path = tuple(match.group(1).split('.'))
+            self.paths.add(path)
+            parts.append((path, match.group(0)))
+            position = match.end()
+        
+        if not parts:
+            return (lambda context: value), True
+        
+        if position < len(value):
+            parts.append(value[position:])
+        
+        def render(context):
+            rendered = []
+            for part in parts:
+                if isinstance(part, str):
+                    rendered.append(part)
+                    continue
+                path, raw = part
+                resolved = _resolve(context, path)
+                rendered.append(raw if resolved is _MISSING else str(resolved))
+            return ''.join(rendered)
+        
+        return render, False
+
+
+def _copy_containers(value: Any) -> Any:
+    """Copy the dicts and lists of a JSON value; everything else is immutable"""
+    if isinstance(value, dict):
+        return {key: _copy_containers(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_containers(item) for item in value]
+    return value
+
+
+def _resolve(context: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    current = context
+    for key in path:
+        if isinstance(current, dict):
+            current = current.get(key, _MISSING)
+        elif isinstance(current, list) and key.isdigit() and int(key) < len(current):
+            current = current[int(key)]
+        else:
+            return _MISSING
+        if current is _MISSING:
+            return _MISSING
+    return current
+
+
+_compiled_cache: 'OrderedDict[Hashable, CompiledTemplate]' = OrderedDict()
+_compiled_cache_lock = threading.Lock()
+
+
+def compile_config(config: Any, key: Hashable = None) -> CompiledTemplate:
+    """Compile config, reusing an earlier compilation stored under the same key"""
+    if key is None:
+        return CompiledTemplate(config)
+    
+    with _compiled_cache_lock:
+        compiled = _compiled_cache.get(key)
+        if compiled is not None:
+            _compiled_cache.move_to_end(key)
+            return compiled
+    
+    compiled = CompiledTemplate(config)
+    with _compiled_cache_lock:
+        _compiled_cache[key] = compiled
+        while len(_compiled_cache) > COMPILED_CACHE_SIZE:
+            _compiled_cache.popitem(last=False)
+    return compiled
@@ -0,0 +1,68 @@
+# workflows/counters.py
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, F, When, Value
+from .models import Workflow
+from datetime import datetime
+from typing import Dict, Tuple
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def apply_run_stats(workflow_id: str, runs: int, last_run: datetime):
+    """Add runs to total_runs and move last_run forward, touching only those columns"""
+    Workflow.objects.filter(pk=workflow_id).update(
+        total_runs=F('total_runs') + runs,
+        # Runs can finish out of order; never move last_run backwards
+        last_run=Case(
+            When(last_run__gte=last_run, then=F('last_run')),
+            default=Value(last_run),
+        ),
+    )
+
+
+class RunCounterBuffer:
+    """Coalesces run accounting for hot workflows into one UPDATE per flush interval"""
+    
+    def __init__(self):
+        self._pending: Dict[str, Tuple[int, datetime]] = {}
+        self._lock = threading.Lock()
+        self._timer = None
+    
+    def record(self, workflow_id: str, last_run: datetime):
+        interval = settings.WORKFLOW_RUN_COUNTER_FLUSH_MS
+        if not interval:
+            apply_run_stats(workflow_id, 1, last_run)
+            return
+        
+        with self._lock:
+            runs, latest = self._pending.get(workflow_id, (0, last_run))
+            self._pending[workflow_id] = (runs + 1, max(latest, last_run))
+            
+            if self._timer is None:
+                self._timer = threading.Timer(interval / 1000, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+    
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._timer = None
+        
+        for workflow_id, (runs, last_run) in pending.items():
+            try:
+                apply_run_stats(workflow_id, runs, last_run)
+            except Exception:
+                logger.exception("Failed to flush %d runs for workflow %s", runs, workflow_id)
+    
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            connection.close()
+
+run_counters = RunCounterBuffer()
+atexit.register(run_counters.flush)
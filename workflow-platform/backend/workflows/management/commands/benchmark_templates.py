@@ -0,0 +1,59 @@
+# workflows/management/commands/benchmark_templates.py
+from django.core.management.base import BaseCommand
+from utils.templates import compile_config
+import timeit
+
+
+def legacy_replace_variables(config, context):
+    """The per-render substitution WorkflowExecutor used before templates were compiled"""
+    result = {}
+    for key, value in config.items():
+        if isinstance(value, str) and '{{' in value:
+            for ctx_key, ctx_value in context.items():
+                if isinstance(ctx_value, dict):
+                    for sub_key, sub_value in ctx_value.items():
+                        template = f"{{{{{ctx_key}.{sub_key}}}}}"
+                        if template in value:
+                            value = value.replace(template, str(sub_value))
+        result[key] = value
+    return result
+
+
+class Command(BaseCommand):
+    help = 'Compare per-step config render cost of compiled templates and the legacy substitution'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fields', type=int, default=5, help='Templated fields in the step config')
+        parser.add_argument('--steps', type=int, default=10, help='Earlier step outputs in the context')
+        parser.add_argument('--keys', type=int, default=20, help='Keys per step output')
+        parser.add_argument('--iterations', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        steps, keys = options['steps'], options['keys']
+        context = {'trigger': {f'field_{k}': f'value {k}' for k in range(keys)}}
+        for n in range(steps):
+            context[f'step_{n}'] = {f'field_{k}': f'output {n}.{k}' for k in range(keys)}
+
+        config = {
+            f'param_{i}': f'Ticket {{{{trigger.field_{i % keys}}}}} from {{{{step_{i % steps}.field_{i % keys}}}}}'
+            for i in range(options['fields'])
+        }
+        config['static'] = 'no placeholders here'
+
+        compiled = compile_config(config)
+        if compiled.render(context) != legacy_replace_variables(config, context):
+            self.stderr.write('Compiled and legacy renders differ')
+            return
+
+        iterations = options['iterations']
+        legacy = timeit.timeit(lambda: legacy_replace_variables(config, context), number=iterations)
+        render = timeit.timeit(lambda: compiled.render(context), number=iterations)
+        compile_once = timeit.timeit(lambda: compile_config(config), number=iterations)
+
+        self.stdout.write(
+            f"{options['fields']} templated fields, context of {steps} steps x {keys} keys\n"
+            f"  legacy substitution: {legacy / iterations * 1e6:8.1f} us/step\n"
+            f"  compiled render:     {render / iterations * 1e6:8.1f} us/step\n"
+            f"  compile (cache miss):{compile_once / iterations * 1e6:8.1f} us/step\n"
+            f"  speedup:             {legacy / render:8.1f}x"
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-18 03:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflow',
+            name='execution_mode',
+            field=models.CharField(choices=[('sequential', 'Sequential'), ('parallel', 'Parallel (dependency graph)')], default='sequential', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='workflowstep',
+            name='depends_on',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0002_execution_mode_and_step_dependencies'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflowstep',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
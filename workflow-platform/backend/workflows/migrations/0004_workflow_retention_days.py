@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0003_workflowstep_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflow',
+            name='retention_days',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
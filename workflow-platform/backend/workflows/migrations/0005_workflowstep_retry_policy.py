@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0004_workflow_retention_days'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflowstep',
+            name='retry_policy',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
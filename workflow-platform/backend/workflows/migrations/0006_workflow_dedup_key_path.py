@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 05:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0005_workflowstep_retry_policy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflow',
+            name='dedup_key_path',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
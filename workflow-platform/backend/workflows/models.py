@@ -1,17 +1,29 @@
 # workflows/models.py
 from django.db import models
 from django.contrib.auth.models import User
+from utils.templates import CompiledTemplate, compile_config
 import uuid
 
 class Workflow(models.Model):
+    EXECUTION_MODES = [
+        ('sequential', 'Sequential'),
+        ('parallel', 'Parallel (dependency graph)'),
+    ]
+    
     id = models.CharField(max_length=50, primary_key=True, editable=False)
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     enabled = models.BooleanField(default=False)
+    execution_mode = models.CharField(max_length=20, choices=EXECUTION_MODES, default='sequential')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     total_runs = models.IntegerField(default=0)
     last_run = models.DateTimeField(null=True, blank=True)
+    # Days of run history to keep; None falls back to RUNS_RETENTION_DAYS
+    retention_days = models.PositiveIntegerField(null=True, blank=True)
+    # JSONPath-style path to a payload value identifying a trigger (e.g.
+    # $.event.id), used for dedup when the sender sets no Idempotency-Key
+    dedup_key_path = models.CharField(max_length=255, blank=True)
     
     def save(self, *args, **kwargs):
         if not self.id:
@@ -38,7 +50,14 @@ class WorkflowStep(models.Model):
     action_type = models.CharField(max_length=50, choices=ACTION_TYPES)
     app_id = models.CharField(max_length=50)
     config = models.JSONField(default=dict)
+    # Orders of steps that must finish first, on top of the {{step_N.*}}
+    # references found in config. Only used in parallel execution mode.
+    depends_on = models.JSONField(default=list, blank=True)
+    # Overrides of the app's retry policy for this step (see utils/retries.py),
+    # e.g. {"max_attempts": 5, "retry_on": ["timeout"]}
+    retry_policy = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['order']
@@ -48,5 +67,10 @@ class WorkflowStep(models.Model):
             self.id = f"step_{uuid.uuid4().hex[:8]}"
         super().save(*args, **kwargs)
     
+    @property
+    def compiled_config(self) -> CompiledTemplate:
+        """Config with its placeholders parsed, reused across runs until the step is saved again"""
+        return compile_config(self.config, key=(self.id, self.updated_at))
+    
     def __str__(self):
         return f"{self.workflow.name} - Step {self.order}"
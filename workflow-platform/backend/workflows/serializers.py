@@ -1,11 +1,57 @@
 # workflows/serializers.py
 from rest_framework import serializers
+from runs.dedup import parse_key_path
+from utils.graph import DependencyError, check_dependencies, step_dependencies
+from utils.retries import RetryPolicy
+from utils.templates import compile_config
 from .models import Workflow, WorkflowStep
+from typing import Any, Iterable, List, Tuple
+
+def validate_key_path(value: str) -> str:
+    if value:
+        try:
+            parse_key_path(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+    return value
+
+def validate_depends_on(value) -> List[int]:
+    if not isinstance(value, list) or any(type(order) is not int or order < 0 for order in value):
+        raise serializers.ValidationError('Expected a list of step orders')
+    return value
+
+def validate_dependencies(steps: Iterable[Tuple[int, List[int], Any]]):
+    """Check a workflow's steps, given as (order, depends_on, config), with
+    the same rules runs plan them by: every order named, explicitly or as a
+    {{step_N}} placeholder, must be a step of the workflow, and no step may
+    depend on itself, directly or through others"""
+    try:
+        check_dependencies(
+            (order, step_dependencies(depends_on, compile_config(config).references))
+            for order, depends_on, config in steps
+        )
+    except DependencyError as e:
+        raise serializers.ValidationError(str(e))
 
 class WorkflowStepSerializer(serializers.ModelSerializer):
     class Meta:
         model = WorkflowStep
-        fields = ['id', 'order', 'action_type', 'app_id', 'config']
+        fields = ['id', 'order', 'action_type', 'app_id', 'config', 'depends_on', 'retry_policy']
+    
+    def validate_depends_on(self, value):
+        return validate_depends_on(value)
+    
+    def validate_retry_policy(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('Expected an object')
+        unknown = set(value) - set(RetryPolicy.OPTIONS)
+        if unknown:
+            raise serializers.ValidationError(f"Unknown options: {', '.join(sorted(unknown))}")
+        try:
+            RetryPolicy(**value)
+        except (TypeError, ValueError) as e:
+            raise serializers.ValidationError(str(e))
+        return value
 
 class WorkflowSerializer(serializers.ModelSerializer):
     steps = WorkflowStepSerializer(many=True, read_only=True)
@@ -13,18 +59,30 @@ class WorkflowSerializer(serializers.ModelSerializer):
     class Meta:
         model = Workflow
         fields = [
-            'id', 'name', 'description', 'enabled',
+            'id', 'name', 'description', 'enabled', 'execution_mode',
             'created_at', 'updated_at', 'total_runs',
-            'last_run', 'steps'
+            'last_run', 'retention_days', 'dedup_key_path', 'steps'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'total_runs', 'last_run']
+    
+    def validate_dedup_key_path(self, value):
+        return validate_key_path(value)
 
 class WorkflowCreateSerializer(serializers.ModelSerializer):
     steps = WorkflowStepSerializer(many=True, required=False)
     
     class Meta:
         model = Workflow
-        fields = ['name', 'description', 'enabled', 'steps']
+        fields = ['name', 'description', 'enabled', 'execution_mode', 'retention_days', 'dedup_key_path', 'steps']
+    
+    def validate_dedup_key_path(self, value):
+        return validate_key_path(value)
+    
+    def validate_steps(self, value):
+        validate_dependencies(
+            (step.get('order', 0), step.get('depends_on', []), step.get('config', {})) for step in value
+        )
+        return value
     
     def create(self, validated_data):
         steps_data = validated_data.pop('steps', [])
@@ -1,3 +1,133 @@
+# workflows/tests.py
 from django.test import TestCase
+from rest_framework.test import APIClient
+from utils.executor import WorkflowExecutor
+from .models import Workflow, WorkflowStep
+from .serializers import WorkflowCreateSerializer
+import json
 
-# Create your tests here.
+def slack_step(order: int, depends_on=(), **config) -> dict:
+    return {
+        'order': order,
+        'action_type': 'slack_send_message',
+        'app_id': 'slack',
+        'config': {'channel': '#general', 'message': 'hi', **config},
+        'depends_on': list(depends_on),
+    }
+
+class StepDependencyTest(TestCase):
+    """Saving steps and running them reject the same dependency graphs"""
+    
+    def setUp(self):
+        self.client = APIClient()
+    
+    def create_errors(self, steps) -> str:
+        serializer = WorkflowCreateSerializer(data={'name': 'Fan out', 'steps': steps})
+        self.assertFalse(serializer.is_valid())
+        return str(serializer.errors['steps'][0])
+    
+    def add_step(self, workflow: Workflow, depends_on, **config):
+        return self.client.post(
+            f'/api/workflows/{workflow.id}/add_step/',
+            {'action_type': 'slack_send_message', 'app_id': 'slack', 'config': config, 'depends_on': depends_on},
+            format='json'
+        )
+    
+    def test_serializer_accepts_a_dag(self):
+        steps = [slack_step(0), slack_step(1, [0]), slack_step(2, [0]), slack_step(3, [1], message='{{step_2.ts}}')]
+        serializer = WorkflowCreateSerializer(data={'name': 'Fan out', 'steps': steps})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        
+        workflow = serializer.save()
+        self.assertEqual(list(workflow.steps.values_list('depends_on', flat=True)), [[], [0], [0], [1]])
+    
+    def test_serializer_rejects_cycles(self):
+        self.assertEqual(self.create_errors([slack_step(0, [1]), slack_step(1, [0])]), 'Dependency cycle between steps 0, 1')
+        self.assertEqual(self.create_errors([slack_step(0, [0])]), 'Step 0 depends on itself')
+        # A placeholder is as much a dependency as depends_on
+        self.assertEqual(
+            self.create_errors([slack_step(0, [1]), slack_step(1, message='{{step_0.ts}}')]),
+            'Dependency cycle between steps 0, 1'
+        )
+    
+    def test_serializer_rejects_unknown_steps(self):
+        self.assertEqual(self.create_errors([slack_step(0), slack_step(1, [5])]), 'Step 1 depends on unknown steps: 5')
+        self.assertEqual(
+            self.create_errors([slack_step(0, message='{{step_3.ts}}')]),
+            'Step 0 depends on unknown steps: 3'
+        )
+    
+    def test_add_step(self):
+        response = self.client.post('/api/workflows/', {'name': 'Fan out', 'steps': [slack_step(0), slack_step(1, [0])]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        workflow = Workflow.objects.get()
+        
+        # Valid: step 2 waits on both earlier steps
+        self.assertEqual(self.add_step(workflow, [0, 1]).status_code, 200)
+        
+        response = self.add_step(workflow, [7])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'depends_on': ['Step 3 depends on unknown steps: 7']})
+        
+        # The new step is step 3, so depending on it is depending on itself
+        response = self.add_step(workflow, [3])
+        self.assertEqual(response.json(), {'depends_on': ['Step 3 depends on itself']})
+        
+        response = self.add_step(workflow, [], message='{{step_4.ts}}')
+        self.assertEqual(response.json(), {'depends_on': ['Step 3 depends on unknown steps: 4']})
+        self.assertEqual(workflow.steps.count(), 3)
+    
+    def test_add_step_rejects_cycles_through_stored_steps(self):
+        workflow = Workflow.objects.create(name='Fan out')
+        # Stored before dependencies were validated: step 0 waits on a step 1
+        WorkflowStep.objects.create(workflow=workflow, order=0, action_type='slack_send_message', app_id='slack', depends_on=[1])
+        
+        response = self.add_step(workflow, [0])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'depends_on': ['Dependency cycle between steps 0, 1']})
+        self.assertEqual(workflow.steps.count(), 1)
+    
+    def test_run_fails_on_the_graph_saving_rejects(self):
+        workflow = Workflow.objects.create(name='Fan out', enabled=True, execution_mode='parallel')
+        for order, depends_on in ((0, []), (1, [9])):
+            WorkflowStep.objects.create(
+                workflow=workflow, order=order, action_type='slack_send_message', app_id='slack', depends_on=depends_on
+            )
+        
+        run = WorkflowExecutor(workflow).execute({})
+        
+        self.assertEqual(run.status, 'failed')
+        self.assertEqual(run.error_message, 'Step 1 depends on unknown steps: 9')
+        self.assertFalse(run.step_runs.exists())
+
+class StepConfigRenderTest(TestCase):
+    """Rendered params are the run's own; changing them leaves the step alone"""
+    
+    def create_step(self, config: dict) -> WorkflowStep:
+        workflow = Workflow.objects.create(name='Notify')
+        return WorkflowStep.objects.create(
+            workflow=workflow, order=0, action_type='slack_send_message', app_id='slack', config=config
+        )
+    
+    def test_mutating_rendered_constants_leaves_the_config_unchanged(self):
+        config = {
+            'channel': '#general',
+            'message': '{{trigger.title}}',
+            'blocks': [{'type': 'section', 'fields': ['a']}],
+            'options': {'unfurl_links': False},
+        }
+        for step_config in (config, {'channel': '#general', 'blocks': [{'type': 'section'}]}):
+            step = self.create_step(step_config)
+            expected = json.loads(json.dumps(step_config))
+            
+            params = step.compiled_config.render({'trigger': {'title': 'Deployed'}})
+            # What a service filling in defaults does to its params
+            params['blocks'][0]['type'] = 'divider'
+            params['blocks'].append({'type': 'context'})
+            params.setdefault('options', {})['unfurl_links'] = True
+            params['as_user'] = True
+            
+            self.assertEqual(step.config, expected)
+            self.assertEqual(step.compiled_config.render({'trigger': {'title': 'Deployed'}})['blocks'], expected['blocks'])
+            step.refresh_from_db()
+            self.assertEqual(step.config, expected)
@@ -1,9 +1,12 @@
 # workflows/views.py
+from django.conf import settings
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from .models import Workflow, WorkflowStep
-from .serializers import WorkflowSerializer, WorkflowCreateSerializer
+from .serializers import WorkflowSerializer, WorkflowCreateSerializer, validate_dependencies, validate_depends_on
+from runs.dedup import trigger_key, trigger_once
 from utils.executor import WorkflowExecutor
 
 class WorkflowViewSet(viewsets.ModelViewSet):
@@ -25,15 +28,38 @@ class WorkflowViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Execute workflow
         executor = WorkflowExecutor(workflow)
-        run = executor.execute(request.data)
+        inline = settings.WORKFLOW_TRIGGER_MODE == 'inline'
+        create_run = lambda: executor.create_run(request.data, 'running' if inline else 'pending')
         
+        # Senders retry webhooks; a repeated key gets the original run back
+        key = trigger_key(workflow, request)
+        if key is None:
+            run = create_run()
+        else:
+            run, duplicate = trigger_once(workflow, key, create_run)
+            if duplicate:
+                return Response({
+                    'run_id': run.run_id,
+                    'status': run.status,
+                    'duplicate': True,
+                    'message': 'Duplicate trigger, returning the original run'
+                }, headers={'Idempotent-Replayed': 'true'})
+        
+        if inline:
+            run = executor.execute_run(run)
+            return Response({
+                'run_id': run.run_id,
+                'status': run.status,
+                'message': 'Workflow execution started'
+            })
+        
+        # Queued for the worker pool; return immediately
         return Response({
             'run_id': run.run_id,
             'status': run.status,
-            'message': 'Workflow execution started'
-        })
+            'message': 'Workflow execution queued'
+        }, status=status.HTTP_202_ACCEPTED)
     
     @action(detail=True, methods=['post'])
     def add_step(self, request, pk=None):
@@ -44,12 +70,23 @@ class WorkflowViewSet(viewsets.ModelViewSet):
         step_data['workflow'] = workflow.id
         step_data['order'] = workflow.steps.count()
         
+        depends_on = step_data.get('depends_on', [])
+        try:
+            validate_depends_on(depends_on)
+            validate_dependencies([
+                *workflow.steps.values_list('order', 'depends_on', 'config'),
+                (step_data['order'], depends_on, step_data.get('config', {})),
+            ])
+        except ValidationError as e:
+            raise ValidationError({'depends_on': e.detail})
+        
         step = WorkflowStep.objects.create(
             workflow=workflow,
             order=step_data['order'],
             action_type=step_data['action_type'],
             app_id=step_data['app_id'],
-            config=step_data.get('config', {})
+            config=step_data.get('config', {}),
+            depends_on=depends_on
         )
         
         return Response({
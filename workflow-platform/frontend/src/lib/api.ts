@@ -1,5 +1,6 @@
 // src/lib/api.ts
 import axios from 'axios';
+import type { RunsPage } from './types';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api';
 
@@ -34,11 +35,14 @@ export const integrationsAPI = {
 
 // Runs API
 export const runsAPI = {
-  list: (params?: any) => api.get('/runs/', { params }),
+  // Newest first; pass the cursor from the previous page's `next` link to continue
+  list: (params?: { cursor?: string; status?: string; workflow?: string; page_size?: number; expand?: 'steps' }) =>
+    api.get<RunsPage>('/runs/', { params }),
   get: (id: string) => api.get(`/runs/${id}/`),
 };
 
 // Analytics API
 export const analyticsAPI = {
-  get: (days: number = 7) => api.get('/analytics/', { params: { days } }),
+  get: (days: number = 7, sections?: string[]) =>
+    api.get('/analytics/', { params: { days, sections: sections?.join(',') } }),
 };
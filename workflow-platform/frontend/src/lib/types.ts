@@ -8,6 +8,8 @@ export interface Workflow {
   updated_at: string;
   total_runs: number;
   last_run: string | null;
+  retention_days: number | null;
+  dedup_key_path: string;
   steps: WorkflowStep[];
 }
 
@@ -17,6 +19,16 @@ export interface WorkflowStep {
   action_type: string;
   app_id: string;
   config: Record<string, any>;
+  depends_on?: number[];
+  retry_policy?: RetryPolicy;
+}
+
+export interface RetryPolicy {
+  max_attempts?: number;
+  backoff_base?: number;
+  backoff_max?: number;
+  jitter?: boolean;
+  retry_on?: string[];
 }
 
 export interface Integration {
@@ -67,9 +79,20 @@ export interface WorkflowRun {
   completed_at: string | null;
   duration_ms: number;
   error_message: string;
+  error_category: ErrorCategory | '';
   step_runs: StepRun[];
 }
 
+// Row of the runs list: no inputs, and steps only with ?expand=steps
+export type WorkflowRunSummary = Omit<WorkflowRun, 'inputs' | 'step_runs'> & {
+  step_runs?: StepRun[];
+};
+
+export interface RunsPage {
+  next: string | null;
+  results: WorkflowRunSummary[];
+}
+
 export interface StepRun {
   step_id: string;
   step_name: string;
@@ -81,8 +104,31 @@ export interface StepRun {
   input_data: Record<string, any>;
   output_data: Record<string, any> | null;
   error_message: string;
+  error_category: ErrorCategory | '';
+  app_type: string;
+  host: string;
+  http_status: number | null;
+  ttfb_ms: number | null;
+  request_ms: number | null;
+  retries: number;
+  response_bytes: number | null;
+  cache_status: '' | 'hit' | 'miss' | 'coalesced';
+  attempts: number;
+  attempt_log: StepAttempt[];
 }
 
+export interface StepAttempt {
+  attempt: number;
+  success: boolean;
+  duration_ms: number;
+  http_status?: number | null;
+  error?: string;
+  failure?: string;
+  retry_in_ms?: number;
+}
+
+export type ErrorCategory = 'timeout' | 'authentication' | 'rate_limit' | 'not_found' | 'validation' | 'other';
+
 export interface Analytics {
   total_runs: number;
   success_rate: number;
@@ -94,6 +140,8 @@ export interface Analytics {
   workflows: WorkflowPerformance[];
   steps: StepDiagnostic[];
   hosts: HostHealth[];
+  // Sections left out of the response, with the reason
+  sectionErrors?: Record<string, string>;
 }
 
 export interface TimeSeriesData {
@@ -129,7 +177,14 @@ export interface StepDiagnostic {
 
 export interface HostHealth {
   host: string;
+  app_type: string;
   calls: number;
   p95_latency_ms: number;
   error_rate: number;
-}
\ No newline at end of file
+  status: HostStatus;
+  circuit: CircuitState;
+}
+
+export type HostStatus = 'healthy' | 'degraded' | 'down';
+
+export type CircuitState = 'closed' | 'open' | 'half_open';
\ No newline at end of file
@@ -388,19 +388,26 @@ export function AnalyticsPage() {
                       <div className="flex items-center gap-3">
                         <div className={cn(
                           "w-3 h-3 rounded-full",
-                          host.error_rate < 0.05 ? "bg-green-500" :
-                          host.error_rate < 0.1 ? "bg-yellow-500" : "bg-red-500"
+                          host.status === 'healthy' ? "bg-green-500" :
+                          host.status === 'degraded' ? "bg-yellow-500" : "bg-red-500"
                         )} />
                         <h4 className="font-medium text-foreground">{host.host}</h4>
                       </div>
-                      <span className="text-xs font-semibold px-2 py-1 rounded-full" style={{
-                        backgroundColor: host.error_rate < 0.05 ? '#d1fae5' :
-                          host.error_rate < 0.1 ? '#fef3c7' : '#fee2e2',
-                        color: host.error_rate < 0.05 ? '#047857' :
-                          host.error_rate < 0.1 ? '#92400e' : '#991b1b'
-                      }}>
-                        {host.error_rate < 0.05 ? 'Healthy' : host.error_rate < 0.1 ? 'Degraded' : 'Down'}
-                      </span>
+                      <div className="flex items-center gap-2">
+                        {host.circuit !== 'closed' && (
+                          <span className="text-xs text-muted-foreground">
+                            {host.circuit === 'open' ? 'Circuit open' : 'Circuit half-open'}
+                          </span>
+                        )}
+                        <span className="text-xs font-semibold px-2 py-1 rounded-full" style={{
+                          backgroundColor: host.status === 'healthy' ? '#d1fae5' :
+                            host.status === 'degraded' ? '#fef3c7' : '#fee2e2',
+                          color: host.status === 'healthy' ? '#047857' :
+                            host.status === 'degraded' ? '#92400e' : '#991b1b'
+                        }}>
+                          {host.status === 'healthy' ? 'Healthy' : host.status === 'degraded' ? 'Degraded' : 'Down'}
+                        </span>
+                      </div>
                     </div>
                     <div className="grid grid-cols-4 gap-4 text-sm">
                       <div>
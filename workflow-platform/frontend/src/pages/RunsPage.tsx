@@ -2,7 +2,7 @@
 import { useState, useEffect } from 'react';
 import { Search, Clock, Eye, Copy, RefreshCw, Download, X } from 'lucide-react';
 import { runsAPI } from '@/lib/api';
-import type { WorkflowRun } from '@/lib/types';
+import type { WorkflowRun, WorkflowRunSummary } from '@/lib/types';
 import { Card, CardContent } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
 import { Input } from '@/components/ui/input';
@@ -14,8 +14,10 @@ import { toast } from 'sonner';
 import { formatDuration, formatTime, formatDate } from '@/lib/utils';
 
 export function RunsPage() {
-  const [runs, setRuns] = useState<WorkflowRun[]>([]);
+  const [runs, setRuns] = useState<WorkflowRunSummary[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [selectedRun, setSelectedRun] = useState<WorkflowRun | null>(null);
   const [filters, setFilters] = useState({ search: '', status: '' });
 
@@ -23,12 +25,13 @@ export function RunsPage() {
     loadRuns();
   }, []);
 
+  const cursorFrom = (next: string | null) => (next ? new URL(next).searchParams.get('cursor') : null);
+
   const loadRuns = async () => {
     try {
       const response = await runsAPI.list();
-      // Handle both array and paginated response formats
-      const data = Array.isArray(response.data) ? response.data : (response.data.results || []);
-      setRuns(data);
+      setRuns(response.data.results);
+      setNextCursor(cursorFrom(response.data.next));
     } catch (error) {
       toast.error('Failed to load runs');
       console.error(error);
@@ -37,6 +40,32 @@ export function RunsPage() {
     }
   };
 
+  const loadMoreRuns = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await runsAPI.list({ cursor: nextCursor });
+      setRuns((current) => [...current, ...response.data.results]);
+      setNextCursor(cursorFrom(response.data.next));
+    } catch (error) {
+      toast.error('Failed to load more runs');
+      console.error(error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // The list leaves out inputs and steps; fetch the full run when it is opened
+  const openRun = async (runId: string) => {
+    try {
+      const response = await runsAPI.get(runId);
+      setSelectedRun(response.data);
+    } catch (error) {
+      toast.error('Failed to load run details');
+      console.error(error);
+    }
+  };
+
   const filteredRuns = runs.filter(run => {
     if (filters.search && !run.run_id.toLowerCase().includes(filters.search.toLowerCase())) {
       return false;
@@ -125,7 +154,7 @@ export function RunsPage() {
             <Card
               key={run.run_id}
               className="hover:shadow-md transition-all duration-200 cursor-pointer"
-              onClick={() => setSelectedRun(run)}
+              onClick={() => openRun(run.run_id)}
             >
               <CardContent className="p-4">
                 <div className="flex items-center gap-4">
@@ -158,6 +187,14 @@ export function RunsPage() {
             </Card>
           ))
         )}
+
+        {nextCursor && (
+          <div className="flex justify-center pt-2">
+            <Button variant="outline" onClick={loadMoreRuns} disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </Button>
+          </div>
+        )}
       </div>
 
       {/* Run Detail Sheet */}